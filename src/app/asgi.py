@@ -9,21 +9,13 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.security.websocket import AllowedHostsOriginValidator
-
-from lobby.middleware import TokenMiddlewareStack
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
 
+from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+# Set up Django before the consumers import their models
+http_application = get_asgi_application()
 
-from arena.routing import websocket_urlpatterns as arena_routes
-from lobby.routing import websocket_urlpatterns as lobby_routes
+from app.routing import build_application
 
-application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AllowedHostsOriginValidator(
-        TokenMiddlewareStack(URLRouter(arena_routes + lobby_routes))
-    )
-})
+application = build_application(http_application)
@@ -0,0 +1,19 @@
+"""
+Websocket-only ASGI config, for workers serving the lobby and arena.
+
+Uses the app.settings_ws profile, see there. HTTP requests only reach
+/metrics, the API and admin are served by app.asgi.
+"""
+
+import os
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings_ws')
+
+from django.core.asgi import get_asgi_application
+
+# Set up Django before the consumers import their models
+http_application = get_asgi_application()
+
+from app.routing import build_application
+
+application = build_application(http_application)
@@ -1,4 +1,5 @@
 from celery import Celery
+from celery.signals import worker_process_init
 import os
 
 
@@ -10,6 +11,20 @@ app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
 
+
+@worker_process_init.connect
+def reset_db_pool(**kwargs):
+    """
+    Forked worker processes must not share the parent's
+    DB connection pool, so each one opens its own.
+    """
+
+    from django.db import connections
+
+    for connection in connections.all():
+        if getattr(connection, "pool", None) is not None:
+            connection.close_pool()
+
 @app.task(bind=True, ignore_result=True)
 def debug_task(self):
     print(f"Request: {self.request!r}")
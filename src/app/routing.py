@@ -0,0 +1,40 @@
+"""
+The ASGI application shared by app.asgi and app.asgi_ws,
+imported once their settings profile has set Django up.
+"""
+
+from channels.routing import ProtocolTypeRouter, URLRouter
+from channels.security.websocket import AllowedHostsOriginValidator
+
+from django.conf import settings
+
+from lobby.middleware import TokenMiddlewareStack, JWTMiddlewareStack
+from core.scheduler import LifespanApp, get_scheduler
+
+from arena.routing import websocket_urlpatterns as arena_routes
+from lobby.routing import websocket_urlpatterns as lobby_routes
+
+
+def build_application(http_application):
+    """
+    Route HTTP to http_application and websockets to the lobby and
+    arena consumers, behind the auth stack WEBSOCKET_SESSIONLESS_AUTH picks.
+    """
+
+    if settings.WEBSOCKET_SESSIONLESS_AUTH:
+        AuthStack = JWTMiddlewareStack
+    else:
+        AuthStack = TokenMiddlewareStack
+
+    protocols = {
+        "http": http_application,
+        "websocket": AllowedHostsOriginValidator(
+            AuthStack(URLRouter(arena_routes + lobby_routes))
+        )
+    }
+
+    # Servers sending lifespan events (e.g. uvicorn) run housekeeping jobs
+    if settings.HOUSEKEEPING_SCHEDULER:
+        protocols["lifespan"] = LifespanApp(get_scheduler())
+
+    return ProtocolTypeRouter(protocols)
@@ -50,11 +50,13 @@ INSTALLED_APPS = [
 
    # custom apps
     'core',
+    'authenticate',
     'lobby',
     'arena'
 ]
 
 MIDDLEWARE = [
+    'core.middleware.QueryAccountingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -80,6 +82,116 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Single-node deployments can skip Redis and keep channels in process
+if os.environ.get("CHANNEL_LAYER") == "inprocess":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "core.layers.InProcessChannelLayer",
+            "CONFIG": {
+                "capacity": int(os.environ.get("CHANNEL_LAYER_CAPACITY", 100))
+            }
+        }
+    }
+
+# Frames queued per websocket connection before dropping superseded
+# messages, and seconds a client may stay over that before it's closed
+WEBSOCKET_OUTBOUND_QUEUE_SIZE = int(os.environ.get("WEBSOCKET_OUTBOUND_QUEUE_SIZE", 64))
+WEBSOCKET_SLOW_CONSUMER_TIMEOUT = int(os.environ.get("WEBSOCKET_SLOW_CONSUMER_TIMEOUT", 10))
+
+# Admission control for websocket connects (see core.admission): refused with
+# 4013 while the event loop lags over ADMISSION_LOOP_LAG_THRESHOLD seconds, or
+# past ADMISSION_CONNECT_RATE connects a second per IP (bursts of
+# ADMISSION_CONNECT_BURST). Clients are told to retry after ADMISSION_RETRY_AFTER.
+# 0 turns either check off. The rate limit is off by default: behind a proxy or
+# NAT every client shares an IP, unless 'manage.py serve --proxy-headers' is used.
+LOOP_LAG_INTERVAL = float(os.environ.get("LOOP_LAG_INTERVAL", 0.1))
+ADMISSION_LOOP_LAG_THRESHOLD = float(os.environ.get("ADMISSION_LOOP_LAG_THRESHOLD", 0.25))
+ADMISSION_CONNECT_RATE = float(os.environ.get("ADMISSION_CONNECT_RATE", 0))
+ADMISSION_CONNECT_BURST = int(os.environ.get("ADMISSION_CONNECT_BURST", 20))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", 5))
+
+# Worker processes started by 'manage.py serve' (0 for one per CPU), and
+# seconds a draining worker waits for its clients to disconnect before exiting
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", 0))
+SERVER_DRAIN_TIMEOUT = int(os.environ.get("SERVER_DRAIN_TIMEOUT", 30))
+
+# Connections the serve workers' pools may hold together, split evenly between
+# them. Keep it below Postgres's max_connections (100 by default), leaving
+# room for Celery, migrations and psql.
+DB_MAX_CONNECTIONS = int(os.environ.get("DB_MAX_CONNECTIONS", 80))
+
+# Async functions run in order by each worker before it listens (core.warmup),
+# /ready answers 503 until they have all succeeded
+WARMUP_STEPS = [
+    "core.warmup.open_db_connections",
+    "core.warmup.prime_caches",
+    "core.warmup.synthetic_handshake"
+]
+
+# Directory shared by worker processes to sum their metrics for /metrics,
+# each writing its own every METRICS_FLUSH_INTERVAL seconds.
+# Unset serves the answering process's metrics only.
+METRICS_DIR = os.environ.get("METRICS_DIR")
+METRICS_FLUSH_INTERVAL = int(os.environ.get("METRICS_FLUSH_INTERVAL", 5))
+
+# Fraction of websocket events and HTTP requests whose queries are
+# accounted (see core.queries), and the most each handler may make.
+# Sampled runs over budget are logged and counted in /metrics.
+QUERY_ACCOUNTING_SAMPLE_RATE = float(os.environ.get("QUERY_ACCOUNTING_SAMPLE_RATE", 0.01))
+QUERY_BUDGETS = {
+    "TokenMiddleware.handshake": {"queries": 1},
+    "LobbyConsumer.connect": {"queries": 5},
+    "LobbyConsumer.disconnect": {"queries": 1},
+    "LobbyConsumer.receive_json": {"queries": 0},
+    "LobbyConsumer.lobby_challenge": {"queries": 0},
+    "LobbyConsumer.challenge_change_request": {"queries": 0},
+    "LobbyConsumer.player_list": {"queries": 4},
+    "ArenaConsumer.connect": {"queries": 5},
+    "ArenaConsumer.disconnect": {"queries": 1},
+    "ArenaConsumer.receive_json": {"queries": 0},
+    "authenticate:sign-up": {"queries": 2},
+    "authenticate:async-sign-up": {"queries": 2},
+    # Logins save the password too when its hash is upgraded
+    "authenticate:claim-token": {"queries": 2},
+    "authenticate:async-claim-token": {"queries": 2},
+}
+
+# Structured JSON logs, written to stderr by a background thread (core.log)
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+
+# Fraction of each event logged, for events too frequent to log every time
+LOG_SAMPLE_RATES = {
+    "lobby.receive": 0.01,
+    "lobby.player_list": 0.01
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "background": {
+            "()": "core.log.BackgroundHandler",
+            "queue_size": 10000
+        }
+    },
+    "loggers": {
+        name: {"handlers": ["background"], "level": LOG_LEVEL, "propagate": False}
+        for name in ("core", "lobby", "arena", "authenticate")
+    }
+}
+
+# Sampling profiler (core.profiler): a worker receiving PROFILER_SIGNAL
+# samples its event loop and DB executor threads PROFILER_SAMPLE_RATE times
+# a second for PROFILER_DURATION seconds, writing collapsed stacks to PROFILER_DIR
+PROFILER_SIGNAL = os.environ.get("PROFILER_SIGNAL", "SIGUSR2")
+PROFILER_SAMPLE_RATE = int(os.environ.get("PROFILER_SAMPLE_RATE", 100))
+PROFILER_DURATION = int(os.environ.get("PROFILER_DURATION", 30))
+PROFILER_DIR = os.environ.get("PROFILER_DIR", "/tmp/profiles")
+
+# Allocation tracing (core.memory, /debug/memory): with METRICS_DIR set, a
+# serve worker receiving MEMORY_SIGNAL answers a request another worker relayed
+MEMORY_SIGNAL = os.environ.get("MEMORY_SIGNAL", "SIGUSR1")
+
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICAITON_CLASSES": (
@@ -87,19 +199,64 @@ REST_FRAMEWORK = {
     )
 }
 
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "authenticate.serializers.ClaimsTokenObtainPairSerializer"
+}
+
 SPECTACULAR_SETTINGS = {
     "COMPONENT_SPLIT_REQUEST": True
 }
 
-CELERYBEAT_SCHEDULE = {
+# Housekeeping jobs run by the ASGI workers' scheduler (core.scheduler),
+# one worker at a time. Celery beat runs them instead when it's disabled.
+# The scheduler is started by 'manage.py serve' workers and by servers sending
+# lifespan events (e.g. uvicorn), not by daphne or runserver: disable it there.
+HOUSEKEEPING_SCHEDULER = int(os.environ.get("HOUSEKEEPING_SCHEDULER", 1))
+
+# 'advisory' (Postgres advisory locks) or 'local' (this process only)
+HOUSEKEEPING_LOCKS = os.environ.get("HOUSEKEEPING_LOCKS", "advisory")
+
+# Rows deleted per transaction by housekeeping jobs
+HOUSEKEEPING_CHUNK_SIZE = int(os.environ.get("HOUSEKEEPING_CHUNK_SIZE", 1000))
+
+PRUNE_PLAYERS_INTERVAL = int(os.environ.get("PRUNE_PLAYERS_INTERVAL", 60))
+
+SCHEDULED_JOBS = {
+    "prune_players": {
+        "function": "core.housekeeping.prune_players",
+        "schedule": timedelta(seconds=PRUNE_PLAYERS_INTERVAL),
+        "jitter": 0.1
+    }
+}
+
+CELERYBEAT_SCHEDULE = {} if HOUSEKEEPING_SCHEDULER else {
     "prune_players": {
         "task": "core.tasks.prune_players",
-        "schedule": timedelta(seconds=60)
+        "schedule": timedelta(seconds=PRUNE_PLAYERS_INTERVAL)
     }
 }
 
 PLAYER_MAX_AGE = 60
 
+# Games per page of /api/games/ (arena.views.GameHistoryView)
+GAME_HISTORY_PAGE_SIZE = 20
+
+# Verified websocket handshake tokens cached per worker (lobby.token_cache).
+# Saving a user drops its entries in every 'manage.py serve' worker, through the
+# channel layer. Other servers keep authenticating a deactivated user for up to
+# MAX_AGE seconds.
+TOKEN_USER_CACHE_SIZE = 10000
+TOKEN_USER_CACHE_MAX_AGE = 300
+
+# Process pool used by the async signup/token views to hash passwords
+# (authenticate.hashing). None sizes the pool to the number of CPUs.
+PASSWORD_HASHING_WORKERS = None
+PASSWORD_HASHING_MAX_PENDING = 64
+
+# Authenticate websockets from token claims alone, skipping the
+# cookie/session layers and the user query (lobby.middleware.JWTMiddlewareStack)
+WEBSOCKET_SESSIONLESS_AUTH = bool(int(os.environ.get("WEBSOCKET_SESSIONLESS_AUTH", 0)))
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -124,13 +281,38 @@ ASGI_APPLICATION = 'app.asgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
+# Threads available to run sync code, including database_sync_to_async
+# calls from the consumers. Daphne sizes its executor from the same variable.
+ASGI_THREADS = int(os.environ.get("ASGI_THREADS", min(32, (os.cpu_count() or 1) + 4)))
+
+# Dedicated threads for the consumers' database_sync_to_async calls
+# (core.executor). Calls are rejected once the queue limit is reached.
+DATABASE_EXECUTOR_THREADS = int(os.environ.get("DATABASE_EXECUTOR_THREADS", ASGI_THREADS))
+DATABASE_EXECUTOR_MAX_QUEUE = int(os.environ.get("DATABASE_EXECUTOR_MAX_QUEUE", 256))
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'NAME': os.environ.get("DB_NAME"),
         'HOST': os.environ.get("DB_HOST"),
         'PASSWORD': os.environ.get("DB_PASS"),
-        'USER': os.environ.get("DB_USER")
+        'USER': os.environ.get("DB_USER"),
+        # Checks pooled connections on checkout
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # One connection per sync thread and DB executor thread,
+            # plus the thread asgiref keeps for thread sensitive calls.
+            # 'manage.py serve' lowers max_size to each worker's share of
+            # DB_MAX_CONNECTIONS, through DB_POOL_MAX_SIZE, and the thread
+            # counts above with it.
+            'pool': {
+                'min_size': int(os.environ.get("DB_POOL_MIN_SIZE", 2)),
+                'max_size': int(os.environ.get(
+                    "DB_POOL_MAX_SIZE", ASGI_THREADS + DATABASE_EXECUTOR_THREADS + 1
+                )),
+                'timeout': int(os.environ.get("DB_POOL_TIMEOUT", 10))
+            }
+        }
     }
 }
 
@@ -0,0 +1,32 @@
+"""
+Settings profile for websocket-only workers, served by app.asgi_ws.
+
+Only the apps the lobby and arena consumers and their auth need are
+installed, leaving out the admin, the HTTP API, the schema views and
+CORS, so workers start faster and hold less memory. Run with
+DJANGO_SETTINGS_MODULE=app.settings_ws.
+"""
+
+from app.settings import *  # noqa: F401,F403
+
+
+INSTALLED_APPS = [
+    'channels',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+
+   # custom apps
+    'core',
+    'lobby',
+    'arena'
+]
+
+# Plain HTTP only serves /metrics
+MIDDLEWARE = []
+
+ROOT_URLCONF = 'app.urls_ws'
+
+TEMPLATES = []
+
+ASGI_APPLICATION = 'app.asgi_ws.application'
@@ -20,10 +20,15 @@ from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView
 )
+from core.views import metrics_view, memory_view, ready_view
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/schema', SpectacularAPIView.as_view(), name="schema"),
     path('api/docs/', SpectacularSwaggerView.as_view(), name="docs"),
-    path('api/auth/', include("authenticate.urls"))
+    path('api/auth/', include("authenticate.urls")),
+    path('api/games/', include("arena.urls")),
+    path('metrics', metrics_view, name="metrics"),
+    path('ready', ready_view, name="ready"),
+    path('debug/memory', memory_view, name="memory")
 ]
@@ -0,0 +1,11 @@
+"""
+URL configuration for websocket-only workers (app.settings_ws).
+"""
+from django.urls import path
+
+from core.views import metrics_view, ready_view
+
+urlpatterns = [
+    path('metrics', metrics_view, name="metrics"),
+    path('ready', ready_view, name="ready")
+]
@@ -1,44 +1,44 @@
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from channels.db import database_sync_to_async
+from core.executor import cleanup_database_sync_to_async, database_sync_to_async
 
-from core.models import Player
 from arena.models import ArenaRoom
-from core.exceptions import RoomFullException, RoomNotFoundException
+from core.consumers import (
+    AdmissionControlMixin,
+    InstrumentedConsumerMixin,
+    OutboundQueueMixin,
+    NEVER_DROP
+)
+from core.log import get_logger
+from core.exceptions import (
+    RoomFullException,
+    RoomNotFoundException,
+    ExecutorQueueFullException
+)
+
+
+log = get_logger(__name__)
+
+
+class ArenaConsumer(
+    InstrumentedConsumerMixin, OutboundQueueMixin, AdmissionControlMixin, AsyncJsonWebsocketConsumer
+):
+    # Moves must all reach the client
+    outbound_policies = {
+        "echo.message": NEVER_DROP
+    }
 
-class ArenaConsumer(AsyncJsonWebsocketConsumer): 
     @database_sync_to_async
     def _add_room(self, room_name, channel_name):
-        try:
-            ArenaRoom.objects.add_room(
-                    room_name=room_name,
-                    channel_name=channel_name,
-                    user=self.user
-                )
-        except RoomFullException as err:
-            raise err
-        
-    @database_sync_to_async
-    def _get_room_by_auth_user(self, user):
-        try:
-            room = ArenaRoom.objects.get(player__auth_user=user)
-            return room
-        except ArenaRoom.DoesNotExist:
-            raise RoomNotFoundException(
-                msg=f"Room for user '{user}' not found"
+        ArenaRoom.objects.add_room(
+                room_name=room_name,
+                channel_name=channel_name,
+                user=self.user
             )
 
-    @database_sync_to_async
+    # Run even while the DB executor is full, or the seat would stay taken
+    @cleanup_database_sync_to_async
     def _delete_player(self, user):
-        try:
-            player = Player.objects.get(auth_user=user.id)
-            room = ArenaRoom.objects.get(player=player.id)
-        except (Player.DoesNotExist, ArenaRoom.DoesNotExist):
-            return
-
-        # If the deleted player is the final player in the room
-        if len(room.player_set.all()) <= 1:
-            room.delete()
-        player.delete()
+        ArenaRoom.objects.release_seat(user)
 
 
     async def connect(self) -> None:
@@ -56,13 +56,16 @@ class ArenaConsumer(AsyncJsonWebsocketConsumer):
         else:
             try:
                 await self._add_room(self.room_group_name, self.channel_name)
-                print("SUCCESS")
+                log.debug("arena.connect", room=self.room_group_name, user=self.user.id)
             except RoomFullException:
-                print("ROOM FULL! ERROR RAISED.")
+                log.info("arena.room_full", room=self.room_group_name, user=self.user.id)
                 await self.close(
                     code=403,
                     reason="Room full"
                 )
+            except ExecutorQueueFullException:
+                await self.refuse("db_executor_full")
+                return
 
             await self.channel_layer.group_add(
                 self.room_group_name, self.channel_name
@@ -83,7 +86,7 @@ class ArenaConsumer(AsyncJsonWebsocketConsumer):
         except KeyError:
             return code
         except RoomNotFoundException as err:
-            print(err)
+            log.warning("arena.room_not_found", error=err.msg)
             return code
 
     async def echo_message(self, message): 
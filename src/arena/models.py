@@ -1,10 +1,36 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
 from core.exceptions import RoomFullException
 from core.models import RoomManager, Room
 
 import os
 
 
+# Deletes the player's seat and, in the same statement, the room it
+# sat in if no other player is left. The main statement still sees the
+# player rows removed by the CTE, so they are excluded explicitly.
+RELEASE_SEATS_SQL = """
+    WITH released AS (
+        DELETE FROM player WHERE {condition} RETURNING id, room_id
+    ), emptied AS (
+        DELETE FROM room
+        WHERE room.id IN (SELECT room_id FROM released)
+        AND NOT EXISTS (
+            SELECT 1 FROM player
+            WHERE player.room_id = room.id
+            AND player.id NOT IN (SELECT id FROM released)
+        )
+        RETURNING room.id
+    )
+    SELECT
+        (SELECT count(*) FROM released),
+        (SELECT count(*) FROM emptied)
+"""
+
+
 class ArenaRoomManager(RoomManager):
 
     def add_room(self, room_name, channel_name, user):
@@ -22,6 +48,39 @@ class ArenaRoomManager(RoomManager):
         
         return room
 
+    def _release(self, condition, params):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                RELEASE_SEATS_SQL.format(condition=condition), params
+            )
+            players_released, rooms_deleted = cursor.fetchone()
+
+        return players_released, rooms_deleted
+
+    def release_seat(self, user):
+        """
+        Delete the user's Player object, along with its room
+        if the user was the final player in it, in a single round trip.
+
+        Returns a tuple of (players released, rooms deleted).
+        """
+
+        return self._release("auth_user_id = %s", [user.id])
+
+    def release_seats(self, channel_prefix):
+        """
+        Bulk variant of release_seat, for when a worker goes away.
+
+        Releases every seat whose channel name starts with the given
+        prefix (e.g. the 'specific.<worker>!' prefix shared by all channels
+        of one worker), deleting any rooms left empty, in one transaction.
+        """
+
+        with transaction.atomic():
+            return self._release(
+                "starts_with(channel_name, %s)", [channel_prefix]
+            )
+
 
 class ArenaRoom(Room):
     """
@@ -55,3 +114,132 @@ class ArenaRoom(Room):
             )
         
         return len(users_in_room) >= int(os.environ.get("ROOM_SIZE_THRESHOLD"))
+
+
+class GameManager(models.Manager):
+
+    def record(self, room_name, started_at, players, winner=None, finished_at=None):
+        """
+        Save a finished game, with a GamePlayer row per player holding
+        their result. A game without a winner is a draw.
+        """
+
+        finished_at = finished_at or timezone.now()
+
+        def result(player):
+            if winner is None:
+                return GamePlayer.Result.DRAW
+            return GamePlayer.Result.WIN if player == winner else GamePlayer.Result.LOSS
+
+        with transaction.atomic():
+            game = self.create(
+                room_name=room_name,
+                started_at=started_at,
+                finished_at=finished_at,
+                winner=winner
+            )
+            GamePlayer.objects.bulk_create(
+                GamePlayer(game=game, user=player, result=result(player), finished_at=finished_at)
+                for player in players
+            )
+
+        return game
+
+
+class Game(models.Model):
+    """
+    Represents a finished game.
+    """
+
+    class Meta:
+        db_table = "game"
+
+    objects = GameManager()
+
+    room_name = models.CharField(max_length=255)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+    winner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        on_delete=models.SET_NULL,
+        related_name="games_won"
+    )
+
+
+class GamePlayerManager(models.Manager):
+
+    def history(self, user, before=None, limit=20):
+        """
+        The user's games finished before the (finished_at, game id)
+        position, newest first, as (game id, finished_at, result) tuples.
+
+        Filtered, ordered and selected on the columns of
+        game_player_history_idx only, so a page is an index-only range scan.
+        """
+
+        qs = self.filter(user=user)
+        if before is not None:
+            finished_at, game_id = before
+            # The first condition bounds the index range, the second breaks ties
+            qs = qs.filter(finished_at__lte=finished_at).filter(
+                Q(finished_at__lt=finished_at) | Q(game_id__lt=game_id)
+            )
+
+        return list(
+            qs.order_by("-finished_at", "-game_id")
+            .values_list("game_id", "finished_at", "result")[:limit]
+        )
+
+    def history_version(self, user):
+        """
+        (games, highest game id) of the user's history, which changes
+        whenever one of their games is recorded or deleted, whatever
+        its finished_at. Counted from game_player_history_idx alone.
+        """
+
+        aggregate = self.filter(user=user).aggregate(games=Count("*"), last_game=Max("game_id"))
+        return aggregate["games"], aggregate["last_game"]
+
+
+class GamePlayer(models.Model):
+    """
+    A player's part in a finished game.
+
+    finished_at is copied from the game so a user's history
+    can be read from this table's index alone.
+    """
+
+    class Result(models.TextChoices):
+        WIN = "win"
+        LOSS = "loss"
+        DRAW = "draw"
+
+    class Meta:
+        db_table = "game_player"
+        constraints = [
+            models.UniqueConstraint(fields=["game", "user"], name="game_player_unique")
+        ]
+        indexes = [
+            # Covers GamePlayerManager.history: keyset pages of a user's games
+            models.Index(
+                fields=["user", "-finished_at", "-game"],
+                include=["result"],
+                name="game_player_history_idx"
+            )
+        ]
+
+    objects = GamePlayerManager()
+
+    # Both already lead an index, through the constraint and the history index
+    game = models.ForeignKey(
+        Game, on_delete=models.CASCADE, related_name="players", db_index=False
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="game_history",
+        db_index=False
+    )
+    result = models.CharField(max_length=4, choices=Result.choices)
+    finished_at = models.DateTimeField()
@@ -1,5 +1,7 @@
 import pytest
 
+from unittest.mock import patch
+
 from channels.testing import WebsocketCommunicator
 from channels.layers import get_channel_layer
 from channels.db import database_sync_to_async
@@ -7,6 +9,10 @@ from django.contrib.auth import get_user_model
 
 from app.asgi import application
 
+from arena.consumers import ArenaConsumer
+from core.consumers import OVERLOADED_CLOSE_CODE
+from core.exceptions import ExecutorQueueFullException
+from core.executor import get_executor
 from core.models import Room, Player
 from common.tests.utils import acreate_user_with_token
 from common.tests.constants import TEST_CHANNEL_LAYERS
@@ -362,3 +368,83 @@ class TestArenaWebsocket:
 
         await communicator.disconnect()
         await self._assert_room_deleted()
+
+    async def test_handshake_refused_while_executor_full(
+            self, settings, origin_headers
+    ):
+        """
+        Test that a connection whose token can't be looked up, because
+        the DB executor is full, is closed with the overloaded close code.
+        """
+
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        _, token = await acreate_user_with_token()
+
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f"ws/arena/test?token={token}",
+            headers=[origin_headers]
+        )
+
+        with patch.object(get_executor(), "max_queue", 0):
+            connected, _ = await communicator.connect()
+            closed = await communicator.receive_output()
+
+        assert connected is True
+        assert closed["code"] == OVERLOADED_CLOSE_CODE
+        await communicator.disconnect()
+        await self._assert_no_players_exist()
+
+    async def test_connect_refused_while_executor_full(
+            self, settings, origin_headers
+    ):
+        """
+        Test that a connection whose seat can't be taken, because the DB
+        executor is full, is accepted and then closed with the overloaded
+        close code, rather than refused as a 403.
+        """
+
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        _, token = await acreate_user_with_token()
+
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f"ws/arena/test?token={token}",
+            headers=[origin_headers]
+        )
+
+        with patch.object(ArenaConsumer, "_add_room", side_effect=ExecutorQueueFullException("full")):
+            connected, _ = await communicator.connect()
+            closed = await communicator.receive_output()
+
+        assert connected is True
+        assert closed["code"] == OVERLOADED_CLOSE_CODE
+        await communicator.disconnect()
+        await self._assert_no_players_exist()
+
+    async def test_player_removed_while_executor_full(
+            self, settings, origin_headers
+    ):
+        """
+        Test that a player's seat is released on disconnect
+        even while the DB executor is rejecting calls.
+        """
+
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        _, token = await acreate_user_with_token()
+
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f"ws/arena/test?token={token}",
+            headers=[origin_headers]
+        )
+
+        await communicator.connect()
+        await self._assert_one_player_created()
+
+        with patch.object(get_executor(), "max_queue", 0):
+            await communicator.disconnect()
+        await self._assert_no_players_exist()
@@ -124,4 +124,81 @@ class RoomModelIntegrationTests(TestCase):
         self.assertEqual(players[0].auth_user, auth_user)
         self.assertEqual(players[0].channel_name, player_channel_name_1)
         self.assertEqual(players[0].room, rooms[0])
-        
\ No newline at end of file
+        
+
+class ReleaseSeatTests(TestCase):
+    """
+    - Releasing a seat deletes the player, keeping a non-empty room
+    - Releasing the final seat deletes the room
+    - Bulk release of every seat owned by a worker
+    """
+
+    def test_release_seat_keeps_room_with_remaining_player(self):
+        room = ArenaRoom.objects.create(room_name="test_room")
+
+        first_user = create_user()
+        second_user = create_user(email="another@example.com")
+        room.add_player(user=first_user, channel_name="player_channel_1")
+        room.add_player(user=second_user, channel_name="player_channel_2")
+
+        released = ArenaRoom.objects.release_seat(first_user)
+
+        self.assertEqual(released, (1, 0))
+        self.assertTrue(ArenaRoom.objects.filter(id=room.id).exists())
+        self.assertEqual(
+            list(Player.objects.values_list("auth_user", flat=True)),
+            [second_user.id]
+        )
+
+    def test_release_final_seat_deletes_room(self):
+        room = ArenaRoom.objects.create(room_name="test_room")
+
+        user = create_user()
+        room.add_player(user=user, channel_name="player_channel_1")
+
+        released = ArenaRoom.objects.release_seat(user)
+
+        self.assertEqual(released, (1, 1))
+        self.assertFalse(ArenaRoom.objects.exists())
+        self.assertFalse(Player.objects.exists())
+
+    def test_release_seat_without_player_is_noop(self):
+        user = create_user()
+
+        self.assertEqual(ArenaRoom.objects.release_seat(user), (0, 0))
+
+    def test_release_seats_by_worker_channel_prefix(self):
+        """
+        Test that all seats whose channel belongs to the dying worker
+        are released, and only the rooms left empty are deleted.
+        """
+
+        emptied_room = ArenaRoom.objects.create(room_name="emptied_room")
+        shared_room = ArenaRoom.objects.create(room_name="shared_room")
+
+        emptied_room.add_player(
+            user=create_user(email="first@example.com"),
+            channel_name="specific.dying!aaa"
+        )
+        emptied_room.add_player(
+            user=create_user(email="second@example.com"),
+            channel_name="specific.dying!bbb"
+        )
+        shared_room.add_player(
+            user=create_user(email="third@example.com"),
+            channel_name="specific.dying!ccc"
+        )
+        shared_room.add_player(
+            user=create_user(email="fourth@example.com"),
+            channel_name="specific.alive!ddd"
+        )
+
+        released = ArenaRoom.objects.release_seats("specific.dying!")
+
+        self.assertEqual(released, (3, 1))
+        self.assertFalse(ArenaRoom.objects.filter(id=emptied_room.id).exists())
+        self.assertTrue(ArenaRoom.objects.filter(id=shared_room.id).exists())
+        self.assertEqual(
+            list(Player.objects.values_list("channel_name", flat=True)),
+            ["specific.alive!ddd"]
+        )
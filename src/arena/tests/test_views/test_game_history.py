@@ -0,0 +1,128 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APITestCase
+
+from arena.models import Game, GamePlayer
+from common.tests.utils import create_user_with_token
+
+from datetime import timedelta
+
+GAME_HISTORY_URL = reverse("arena:game-history")
+
+
+@override_settings(GAME_HISTORY_PAGE_SIZE=2)
+class GameHistoryViewTests(APITestCase):
+    """
+    - Games listed newest first, one page at a time, following the next links
+    - Games finished at the same time ordered by id, none skipped or repeated
+    - Only the user's own games, with their result
+    - 304 for a matching If-None-Match, until the user finishes another game
+    - ETag changed by backdated and deleted games too
+    - Malformed cursors rejected, anonymous requests refused
+    - Pages and the ETag's version read with index-only scans
+    """
+
+    def setUp(self):
+        self.user, token = create_user_with_token()
+        self.opponent, _ = create_user_with_token(email="opponent@example.com")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+        self.now = timezone.now()
+        self.games = [
+            self._record(minutes_ago=30, winner=self.user),
+            self._record(minutes_ago=20, winner=self.opponent),
+            self._record(minutes_ago=20, winner=None),
+            self._record(minutes_ago=10, winner=self.user)
+        ]
+
+    def _record(self, minutes_ago, winner, players=None):
+        finished_at = self.now - timedelta(minutes=minutes_ago)
+        return Game.objects.record(
+            room_name="arena_room",
+            started_at=finished_at - timedelta(minutes=5),
+            finished_at=finished_at,
+            players=players or [self.user, self.opponent],
+            winner=winner
+        )
+
+    def test_pages_newest_first(self):
+        first = self.client.get(GAME_HISTORY_URL)
+        second = self.client.get(first.json()["next"])
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [game["id"] for game in first.json()["results"] + second.json()["results"]],
+            [self.games[3].id, self.games[2].id, self.games[1].id, self.games[0].id]
+        )
+        self.assertIsNone(second.json()["next"])
+
+    def test_only_own_games_with_result(self):
+        other, _ = create_user_with_token(email="other@example.com")
+        self._record(minutes_ago=5, winner=other, players=[other, self.opponent])
+
+        with override_settings(GAME_HISTORY_PAGE_SIZE=10):
+            results = self.client.get(GAME_HISTORY_URL).json()["results"]
+
+        self.assertEqual(
+            [game["result"] for game in results], ["win", "draw", "loss", "win"]
+        )
+
+    def test_not_modified_until_next_game(self):
+        etag = self.client.get(GAME_HISTORY_URL)["ETag"]
+
+        res = self.client.get(GAME_HISTORY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        self._record(minutes_ago=1, winner=None)
+        res = self.client.get(GAME_HISTORY_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_etag_changed_by_backdated_and_deleted_games(self):
+        etag = self.client.get(GAME_HISTORY_URL)["ETag"]
+
+        # Older than the user's latest game
+        backdated = self._record(minutes_ago=60, winner=None)
+        backdated_etag = self.client.get(GAME_HISTORY_URL)["ETag"]
+        self.assertNotEqual(backdated_etag, etag)
+
+        self.games[1].delete()
+        self.assertNotEqual(self.client.get(GAME_HISTORY_URL)["ETag"], backdated_etag)
+
+        # Back to the original latest game, one game fewer
+        backdated.delete()
+        self.assertNotIn(self.client.get(GAME_HISTORY_URL)["ETag"], (etag, backdated_etag))
+
+    def test_invalid_cursor(self):
+        res = self.client.get(GAME_HISTORY_URL, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_anonymous_refused(self):
+        self.client.credentials()
+
+        res = self.client.get(GAME_HISTORY_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def _plan(self, sql):
+        with connection.cursor() as cursor:
+            # The tables are too small for the planner to pick an index otherwise
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            cursor.execute("SET LOCAL enable_bitmapscan = off")
+            cursor.execute(f"EXPLAIN {sql}")
+            return "\n".join(row[0] for row in cursor.fetchall())
+
+    def test_index_only_scan(self):
+        before = (self.games[3].finished_at, self.games[3].id)
+        with CaptureQueriesContext(connection) as queries:
+            GamePlayer.objects.history(self.user, before=before, limit=2)
+            GamePlayer.objects.history_version(self.user)
+
+        for query in queries:
+            self.assertIn("Index Only Scan using game_player_history_idx", self._plan(query["sql"]))
@@ -0,0 +1,10 @@
+"""URL Mapping for Arena API"""
+
+from django.urls import path
+from arena.views import GameHistoryView
+
+app_name = "arena"
+
+urlpatterns = [
+    path("", GameHistoryView.as_view(), name="game-history")
+]
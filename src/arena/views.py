@@ -1,3 +1,101 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag, urlsafe_base64_decode, urlsafe_base64_encode
+from drf_spectacular.utils import OpenApiParameter, extend_schema, inline_serializer
+from rest_framework import serializers
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from rest_framework.views import APIView
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
-# Create your views here.
+from arena.models import GamePlayer
+
+from datetime import datetime
+
+import hashlib
+
+
+def encode_cursor(finished_at, game_id):
+    return urlsafe_base64_encode(f"{finished_at.isoformat()}|{game_id}".encode())
+
+
+def decode_cursor(cursor):
+    """
+    The (finished_at, game id) position in a cursor.
+    Raises ValueError for a malformed one.
+    """
+
+    finished_at, game_id = urlsafe_base64_decode(cursor).decode().split("|")
+    return datetime.fromisoformat(finished_at), int(game_id)
+
+
+class GameHistoryView(APIView):
+    """
+    The authenticated user's finished games, newest first.
+
+    Pages are keyset paginated on (finished_at, game id): the next link's
+    cursor is the position of the page's last game, so every page is read
+    from the same index range scan, however far back it is.
+
+    The ETag is derived from the number of games in the user's history, the
+    highest game id in it and the requested page, so it changes when any game
+    is recorded or deleted, backdated ones included. It's checked before the
+    page is read: a client polling with If-None-Match gets a 304 for one
+    index-only count.
+    """
+
+    authentication_classes = [JWTAuthentication, SessionAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("cursor", str, description="Taken from the previous page's next link")
+        ],
+        responses=inline_serializer("GameHistoryPage", {
+            "next": serializers.URLField(allow_null=True),
+            "results": inline_serializer("GameHistoryEntry", {
+                "id": serializers.IntegerField(),
+                "finished_at": serializers.DateTimeField(),
+                "result": serializers.ChoiceField(choices=GamePlayer.Result.choices)
+            }, many=True)
+        })
+    )
+    def get(self, request):
+        cursor = request.query_params.get("cursor")
+        try:
+            before = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            raise ValidationError({"cursor": "Invalid cursor."})
+
+        page_size = getattr(settings, "GAME_HISTORY_PAGE_SIZE", 20)
+        version = GamePlayer.objects.history_version(request.user)
+        etag = quote_etag(hashlib.md5(
+            f"{request.user.pk}|{version}|{cursor}|{page_size}".encode()
+        ).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            games = GamePlayer.objects.history(request.user, before=before, limit=page_size + 1)
+            next_url = None
+            if len(games) > page_size:
+                games = games[:page_size]
+                game_id, finished_at, _ = games[-1]
+                next_url = replace_query_param(
+                    request.build_absolute_uri(), "cursor", encode_cursor(finished_at, game_id)
+                )
+
+            response = Response({
+                "next": next_url,
+                "results": [
+                    {"id": game_id, "finished_at": finished_at, "result": result}
+                    for game_id, finished_at, result in games
+                ]
+            })
+
+        response["ETag"] = etag
+        patch_vary_headers(response, ["Authorization", "Cookie"])
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
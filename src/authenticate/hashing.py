@@ -0,0 +1,113 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from core.exceptions import HashingPoolFullException
+
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+import asyncio
+import django
+import multiprocessing
+import os
+
+
+_executor = None
+_executor_lock = Lock()
+_pending = 0
+
+
+def _init_worker():
+    """
+    Make Django settings (and so PASSWORD_HASHERS) available
+    in worker processes that were spawned rather than forked.
+    """
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=getattr(settings, "PASSWORD_HASHING_WORKERS", None),
+                # Forking a process that already runs threads (the DB executor,
+                # the metrics flusher) can copy a lock some thread holds
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker
+            )
+        return _executor
+
+
+def shutdown_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+async def _run_in_pool(func, *args):
+    """
+    Run a hashing function in the worker pool.
+
+    Raise HashingPoolFullException instead of queueing once
+    PASSWORD_HASHING_MAX_PENDING calls are already in flight,
+    so callers can shed load rather than pile up behind the pool.
+    """
+
+    global _pending
+
+    max_pending = getattr(settings, "PASSWORD_HASHING_MAX_PENDING", 64)
+
+    with _executor_lock:
+        if _pending >= max_pending:
+            raise HashingPoolFullException(
+                f"Password hashing pool is saturated ({_pending} calls pending)."
+            )
+        _pending += 1
+
+    try:
+        return await asyncio.wrap_future(get_executor().submit(func, *args))
+    finally:
+        with _executor_lock:
+            _pending -= 1
+
+
+async def make_password(password):
+    return await _run_in_pool(hashers.make_password, password)
+
+
+def _must_update(encoded):
+    """
+    Whether a valid hash should be redone with the preferred hasher,
+    as hashers.check_password decides before calling its setter.
+    """
+
+    preferred = hashers.get_hasher("default")
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+async def check_password(password, encoded, setter=None):
+    """
+    hashers.check_password in the pool. The setter can't cross into the
+    pool's processes, so it's an async callable here, awaited with the
+    password's new hash when a valid one was made by an outdated hasher.
+    """
+
+    is_correct = await _run_in_pool(hashers.check_password, password, encoded)
+    if is_correct and setter is not None and _must_update(encoded):
+        await setter(await make_password(password))
+    return is_correct
+
+
+def pending():
+    return _pending
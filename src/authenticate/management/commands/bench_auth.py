@@ -0,0 +1,98 @@
+from django.core.management import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import AsyncClient, override_settings
+from django.urls import reverse
+
+from authenticate import hashing
+
+import asyncio
+import time
+
+
+BENCH_EMAIL_DOMAIN = "auth-bench.example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark signup and token issuance through the sync (DRF) "
+        "and async (process pool) views, reporting throughput, p99 latency "
+        "and the worst event loop stall seen meanwhile."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=32)
+        parser.add_argument("--concurrency", type=int, default=8)
+
+    async def _watch_loop(self, stalls, interval=0.01):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            stalls.append(time.perf_counter() - start - interval)
+
+    async def _run(self, url, payloads, concurrency):
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+        timings, stalls = [], []
+
+        async def request(payload):
+            async with semaphore:
+                start = time.perf_counter()
+                res = await client.post(url, payload, content_type="application/json")
+                timings.append(time.perf_counter() - start)
+                return res.status_code
+
+        watcher = asyncio.create_task(self._watch_loop(stalls))
+        start = time.perf_counter()
+        statuses = await asyncio.gather(*(request(payload) for payload in payloads))
+        elapsed = time.perf_counter() - start
+        watcher.cancel()
+
+        return elapsed, sorted(timings), max(stalls, default=0.0), statuses
+
+    def _report(self, label, elapsed, timings, max_stall, statuses):
+        p99 = timings[max(int(len(timings) * 0.99) - 1, 0)]
+        failed = sum(1 for code in statuses if code >= 400)
+
+        self.stdout.write(
+            f"{label:<18} {len(timings) / elapsed:>8.1f} req/s  "
+            f"p99 {p99 * 1000:>8.1f}ms  max loop stall {max_stall * 1000:>8.1f}ms  "
+            f"errors {failed}"
+        )
+
+    async def _bench(self, requests, concurrency):
+        for path in ("sign-up", "async-sign-up"):
+            payloads = [
+                {
+                    "email": f"{path}-{i}@{BENCH_EMAIL_DOMAIN}",
+                    "password1": "Benchpass123!",
+                    "password2": "Benchpass123!"
+                }
+                for i in range(requests)
+            ]
+            self._report(
+                path,
+                *await self._run(reverse(f"authenticate:{path}"), payloads, concurrency)
+            )
+
+        for path in ("claim-token", "async-claim-token"):
+            payloads = [
+                {
+                    "email": f"sign-up-{i}@{BENCH_EMAIL_DOMAIN}",
+                    "password": "Benchpass123!"
+                }
+                for i in range(requests)
+            ]
+            self._report(
+                path,
+                *await self._run(reverse(f"authenticate:{path}"), payloads, concurrency)
+            )
+
+    def handle(self, *args, **options):
+        try:
+            with override_settings(ALLOWED_HOSTS=["testserver"]):
+                asyncio.run(self._bench(options["requests"], options["concurrency"]))
+        finally:
+            get_user_model().objects.filter(
+                email__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+            ).delete()
+            hashing.shutdown_executor()
@@ -1,9 +1,15 @@
 from rest_framework import serializers
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import get_user_model
 
 import re
 
 
+PASSWORD_REGEX = re.compile(
+    r"^(?=.*[A-Za-z])(?=.*\d)(?=.*[@$!%*#?&])[A-Za-z\d@$!%*#?&]{8,}$"
+)
+
+
 class AuthUserSerializer(serializers.ModelSerializer):
     """
     Serializer for the Auth User Model.
@@ -32,8 +38,7 @@ class AuthUserSerializer(serializers.ModelSerializer):
 
         errors = {}
 
-        regex = r"^(?=.*[A-Za-z])(?=.*\d)(?=.*[@$!%*#?&])[A-Za-z\d@$!%*#?&]{8,}$"
-        if not re.match(regex, data["password1"]) or not re.match(regex, data["password2"]):
+        if not PASSWORD_REGEX.match(data["password1"]) or not PASSWORD_REGEX.match(data["password2"]):
             errors["weak_password"] = (
                 "Passwords must contain at least 8 characters, " 
                 "one uppercase letter, one number and one special character.")
@@ -53,12 +58,40 @@ class AuthUserSerializer(serializers.ModelSerializer):
 
         Data dict only contains email, and is then supplemented
         with the validated password.
+
+        If the password has already been hashed (passed to save()
+        as 'password_hash'), it's stored as is.
         """
         data = {
             key: value for key, value in validated_data.items()
-            if key not in ("password1", "password2")
+            if key not in ("password1", "password2", "password_hash")
         }
 
+        if "password_hash" in validated_data:
+            return self.Meta.model.objects.create_user_with_password_hash(
+                password_hash=validated_data["password_hash"], **data
+            )
+
         data["password"] = validated_data["password1"]
 
         return self.Meta.model.objects.create_user(**data)
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Token pair serializer which embeds the user's email, name and
+    staff/superuser flags as custom claims, so websocket handshakes can
+    build the user from the token alone (see lobby.middleware.JWTMiddlewareStack).
+
+    Claims are copied from the refresh token to each new access token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["email"] = user.email
+        token["name"] = user.name
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+
+        return token
@@ -0,0 +1,149 @@
+from rest_framework.test import APITestCase
+from rest_framework.reverse import reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.contrib.auth.signals import user_login_failed
+from django.test import override_settings
+
+from multiprocessing.context import SpawnContext
+
+from authenticate import hashing
+
+ASYNC_CREATE_USER_URL = reverse("authenticate:async-sign-up")
+ASYNC_CLAIM_TOKEN_URL = reverse("authenticate:async-claim-token")
+
+
+@override_settings(PASSWORD_HASHING_WORKERS=1)
+class AsyncAuthenticationTests(APITestCase):
+    """
+    Tests for the async signup and token views, which
+    hash passwords in the hashing process pool.
+    Malformed JSON, or JSON that isn't an object, is rejected with 400.
+    Logins behave as through ModelBackend: failures are signalled and
+    outdated hashes upgraded.
+    """
+
+    @classmethod
+    def tearDownClass(cls):
+        hashing.shutdown_executor()
+        super().tearDownClass()
+
+    def test_async_signup_successful(self):
+        payload = {
+            "email": "test@example.com",
+            "password1": "Testpass123!",
+            "password2": "Testpass123!"
+        }
+
+        res = self.client.post(ASYNC_CREATE_USER_URL, data=payload, format="json")
+
+        user = get_user_model().objects.get(email=payload["email"])
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.json(), {"id": user.id, "email": user.email})
+        self.assertTrue(user.check_password(payload["password1"]))
+
+    def test_async_signup_weak_password_returns_400(self):
+        payload = {
+            "email": "test@example.com",
+            "password1": "password",
+            "password2": "password"
+        }
+
+        res = self.client.post(ASYNC_CREATE_USER_URL, data=payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("weak_password", res.json())
+        self.assertFalse(get_user_model().objects.exists())
+
+    @override_settings(PASSWORD_HASHING_MAX_PENDING=0)
+    def test_async_signup_saturated_pool_returns_503(self):
+        payload = {
+            "email": "test@example.com",
+            "password1": "Testpass123!",
+            "password2": "Testpass123!"
+        }
+
+        res = self.client.post(ASYNC_CREATE_USER_URL, data=payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(res["Retry-After"], "1")
+        self.assertFalse(get_user_model().objects.exists())
+
+    def test_async_token_successful(self):
+        user = get_user_model().objects.create_user(
+            email="test@example.com", password="Testpass123!"
+        )
+
+        payload = {"email": "test@example.com", "password": "Testpass123!"}
+        res = self.client.post(ASYNC_CLAIM_TOKEN_URL, data=payload, format="json")
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        access_token = AccessToken(res.json()["access"])
+        self.assertEqual(access_token["user_id"], user.id)
+        self.assertEqual(access_token["email"], user.email)
+
+    def test_async_token_invalid_credentials_returns_401(self):
+        get_user_model().objects.create_user(
+            email="test@example.com", password="Testpass123!"
+        )
+
+        payloads = [
+            {"email": "test@example.com", "password": "Wrongpass123!"},
+            {"email": "unknown@example.com", "password": "Testpass123!"}
+        ]
+
+        for payload in payloads:
+            res = self.client.post(ASYNC_CLAIM_TOKEN_URL, data=payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_token_failure_signalled(self):
+        failures = []
+
+        def receiver(sender, credentials, **kwargs):
+            failures.append(credentials)
+
+        user_login_failed.connect(receiver)
+        self.addCleanup(user_login_failed.disconnect, receiver)
+        get_user_model().objects.create_user(
+            email="test@example.com", password="Testpass123!"
+        )
+
+        payloads = [
+            {"email": "test@example.com", "password": "Wrongpass123!"},
+            {"email": "unknown@example.com", "password": "Testpass123!"}
+        ]
+        for payload in payloads:
+            res = self.client.post(ASYNC_CLAIM_TOKEN_URL, data=payload, format="json")
+            self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.assertEqual([credentials["email"] for credentials in failures], [
+            "test@example.com", "unknown@example.com"
+        ])
+
+    def test_async_token_upgrades_outdated_hash(self):
+        user = get_user_model().objects.create_user(email="test@example.com")
+        user.password = make_password("Testpass123!", hasher="pbkdf2_sha1")
+        user.save()
+
+        payload = {"email": "test@example.com", "password": "Testpass123!"}
+        res = self.client.post(ASYNC_CLAIM_TOKEN_URL, data=payload, format="json")
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(identify_hasher(user.password).algorithm, "pbkdf2_sha256")
+        self.assertTrue(user.check_password("Testpass123!"))
+
+    def test_pool_spawns_workers(self):
+        self.assertIsInstance(hashing.get_executor()._mp_context, SpawnContext)
+
+    def test_malformed_body_returns_400(self):
+        bodies = ["{not json", "[]", '"text"', "null", '{"email": ["test@example.com"], "password": "x"}']
+
+        for url in (ASYNC_CREATE_USER_URL, ASYNC_CLAIM_TOKEN_URL):
+            for body in bodies:
+                res = self.client.generic("POST", url, body, content_type="application/json")
+                self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST, (url, body))
+        self.assertFalse(get_user_model().objects.exists())
@@ -2,10 +2,12 @@ from rest_framework.test import APITestCase
 from rest_framework.reverse import reverse
 from rest_framework import status
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.tokens import AccessToken
 
 import json
 
 CREATE_USER_URL = reverse("authenticate:sign-up")
+CLAIM_TOKEN_URL = reverse("authenticate:claim-token")
 
 class AuthenticationTests(APITestCase):
     """
@@ -171,3 +173,26 @@ class AuthenticationTests(APITestCase):
 
         self.assertEqual(password_mismatch_error, password_mismatch_error_msg)
         self.assertEqual(weak_password_error, weak_password_error_msg)
+
+    def test_claimed_access_token_contains_user_claims(self):
+        """
+        Test the access token embeds the user's email and name,
+        used by the sessionless websocket stack.
+        """
+
+        get_user_model().objects.create_user(
+            email="test@example.com", password="Testpass123!", name="Test"
+        )
+
+        payload = {
+            "email": "test@example.com",
+            "password": "Testpass123!"
+        }
+
+        res = self.client.post(CLAIM_TOKEN_URL, data=payload)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        access_token = AccessToken(res.data["access"])
+        self.assertEqual(access_token["email"], "test@example.com")
+        self.assertEqual(access_token["name"], "Test")
@@ -1,7 +1,11 @@
 """URL Mapping for Authentication API"""
 
 from django.urls import path
-from authenticate.views import SignupView
+from authenticate.views import (
+    SignupView,
+    AsyncSignupView,
+    AsyncTokenObtainPairView
+)
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView
@@ -12,5 +16,7 @@ app_name = "authenticate"
 urlpatterns = [
     path("sign-up/", SignupView.as_view(), name="sign-up"),
     path('token/', TokenObtainPairView.as_view(), name="claim-token"),
-    path('token/refresh', TokenRefreshView.as_view(), name="refresh-token")
+    path('token/refresh', TokenRefreshView.as_view(), name="refresh-token"),
+    path("async/sign-up/", AsyncSignupView.as_view(), name="async-sign-up"),
+    path("async/token/", AsyncTokenObtainPairView.as_view(), name="async-claim-token")
 ]
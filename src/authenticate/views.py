@@ -1,6 +1,23 @@
 from rest_framework.generics import CreateAPIView
+from rest_framework_simplejwt.settings import api_settings
 from authenticate.serializers import AuthUserSerializer
-from django.contrib.auth import get_user_model
+from authenticate import hashing
+from core.exceptions import HashingPoolFullException
+from django.conf import settings
+from django.contrib.auth import aauthenticate, get_user_model
+from django.contrib.auth.models import update_last_login
+from django.contrib.auth.signals import user_login_failed
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from django.utils.module_loading import import_string
+from asgiref.sync import sync_to_async
+
+import json
+
+
+MODEL_BACKEND = "django.contrib.auth.backends.ModelBackend"
 
 
 class SignupView(CreateAPIView):
@@ -10,3 +27,141 @@ class SignupView(CreateAPIView):
 
     queryset = get_user_model().objects.all()
     serializer_class = AuthUserSerializer
+
+
+def _get_request_data(request):
+    """
+    The request's JSON object or form data, or None if the body isn't one.
+    """
+
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or "{}")
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST
+
+
+def _malformed_body_response():
+    return JsonResponse({"detail": "Request body must be a JSON object."}, status=400)
+
+
+def _pool_full_response(err):
+    response = JsonResponse({"detail": err.msg}, status=503)
+    response["Retry-After"] = "1"
+    return response
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncSignupView(View):
+    """
+    Async variant of SignupView.
+
+    The password is hashed in the bounded hashing process pool,
+    so a burst of signups doesn't block the worker serving websockets.
+    Returns 503 with Retry-After when the pool is saturated.
+    """
+
+    async def post(self, request):
+        data = _get_request_data(request)
+        if data is None:
+            return _malformed_body_response()
+
+        serializer = AuthUserSerializer(data=data)
+
+        if not await sync_to_async(serializer.is_valid)():
+            return JsonResponse(serializer.errors, status=400)
+
+        try:
+            password_hash = await hashing.make_password(
+                serializer.validated_data["password1"]
+            )
+        except HashingPoolFullException as err:
+            return _pool_full_response(err)
+
+        await sync_to_async(serializer.save)(password_hash=password_hash)
+
+        return JsonResponse(serializer.data, status=201)
+
+
+@method_decorator(csrf_exempt, name="dispatch")
+class AsyncTokenObtainPairView(View):
+    """
+    Async variant of TokenObtainPairView, checking the
+    password in the bounded hashing process pool.
+
+    Does what ModelBackend would: upgrades outdated hashes, and sends
+    user_login_failed. Any other AUTHENTICATION_BACKENDS are tried through
+    aauthenticate, outside the hashing pool. The user is then held to
+    simplejwt's USER_AUTHENTICATION_RULE.
+
+    Returns 503 with Retry-After when the pool is saturated.
+    """
+
+    error_msg = "No active account found with the given credentials"
+
+    async def _authenticate(self, request, email, password):
+        """
+        The user with these credentials, or None.
+        """
+
+        if list(settings.AUTHENTICATION_BACKENDS) != [MODEL_BACKEND]:
+            return await aauthenticate(request, email=email, password=password)
+
+        User = get_user_model()
+        try:
+            user = await User._default_manager.aget_by_natural_key(email)
+        except User.DoesNotExist:
+            # Hash anyway, so response time doesn't
+            # reveal which emails are registered.
+            await hashing.make_password(password)
+            user = None
+
+        async def set_password(password_hash):
+            user.password = password_hash
+            await user.asave(update_fields=["password"])
+
+        if (
+            user is not None
+            and await hashing.check_password(password, user.password, set_password)
+            and user.is_active
+        ):
+            return user
+
+        await user_login_failed.asend(
+            sender=__name__, credentials={"email": email}, request=request
+        )
+        return None
+
+    async def post(self, request):
+        data = _get_request_data(request)
+        if data is None:
+            return _malformed_body_response()
+
+        email = data.get("email")
+        password = data.get("password")
+
+        if not (email and isinstance(email, str) and password and isinstance(password, str)):
+            return JsonResponse(
+                {"detail": "Both email and password are required."}, status=400
+            )
+
+        try:
+            user = await self._authenticate(request, email, password)
+        except HashingPoolFullException as err:
+            return _pool_full_response(err)
+
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            return JsonResponse({"detail": self.error_msg}, status=401)
+
+        serializer_class = import_string(api_settings.TOKEN_OBTAIN_SERIALIZER)
+        refresh = serializer_class.get_token(user)
+
+        if api_settings.UPDATE_LAST_LOGIN:
+            await sync_to_async(update_last_login)(None, user)
+
+        return JsonResponse({
+            "refresh": str(refresh),
+            "access": str(refresh.access_token)
+        })
@@ -0,0 +1,20 @@
+from core import queries
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def query_budgets(settings):
+    """
+    Account every handler's queries, failing the test
+    if any handler goes over its QUERY_BUDGETS entry.
+    """
+
+    settings.QUERY_ACCOUNTING_SAMPLE_RATE = 1.0
+    queries.breaches.clear()
+
+    yield
+
+    breaches = list(queries.breaches)
+    queries.breaches.clear()
+    assert not breaches, f"Query budgets exceeded: {breaches}"
@@ -0,0 +1,160 @@
+from django.conf import settings
+
+from core import metrics
+
+from collections import OrderedDict
+
+import asyncio
+import time
+
+
+loop_lag_seconds = metrics.Gauge(
+    "event_loop_lag_seconds",
+    "Latest event loop scheduling delay"
+)
+
+loop_lag_histogram = metrics.Histogram(
+    "event_loop_lag_sample_seconds",
+    "Event loop scheduling delay samples"
+)
+
+connections_rejected = metrics.Counter(
+    "websocket_connections_rejected_total",
+    "Websocket connections refused by admission control",
+    ("reason",)
+)
+
+
+class LoopLagMonitor:
+    """
+    Measures how late the event loop runs a callback scheduled interval
+    seconds ahead, which is how long any ready callback waits to run.
+
+    A chain of call_later callbacks rather than a task, so there's
+    nothing left pending when the loop is closed.
+    """
+
+    def __init__(self, loop, interval=0.1):
+        self.loop = loop
+        self.interval = interval
+        self.lag = 0.0
+        self._handle = None
+
+    def start(self):
+        if self._handle is None:
+            self._schedule()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def _schedule(self):
+        expected = self.loop.time() + self.interval
+        self._handle = self.loop.call_at(expected, self._tick, expected)
+
+    def _tick(self, expected):
+        self.lag = max(0.0, self.loop.time() - expected)
+        loop_lag_seconds.set(value=self.lag)
+        loop_lag_histogram.observe(value=self.lag)
+        self._schedule()
+
+
+_monitors = {}
+
+
+def get_lag_monitor():
+    """
+    Return the running loop's monitor, starting it on first use.
+    """
+
+    loop = asyncio.get_running_loop()
+    monitor = _monitors.get(loop)
+    if monitor is None:
+        for stale in [other for other in _monitors if other.is_closed()]:
+            del _monitors[stale]
+        monitor = _monitors[loop] = LoopLagMonitor(
+            loop, getattr(settings, "LOOP_LAG_INTERVAL", 0.1)
+        )
+        monitor.start()
+    return monitor
+
+
+class ConnectRateLimiter:
+    """
+    Token bucket per client IP: rate connects a second on average,
+    up to burst at once. Holds at most max_clients buckets,
+    forgetting the least recently seen.
+    """
+
+    def __init__(self, rate, burst, max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+
+    def allow(self, ip):
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(ip, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+
+        self._buckets[ip] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed
+
+
+_rate_limiter = None
+
+
+def get_rate_limiter():
+    global _rate_limiter
+
+    rate = getattr(settings, "ADMISSION_CONNECT_RATE", 0)
+    burst = getattr(settings, "ADMISSION_CONNECT_BURST", 20)
+    if _rate_limiter is None or (_rate_limiter.rate, _rate_limiter.burst) != (rate, burst):
+        _rate_limiter = ConnectRateLimiter(rate, burst)
+    return _rate_limiter
+
+
+def refuse(scope, reason):
+    """
+    Have check() refuse the connection, for middleware that couldn't
+    handle its handshake, e.g. because the DB executor was full.
+    """
+
+    scope["admission_refusal"] = reason
+
+
+def check(scope):
+    """
+    Return the reason to refuse a websocket connection, or None to admit it.
+
+    Refused if middleware called refuse() for it, while the event loop lags
+    more than ADMISSION_LOOP_LAG_THRESHOLD seconds, or once the client's IP
+    exceeds ADMISSION_CONNECT_RATE connects a second (bursts of
+    ADMISSION_CONNECT_BURST). Zero disables either check.
+    """
+
+    refusal = scope.get("admission_refusal")
+    if refusal is not None:
+        connections_rejected.inc(refusal)
+        return refusal
+
+    lag_threshold = getattr(settings, "ADMISSION_LOOP_LAG_THRESHOLD", 0)
+    monitor = get_lag_monitor()
+    if lag_threshold and monitor.lag > lag_threshold:
+        connections_rejected.inc("loop_lag")
+        return "loop_lag"
+
+    client = scope.get("client")
+    if getattr(settings, "ADMISSION_CONNECT_RATE", 0) and client:
+        if not get_rate_limiter().allow(client[0]):
+            connections_rejected.inc("rate_limit")
+            return "rate_limit"
+
+    return None
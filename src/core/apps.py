@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from core import profiler, queries
+        # Registers the connection pool's metrics collector
+        from core import db  # noqa: F401
+
+        connection_created.connect(queries.install)
+        profiler.install_signal_handler()
@@ -0,0 +1,318 @@
+from django.conf import settings
+
+from core import admission, metrics, queries
+
+from channels.exceptions import StopConsumer
+
+from collections import deque
+from weakref import WeakSet
+
+import asyncio
+import time
+
+
+# Outbound queue policies, per message type
+DROP_OLDEST = "drop_oldest"
+NEVER_DROP = "never_drop"
+
+# Close codes servers may send are 1000 and 3000-4999 (daphne rejects the
+# rest), so these are the standard codes' meanings in the 4000 range.
+
+# Policy Violation: the client isn't reading its frames
+SLOW_CONSUMER_CLOSE_CODE = 4008
+
+# Try Again Later: refused by admission control, or the DB executor is full
+OVERLOADED_CLOSE_CODE = 4013
+
+# Service Restart: the worker is draining, reconnect (to another one)
+SERVICE_RESTART_CLOSE_CODE = 4012
+
+# Scope extension with a callable registering a Twisted streaming producer
+# with the connection's transport, added by the serve command's workers
+PRODUCER_EXTENSION = "twisted.producer"
+
+_connections = WeakSet()
+_open_connections = WeakSet()
+_totals = {"dropped": 0, "slow_disconnects": 0}
+
+
+def outbound_queue_stats():
+    depths = [consumer.outbound_depth for consumer in _connections]
+    return {
+        "connections": len(depths),
+        "queued": sum(depths),
+        "max_depth": max(depths, default=0),
+        **_totals
+    }
+
+
+outbound_queued = metrics.Gauge(
+    "websocket_outbound_queued",
+    "Frames waiting in outbound queues"
+)
+outbound_dropped = metrics.Counter(
+    "websocket_outbound_dropped_total",
+    "Frames dropped from full outbound queues"
+)
+slow_consumer_disconnects = metrics.Counter(
+    "websocket_slow_consumer_disconnects_total",
+    "Connections closed for staying over the outbound queue limit"
+)
+
+
+def _collect_outbound_queues():
+    outbound_queued.set(value=outbound_queue_stats()["queued"])
+
+
+metrics.registry.register_collector(_collect_outbound_queues)
+
+
+async def drain_connections():
+    """
+    Ask every open connection's client to reconnect, closing with
+    SERVICE_RESTART_CLOSE_CODE after the frames already queued for it.
+    Returns the number of connections closed.
+    """
+
+    consumers = list(_open_connections)
+    for consumer in consumers:
+        _open_connections.discard(consumer)
+        await consumer.close(SERVICE_RESTART_CLOSE_CODE, "Server restarting")
+    return len(consumers)
+
+
+class _TransportProducer:
+    """
+    Registered with a connection's transport as a streaming producer:
+    Twisted pauses it once the socket's write buffer is full (64KB),
+    and resumes it when the buffer has been flushed.
+    """
+
+    def __init__(self):
+        self.writable = asyncio.Event()
+        self.writable.set()
+
+    def pauseProducing(self):
+        self.writable.clear()
+
+    def resumeProducing(self):
+        self.writable.set()
+
+    def stopProducing(self):
+        # The connection is lost, daphne discards anything sent from here
+        self.writable.set()
+
+
+class OutboundQueueMixin:
+    """
+    Queues frames sent with send_json per connection, written to the client
+    by a background task that waits while the client's socket is backed up,
+    so a client that reads slowly doesn't hold up handling of its channel
+    layer messages.
+
+    Once the queue holds WEBSOCKET_OUTBOUND_QUEUE_SIZE frames, the oldest
+    frame of a DROP_OLDEST message type is dropped to make room. NEVER_DROP
+    frames (the default) are always queued, and a connection that stays over
+    the limit for WEBSOCKET_SLOW_CONSUMER_TIMEOUT seconds is closed.
+
+    base_send never blocks (daphne hands frames straight to the transport's
+    buffer), so the socket's state comes from the PRODUCER_EXTENSION in the
+    scope. Servers without it, like runserver, don't report it: frames are
+    written as soon as they're queued, and the queue never fills.
+    """
+
+    # Message type -> DROP_OLDEST or NEVER_DROP
+    outbound_policies = {}
+
+    _outbound = None
+    _outbound_writer = None
+    _producer = None
+    _over_limit_since = None
+    _outbound_closed = False
+
+    @property
+    def outbound_depth(self):
+        return len(self._outbound) if self._outbound else 0
+
+    async def send_json(self, content, close=False):
+        message = {"type": "websocket.send", "text": await self.encode_json(content)}
+        policy = self.outbound_policies.get(content.get("type"), NEVER_DROP)
+        await self._enqueue(policy, message)
+
+        if close:
+            await self.close(close)
+
+    async def close(self, code=None, reason=None):
+        if self._outbound_writer is None:
+            return await super().close(code, reason)
+
+        # Sent after the frames already queued
+        message = {"type": "websocket.close"}
+        if code is not None and code is not True:
+            message["code"] = code
+        if reason:
+            message["reason"] = reason
+        await self._enqueue(NEVER_DROP, message)
+        self._outbound_closed = True
+
+    async def websocket_disconnect(self, message):
+        self._stop_outbound()
+        await super().websocket_disconnect(message)
+
+    async def _enqueue(self, policy, message):
+        if self._outbound_closed:
+            return
+
+        if self._outbound is None:
+            self._outbound = deque()
+            self._outbound_size = getattr(settings, "WEBSOCKET_OUTBOUND_QUEUE_SIZE", 64)
+            self._slow_consumer_timeout = getattr(
+                settings, "WEBSOCKET_SLOW_CONSUMER_TIMEOUT", 10
+            )
+            _connections.add(self)
+
+            register = getattr(self, "scope", {}).get("extensions", {}).get(PRODUCER_EXTENSION)
+            if register is not None:
+                self._producer = _TransportProducer()
+                register(self._producer)
+
+        queue = self._outbound
+        if len(queue) >= self._outbound_size:
+            self._drop_oldest()
+        queue.append((policy, message))
+
+        if len(queue) > self._outbound_size:
+            now = time.monotonic()
+            if self._over_limit_since is None:
+                self._over_limit_since = now
+            elif now - self._over_limit_since > self._slow_consumer_timeout:
+                await self._close_slow_consumer()
+                return
+
+        if self._outbound_writer is None:
+            self._outbound_writer = asyncio.ensure_future(self._write_outbound())
+
+    def _drop_oldest(self):
+        for entry in self._outbound:
+            if entry[0] == DROP_OLDEST:
+                self._outbound.remove(entry)
+                _totals["dropped"] += 1
+                outbound_dropped.inc()
+                return
+
+    async def _write_outbound(self):
+        queue = self._outbound
+        try:
+            while queue:
+                if self._producer is not None:
+                    await self._producer.writable.wait()
+                _, message = queue.popleft()
+                if len(queue) <= self._outbound_size:
+                    self._over_limit_since = None
+                await self.base_send(message)
+        finally:
+            self._outbound_writer = None
+
+    def _stop_outbound(self):
+        if self._outbound_writer is not None:
+            self._outbound_writer.cancel()
+            self._outbound_writer = None
+        if self._outbound is not None:
+            self._outbound.clear()
+
+    async def _close_slow_consumer(self):
+        _totals["slow_disconnects"] += 1
+        slow_consumer_disconnects.inc()
+        self._stop_outbound()
+        self._outbound_closed = True
+        # Not awaited here, the client's transport is already backed up
+        self._outbound_writer = asyncio.ensure_future(
+            super().close(SLOW_CONSUMER_CLOSE_CODE, "Client too slow")
+        )
+
+
+# Handler names for the websocket events, as the consumers implement them
+_EVENT_HANDLERS = {
+    "websocket.connect": "connect",
+    "websocket.receive": "receive_json",
+    "websocket.disconnect": "disconnect"
+}
+
+
+class InstrumentedConsumerMixin:
+    """
+    Records the time spent handling each message in the
+    websocket_handler_seconds histogram, by consumer and handler,
+    and counts the consumer's connections, keeping the open ones
+    for drain_connections.
+
+    Queries are accounted to '<consumer>.<handler>', see core.queries.
+    """
+
+    _accepted = False
+
+    async def dispatch(self, message):
+        consumer = type(self).__name__
+        handler = _EVENT_HANDLERS.get(message["type"]) or message["type"].replace(".", "_")
+        start = time.perf_counter()
+        try:
+            with queries.accounting(f"{consumer}.{handler}"):
+                await super().dispatch(message)
+        finally:
+            metrics.handler_seconds.observe(
+                consumer, handler, value=time.perf_counter() - start
+            )
+
+    async def accept(self, *args, **kwargs):
+        await super().accept(*args, **kwargs)
+        self._accepted = True
+        _open_connections.add(self)
+        metrics.start_flusher()
+        metrics.connections_open.inc(type(self).__name__)
+        metrics.connections_total.inc(type(self).__name__)
+
+    async def websocket_disconnect(self, message):
+        if self._accepted:
+            self._accepted = False
+            _open_connections.discard(self)
+            metrics.connections_open.dec(type(self).__name__)
+        await super().websocket_disconnect(message)
+
+
+class AdmissionControlMixin:
+    """
+    Refuses connections before connect runs while the worker is overloaded
+    or the client is connecting too often, see core.admission.
+
+    The handshake is accepted and then closed with OVERLOADED_CLOSE_CODE,
+    as a handshake refused outright only reaches the client as a 403.
+    The reason tells the client how long to wait before retrying.
+
+    connect calls refuse() itself when it can't be handled, e.g. the DB
+    executor is full, before it has done anything disconnect would undo.
+    """
+
+    _refused = False
+
+    async def websocket_connect(self, message):
+        refusal = admission.check(self.scope)
+        if refusal is None:
+            return await super().websocket_connect(message)
+
+        await self._refuse(refusal)
+
+    async def refuse(self, reason):
+        admission.connections_rejected.inc(reason)
+        await self._refuse(reason)
+
+    async def _refuse(self, reason):
+        self._refused = True
+        retry_after = getattr(settings, "ADMISSION_RETRY_AFTER", 5)
+        await super().accept()
+        await super().close(OVERLOADED_CLOSE_CODE, f"{reason}; retry after {retry_after}s")
+
+    async def websocket_disconnect(self, message):
+        if self._refused:
+            # connect never ran, so there's nothing for disconnect to undo
+            raise StopConsumer()
+        await super().websocket_disconnect(message)
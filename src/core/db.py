@@ -0,0 +1,88 @@
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from core import metrics
+
+
+def get_pool_stats(alias=DEFAULT_DB_ALIAS):
+    """
+    Return metrics for this process's connection pool,
+    or None if the connection isn't pooled.
+
+    Counters (requests, wait time, timeouts) are cumulative
+    since the pool was opened.
+    """
+
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return None
+
+    stats = pool.get_stats()
+    requests = stats.get("requests_num", 0)
+    wait_ms = stats.get("requests_wait_ms", 0)
+
+    return {
+        "size": stats.get("pool_size", 0),
+        "max_size": stats.get("pool_max", 0),
+        "available": stats.get("pool_available", 0),
+        "in_use": stats.get("pool_size", 0) - stats.get("pool_available", 0),
+        "waiting": stats.get("requests_waiting", 0),
+        "requests": requests,
+        "wait_ms_total": wait_ms,
+        "wait_ms_avg": wait_ms / requests if requests else 0.0,
+        "timeouts": stats.get("requests_errors", 0),
+        "connections_lost": stats.get("connections_lost", 0)
+    }
+
+
+pool_connections = metrics.Gauge(
+    "db_pool_connections",
+    "Connections in this worker's DB pool, by state: in_use or available",
+    ("state",)
+)
+pool_max_size = metrics.Gauge(
+    "db_pool_max_size",
+    "Most connections this worker's DB pool may open"
+)
+pool_waiting = metrics.Gauge(
+    "db_pool_waiting",
+    "Requests waiting for a connection from the DB pool"
+)
+pool_requests = metrics.Counter(
+    "db_pool_requests_total",
+    "Connections requested from the DB pool"
+)
+pool_wait_seconds = metrics.Counter(
+    "db_pool_wait_seconds_total",
+    "Time spent waiting for connections from the DB pool"
+)
+pool_timeouts = metrics.Counter(
+    "db_pool_timeouts_total",
+    "Requests for a DB pool connection that timed out"
+)
+
+# Pool counters as of the last collection, so only the increase is counted
+_last_pool_counters = {}
+
+
+def _collect_pool():
+    stats = get_pool_stats()
+    if stats is None:
+        return
+
+    pool_connections.set("in_use", value=stats["in_use"])
+    pool_connections.set("available", value=stats["available"])
+    pool_max_size.set(value=stats["max_size"])
+    pool_waiting.set(value=stats["waiting"])
+
+    for counter, value in (
+        (pool_requests, stats["requests"]),
+        (pool_wait_seconds, stats["wait_ms_total"] / 1000),
+        (pool_timeouts, stats["timeouts"])
+    ):
+        last = _last_pool_counters.get(counter.name, 0)
+        # Lower than last time if the pool was reopened
+        counter.inc(amount=value - last if value >= last else value)
+        _last_pool_counters[counter.name] = value
+
+
+metrics.registry.register_collector(_collect_pool)
@@ -32,4 +32,19 @@ class MessageNotSupportedException(ServerException):
     
     def __str__(self):
         return self.msg
-   
\ No newline at end of file
+   
+
+class HashingPoolFullException(ServerException):
+    def __init__(self, msg: str):
+        super().__init__(msg)
+    
+    def __str__(self):
+        return self.msg
+
+
+class ExecutorQueueFullException(ServerException):
+    def __init__(self, msg: str):
+        super().__init__(msg)
+    
+    def __str__(self):
+        return self.msg
@@ -0,0 +1,190 @@
+from django.conf import settings
+from channels.db import DatabaseSyncToAsync
+
+from core import metrics
+from core.exceptions import ExecutorQueueFullException
+
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from threading import Lock
+
+import time
+
+
+# Name of the function being submitted, set by database_sync_to_async
+# just before asgiref hands the call to the executor.
+_function_name = ContextVar("function_name", default="unknown")
+
+# False for calls submitted by cleanup_database_sync_to_async
+_rejectable = ContextVar("rejectable", default=True)
+
+
+class FunctionStats:
+    __slots__ = ("calls", "wait_total", "wait_max", "run_total", "run_max")
+
+    def __init__(self):
+        self.calls = 0
+        self.wait_total = self.wait_max = 0.0
+        self.run_total = self.run_max = 0.0
+
+    def record(self, wait, run):
+        self.calls += 1
+        self.wait_total += wait
+        self.run_total += run
+        self.wait_max = max(self.wait_max, wait)
+        self.run_max = max(self.run_max, run)
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "wait_avg": self.wait_total / self.calls if self.calls else 0.0,
+            "wait_max": self.wait_max,
+            "run_avg": self.run_total / self.calls if self.calls else 0.0,
+            "run_max": self.run_max
+        }
+
+
+class InstrumentedExecutor(ThreadPoolExecutor):
+    """
+    Thread pool for blocking DB work, which records queue wait and
+    run time per calling function.
+
+    Once max_queue calls are waiting for a thread, further submissions
+    raise ExecutorQueueFullException straight away, rather than
+    queueing behind a slow database. Cleanup calls are queued anyway.
+    """
+
+    def __init__(self, max_workers, max_queue):
+        super().__init__(max_workers=max_workers, thread_name_prefix="db-executor")
+        self.max_queue = max_queue
+        self.queued = 0
+        self.running = 0
+        self.rejected = 0
+        self._functions = {}
+        self._lock = Lock()
+
+    def submit(self, fn, /, *args, **kwargs):
+        name = _function_name.get()
+
+        with self._lock:
+            if self.queued >= self.max_queue and _rejectable.get():
+                self.rejected += 1
+                executor_rejected.inc()
+                raise ExecutorQueueFullException(
+                    f"DB executor queue is full ({self.queued} calls waiting), "
+                    f"rejecting '{name}'."
+                )
+            self.queued += 1
+
+        submitted_at = time.perf_counter()
+
+        def run():
+            started_at = time.perf_counter()
+            with self._lock:
+                self.queued -= 1
+                self.running += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                finished_at = time.perf_counter()
+                wait, elapsed = started_at - submitted_at, finished_at - started_at
+                with self._lock:
+                    self.running -= 1
+                    self._functions.setdefault(name, FunctionStats()).record(wait, elapsed)
+                executor_wait_seconds.observe(name, value=wait)
+                executor_run_seconds.observe(name, value=elapsed)
+
+        return super().submit(run)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "threads": self._max_workers,
+                "queued": self.queued,
+                "running": self.running,
+                "rejected": self.rejected,
+                "functions": {
+                    name: stats.as_dict() for name, stats in self._functions.items()
+                }
+            }
+
+
+_executor = None
+_executor_lock = Lock()
+
+
+def get_executor():
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = InstrumentedExecutor(
+                max_workers=getattr(settings, "DATABASE_EXECUTOR_THREADS", 8),
+                max_queue=getattr(settings, "DATABASE_EXECUTOR_MAX_QUEUE", 256)
+            )
+        return _executor
+
+
+executor_calls = metrics.Gauge(
+    "db_executor_calls",
+    "DB executor calls by state: queued or running",
+    ("state",)
+)
+executor_rejected = metrics.Counter(
+    "db_executor_rejected_total",
+    "DB executor calls rejected because the queue was full"
+)
+executor_wait_seconds = metrics.Histogram(
+    "db_executor_wait_seconds",
+    "Time DB executor calls waited for a thread, by calling function",
+    ("function",)
+)
+executor_run_seconds = metrics.Histogram(
+    "db_executor_run_seconds",
+    "Time DB executor calls ran for, by calling function",
+    ("function",)
+)
+
+
+def _collect_executor():
+    if _executor is not None:
+        stats = _executor.stats()
+        for state in ("queued", "running"):
+            executor_calls.set(state, value=stats[state])
+
+
+metrics.registry.register_collector(_collect_executor)
+
+
+class InstrumentedDatabaseSyncToAsync(DatabaseSyncToAsync):
+    """
+    channels' database_sync_to_async, run on the instrumented DB executor
+    instead of asgiref's single thread sensitive thread.
+    """
+
+    def __init__(self, func, rejectable=True):
+        super().__init__(func, thread_sensitive=False, executor=get_executor())
+        self.function_name = getattr(func, "__qualname__", repr(func))
+        self.rejectable = rejectable
+
+    async def __call__(self, *args, **kwargs):
+        token = _function_name.set(self.function_name)
+        rejectable_token = _rejectable.set(self.rejectable)
+        try:
+            return await super().__call__(*args, **kwargs)
+        finally:
+            _rejectable.reset(rejectable_token)
+            _function_name.reset(token)
+
+
+database_sync_to_async = InstrumentedDatabaseSyncToAsync
+
+
+def cleanup_database_sync_to_async(func):
+    """
+    database_sync_to_async for cleanup that has to happen even while the
+    executor is full, like releasing a disconnected client's seat:
+    queued past max_queue instead of rejected.
+    """
+
+    return InstrumentedDatabaseSyncToAsync(func, rejectable=False)
@@ -0,0 +1,28 @@
+from core.locks import try_lock
+from core.models import Player
+
+import time
+
+
+def prune_players(on_chunk=None):
+    """
+    Remove players not seen within PLAYER_MAX_AGE seconds.
+
+    Skipped while another run, from any process, holds the lock.
+    Returns the run's duration, rows deleted, chunks and lag.
+    """
+
+    with try_lock("housekeeping.prune_players") as acquired:
+        if not acquired:
+            return {"skipped": True}
+
+        start = time.perf_counter()
+        rows, chunks, lag = Player.objects.prune_in_chunks(on_chunk=on_chunk)
+
+        return {
+            "skipped": False,
+            "duration": time.perf_counter() - start,
+            "rows": rows,
+            "chunks": chunks,
+            "lag": lag
+        }
@@ -0,0 +1,200 @@
+from channels.exceptions import ChannelFull
+from channels.layers import BaseChannelLayer
+
+from collections import deque
+from copy import deepcopy
+
+import asyncio
+import random
+import string
+import time
+import uuid
+
+
+class _Channel:
+    __slots__ = ("messages", "waiters")
+
+    def __init__(self):
+        self.messages = deque()
+        self.waiters = deque()
+
+
+class InProcessChannelLayer(BaseChannelLayer):
+    """
+    Channel layer for single-node deployments, keeping all channels and
+    groups in this process's memory.
+
+    Unlike channels' InMemoryChannelLayer it's meant for production:
+        - Each channel buffers at most its capacity ('capacity' or a
+          'channel_capacity' pattern, as for the Redis layer). send() raises
+          ChannelFull beyond that, while group_send() skips full channels.
+        - Messages expire after 'expiry' seconds and group memberships
+          after 'group_expiry' seconds, as with the Redis layer.
+        - Expiry is handled lazily per channel, plus a sweep at most once
+          per 'expiry' seconds, rather than scanning every channel on
+          every receive and group_send.
+
+    Must only be used from the event loop thread.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(
+        self,
+        expiry=60,
+        group_expiry=86400,
+        capacity=100,
+        channel_capacity=None,
+        **kwargs
+    ):
+        super().__init__(expiry=expiry, capacity=capacity, **kwargs)
+        self.channel_capacity = self.compile_capacities(channel_capacity or {})
+        self.group_expiry = group_expiry
+        self.channels = {}
+        self.groups = {}
+        self.full_count = 0
+        self._next_sweep = time.time() + expiry
+        # As with the Redis layer, so this process's channels share a prefix
+        self.client_prefix = uuid.uuid4().hex
+
+    # Channel layer API
+
+    async def send(self, channel, message):
+        assert isinstance(message, dict), "message is not a dict"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+        assert "__asgi_channel__" not in message
+
+        now = time.time()
+        self._maybe_sweep(now)
+
+        state = self.channels.get(channel)
+        if state is None:
+            state = self.channels[channel] = _Channel()
+
+        self._expire(state, now)
+        if len(state.messages) >= self.get_capacity(channel):
+            self.full_count += 1
+            raise ChannelFull(channel)
+
+        state.messages.append((now + self.expiry, deepcopy(message)))
+
+        while state.waiters:
+            waiter = state.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+
+        state = self.channels.get(channel)
+        if state is None:
+            state = self.channels[channel] = _Channel()
+
+        while True:
+            self._expire(state, time.time())
+            if state.messages:
+                _, message = state.messages.popleft()
+                self._discard_if_idle(channel, state)
+                return message
+
+            waiter = asyncio.get_running_loop().create_future()
+            state.waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                if waiter in state.waiters:
+                    state.waiters.remove(waiter)
+                self._discard_if_idle(channel, state)
+                raise
+
+    async def new_channel(self, prefix="specific"):
+        return "%s.%s!%s" % (
+            prefix,
+            self.client_prefix,
+            "".join(random.choice(string.ascii_letters) for i in range(12)),
+        )
+
+    # Expiry
+
+    @staticmethod
+    def _expire(state, now):
+        messages = state.messages
+        while messages and messages[0][0] < now:
+            messages.popleft()
+
+    def _discard_if_idle(self, channel, state):
+        if not state.messages and not state.waiters:
+            self.channels.pop(channel, None)
+
+    def _maybe_sweep(self, now):
+        """
+        Drop expired messages from channels nobody is receiving on,
+        and idle channels, at most once per expiry period.
+        """
+
+        if now < self._next_sweep:
+            return
+
+        self._next_sweep = now + self.expiry
+        for channel, state in list(self.channels.items()):
+            self._expire(state, now)
+            self._discard_if_idle(channel, state)
+
+    # Flush extension
+
+    async def flush(self):
+        self.channels = {}
+        self.groups = {}
+
+    async def close(self):
+        pass
+
+    # Groups extension
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group), "Group name not valid"
+        assert self.valid_channel_name(channel), "Channel name not valid"
+
+        self.groups.setdefault(group, {})[channel] = time.time()
+
+    async def group_discard(self, group, channel):
+        assert self.valid_channel_name(channel), "Invalid channel name"
+        assert self.valid_group_name(group), "Invalid group name"
+
+        members = self.groups.get(group)
+        if members is not None:
+            members.pop(channel, None)
+            if not members:
+                del self.groups[group]
+
+    async def group_send(self, group, message):
+        assert isinstance(message, dict), "Message is not a dict"
+        assert self.valid_group_name(group), "Invalid group name"
+
+        members = self.groups.get(group)
+        if not members:
+            return
+
+        joined_after = time.time() - self.group_expiry
+        for channel, joined_at in list(members.items()):
+            if joined_at < joined_after:
+                del members[channel]
+                continue
+            try:
+                await self.send(channel, message)
+            except ChannelFull:
+                pass
+
+        if not members:
+            self.groups.pop(group, None)
+
+    def stats(self):
+        return {
+            "channels": len(self.channels),
+            "groups": len(self.groups),
+            "buffered_messages": sum(
+                len(state.messages) for state in self.channels.values()
+            ),
+            "channel_full": self.full_count
+        }
@@ -0,0 +1,498 @@
+from django.contrib.auth import get_user_model
+from django.db import connections
+from django.db.backends.signals import connection_created
+from channels.testing import WebsocketCommunicator
+from rest_framework_simplejwt.tokens import AccessToken
+
+from arena.models import ArenaRoom
+from core.models import Room
+from lobby import enums
+from lobby.token_cache import token_user_cache
+
+from threading import Lock
+from urllib.parse import urlsplit
+
+import asyncio
+import base64
+import json
+import multiprocessing
+import os
+import time
+
+
+LOAD_EMAIL_DOMAIN = "load.example.com"
+
+ORIGIN_HEADERS = [(b"origin", b"ws://127.0.0.1:8000")]
+
+
+def percentiles(samples):
+    """
+    p50/p95/p99/max of samples in seconds, as milliseconds.
+    """
+
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+
+    samples = sorted(samples)
+
+    def at(fraction):
+        return round(samples[min(len(samples) - 1, int(len(samples) * fraction))] * 1000, 3)
+
+    return {
+        "p50": at(0.50),
+        "p95": at(0.95),
+        "p99": at(0.99),
+        "max": round(samples[-1] * 1000, 3)
+    }
+
+
+class QueryCounter:
+    """
+    Counts queries on every connection opened while active, whichever
+    thread opens it, by adding an execute wrapper to each.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = Lock()
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def _install(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+            self._connections.append(connection)
+
+    def __enter__(self):
+        connection_created.connect(self._install)
+        for connection in connections.all():
+            self._install(None, connection)
+        return self
+
+    def __exit__(self, *exc_info):
+        connection_created.disconnect(self._install)
+        for connection in self._connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+
+class NetworkCommunicator:
+    """
+    WebsocketCommunicator's client methods over a real connection to a server,
+    e.g. one started with 'manage.py serve'. Speaks as much of RFC 6455 as
+    the scenarios need: unfragmented text frames, ping and close.
+    """
+
+    TEXT, CLOSE, PING, PONG = 0x1, 0x8, 0x9, 0xA
+
+    def __init__(self, url, path, headers=()):
+        url = urlsplit(url)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.path = "/" + path.lstrip("/")
+        self.headers = headers
+        self.close_code = None
+        self._reader = self._writer = None
+
+    async def connect(self, timeout=1):
+        return await asyncio.wait_for(self._handshake(), timeout)
+
+    async def _handshake(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        request = [
+            f"GET {self.path} HTTP/1.1",
+            f"Host: {self.host}:{self.port}",
+            "Upgrade: websocket",
+            "Connection: Upgrade",
+            f"Sec-WebSocket-Key: {base64.b64encode(os.urandom(16)).decode()}",
+            "Sec-WebSocket-Version: 13"
+        ] + [f"{name.decode()}: {value.decode()}" for name, value in self.headers]
+        self._writer.write(("\r\n".join(request) + "\r\n\r\n").encode())
+
+        response = await self._reader.readuntil(b"\r\n\r\n")
+        status = int(response.split(b" ", 2)[1])
+        if status != 101:
+            self._writer.close()
+            return False, status
+        return True, None
+
+    def _send_frame(self, opcode, payload):
+        header = bytearray([0x80 | opcode])
+        if len(payload) < 126:
+            header.append(0x80 | len(payload))
+        elif len(payload) < 1 << 16:
+            header += bytes([0x80 | 126]) + len(payload).to_bytes(2, "big")
+        else:
+            header += bytes([0x80 | 127]) + len(payload).to_bytes(8, "big")
+
+        # Clients mask every frame
+        mask = os.urandom(4)
+        repeated = (mask * (len(payload) // 4 + 1))[:len(payload)]
+        masked = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+        self._writer.write(bytes(header) + mask + masked.to_bytes(len(payload), "big"))
+
+    async def _receive_frame(self):
+        head = await self._reader.readexactly(2)
+        length = head[1] & 0x7F
+        if length == 126:
+            length = int.from_bytes(await self._reader.readexactly(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await self._reader.readexactly(8), "big")
+        return head[0] & 0x0F, await self._reader.readexactly(length)
+
+    async def send_json_to(self, data):
+        self._send_frame(self.TEXT, json.dumps(data).encode())
+        await self._writer.drain()
+
+    async def receive_json_from(self, timeout=1):
+        return await asyncio.wait_for(self._receive_json(), timeout)
+
+    async def _receive_json(self):
+        while True:
+            opcode, payload = await self._receive_frame()
+            if opcode == self.TEXT:
+                return json.loads(payload)
+            if opcode == self.PING:
+                self._send_frame(self.PONG, payload)
+            elif opcode == self.CLOSE:
+                self.close_code = int.from_bytes(payload[:2], "big") if payload else None
+                raise ConnectionError(f"Closed by the server with {self.close_code}")
+
+    async def disconnect(self, code=1000):
+        if self._writer is None or self._writer.is_closing():
+            return
+        try:
+            self._send_frame(self.CLOSE, code.to_bytes(2, "big"))
+            self._writer.close()
+            await self._writer.wait_closed()
+        except OSError:
+            pass
+
+
+class LoadRun:
+    """
+    One scenario's simulated clients against an ASGI application,
+    or a server at url, collecting connect times, message latencies
+    and event loop lag.
+    """
+
+    def __init__(self, application, concurrency=500, timeout=10, url=None):
+        self.application = application
+        self.url = url
+        self.timeout = timeout
+        self._concurrency = asyncio.Semaphore(concurrency)
+        self.connect_times = []
+        self.latencies = []
+        self.loop_lag = []
+        self.rejected = 0
+        self.errors = 0
+        self._connects_started = None
+        self._connects_finished = None
+
+    async def connect(self, path):
+        """
+        Open a websocket, returning its communicator,
+        or None if the connection was refused.
+        """
+
+        if self.url:
+            communicator = NetworkCommunicator(self.url, path, headers=ORIGIN_HEADERS)
+        else:
+            communicator = WebsocketCommunicator(self.application, path, headers=ORIGIN_HEADERS)
+        start = time.perf_counter()
+        if self._connects_started is None:
+            self._connects_started = start
+        try:
+            async with self._concurrency:
+                connected, _ = await communicator.connect(timeout=self.timeout)
+        except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError):
+            self.errors += 1
+            return None
+
+        if not connected:
+            self.rejected += 1
+            return None
+
+        self._connects_finished = time.perf_counter()
+        self.connect_times.append(self._connects_finished - start)
+        return communicator
+
+    @property
+    def connect_rate(self):
+        """
+        Connections accepted per second, from the first attempt to the last acceptance.
+        """
+
+        if not self.connect_times:
+            return 0.0
+        return len(self.connect_times) / (self._connects_finished - self._connects_started)
+
+    async def receive(self, communicator):
+        """
+        Receive a message, recording its latency from the
+        'sent_at' its sender put in the message data.
+        """
+
+        message = await communicator.receive_json_from(timeout=self.timeout)
+        sent_at = (message.get("data") or {}).get("sent_at")
+        if sent_at is not None:
+            self.latencies.append(time.perf_counter() - sent_at)
+        return message
+
+    def results(self):
+        """
+        The samples and counts collected, to combine with add_results.
+        """
+
+        return {
+            "connect_times": self.connect_times,
+            "latencies": self.latencies,
+            "loop_lag": self.loop_lag,
+            "rejected": self.rejected,
+            "errors": self.errors,
+            "connects_started": self._connects_started,
+            "connects_finished": self._connects_finished
+        }
+
+    def add_results(self, results):
+        """
+        Add another run's results, e.g. from another client process.
+        """
+
+        self.connect_times += results["connect_times"]
+        self.latencies += results["latencies"]
+        self.loop_lag += results["loop_lag"]
+        self.rejected += results["rejected"]
+        self.errors += results["errors"]
+
+        started = [t for t in (self._connects_started, results["connects_started"]) if t]
+        finished = [t for t in (self._connects_finished, results["connects_finished"]) if t]
+        self._connects_started = min(started, default=None)
+        self._connects_finished = max(finished, default=None)
+
+    async def sample_loop_lag(self, interval=0.01):
+        while True:
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            self.loop_lag.append(max(0.0, time.perf_counter() - expected))
+
+    async def gather(self, coros):
+        """
+        Run the clients' coroutines together, counting
+        the ones that fail rather than stopping the run.
+        """
+
+        results = await asyncio.gather(*coros, return_exceptions=True)
+        self.errors += sum(isinstance(result, Exception) for result in results)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+
+async def _disconnect(communicators):
+    await asyncio.gather(
+        *(communicator.disconnect() for communicator in communicators if communicator),
+        return_exceptions=True
+    )
+
+
+async def lobby_join_storm(run, tokens, **options):
+    """
+    Every client joins the lobby at once and waits for
+    its user group name, sent by the consumer on connect.
+    """
+
+    async def join(token):
+        communicator = await run.connect(f"ws/lobby/load?token={token}")
+        if communicator is not None:
+            start = time.perf_counter()
+            await communicator.receive_json_from(timeout=run.timeout)
+            run.latencies.append(time.perf_counter() - start)
+        return communicator
+
+    await _disconnect(await run.gather(join(token) for token in tokens))
+
+
+async def challenge_exchange(run, tokens, users, rounds=5, **options):
+    """
+    Clients in the lobby pair up. Each round one challenges the other,
+    who replies with a change request.
+    """
+
+    async def join(token):
+        communicator = await run.connect(f"ws/lobby/load?token={token}")
+        if communicator is not None:
+            await communicator.receive_json_from(timeout=run.timeout)
+        return communicator
+
+    communicators = await run.gather(join(token) for token in tokens)
+
+    async def exchange(challenger, opponent, challenger_id, opponent_id):
+        for round in range(rounds):
+            await challenger.send_json_to({
+                "type": "lobby.challenge",
+                "group_name": f"user_{opponent_id}",
+                "data": {
+                    "colour": enums.Colours.WHITE.value,
+                    "time_control": enums.TimeControls.RAPID.value,
+                    "sent_at": time.perf_counter()
+                }
+            })
+            await run.receive(opponent)
+            await opponent.send_json_to({
+                "type": "challenge.change.request",
+                "group_name": f"user_{challenger_id}",
+                "data": {
+                    "time_control": enums.TimeControls.BLITZ.value,
+                    "sent_at": time.perf_counter()
+                }
+            })
+            await run.receive(challenger)
+
+    pairs = [
+        (communicators[i], communicators[i + 1], users[i].id, users[i + 1].id)
+        for i in range(0, len(communicators) - 1, 2)
+        if communicators[i] and communicators[i + 1]
+    ]
+    await run.gather(exchange(*pair) for pair in pairs)
+    await _disconnect(communicators)
+
+
+async def arena_ping_pong(run, tokens, users, moves=20, **options):
+    """
+    Clients pair up in arena rooms, named after the white player,
+    and take turns to send moves, each echoed back by the consumer.
+    """
+
+    async def play(game, white_token, black_token):
+        players = [
+            await run.connect(f"ws/arena/load{game}?token={token}")
+            for token in (white_token, black_token)
+        ]
+        try:
+            if None in players:
+                return
+            for move in range(moves):
+                player = players[move % 2]
+                await player.send_json_to({
+                    "type": "echo.message",
+                    "data": {"move": move, "sent_at": time.perf_counter()}
+                })
+                await run.receive(player)
+        finally:
+            await _disconnect(players)
+
+    await run.gather(
+        play(users[i].id, tokens[i], tokens[i + 1])
+        for i in range(0, len(tokens) - 1, 2)
+    )
+
+
+SCENARIOS = {
+    "lobby_join_storm": lobby_join_storm,
+    "challenge_exchange": challenge_exchange,
+    "arena_ping_pong": arena_ping_pong
+}
+
+
+def create_load_users(count):
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(email=f"{i}@{LOAD_EMAIL_DOMAIN}", name=f"load {i}", password="!")
+        for i in range(count)
+    ])
+    return users, [str(AccessToken.for_user(user)) for user in users]
+
+
+def delete_load_users():
+    Room.objects.filter(room_name="room_load").delete()
+    ArenaRoom.objects.filter(room_name__startswith="chess_load").delete()
+    get_user_model().objects.filter(email__endswith=f"@{LOAD_EMAIL_DOMAIN}").delete()
+    token_user_cache.clear()
+
+
+async def _drive(run, scenario, users, tokens, **options):
+    sampler = asyncio.ensure_future(run.sample_loop_lag())
+    try:
+        await SCENARIOS[scenario](run, tokens, users=users, **options)
+    finally:
+        sampler.cancel()
+
+
+def _report(scenario, clients, elapsed, run, queries=None):
+    return {
+        "scenario": scenario,
+        "clients": clients,
+        "seconds": round(elapsed, 3),
+        "connect": {
+            "accepted": len(run.connect_times),
+            "rejected": run.rejected,
+            "rate": round(run.connect_rate, 1),
+            **percentiles(run.connect_times)
+        },
+        "messages": {
+            "count": len(run.latencies),
+            "rate": round(len(run.latencies) / elapsed, 1) if elapsed else None,
+            **percentiles(run.latencies)
+        },
+        "loop_lag": percentiles(run.loop_lag),
+        "queries": {
+            "total": queries,
+            "per_client": round(queries / clients, 2) if clients else None
+        } if queries is not None else None,
+        "errors": run.errors
+    }
+
+
+async def run_scenario(application, scenario, users, tokens, concurrency=500, **options):
+    """
+    Run a scenario with a client per user, returning its report.
+    """
+
+    run = LoadRun(application, concurrency=concurrency)
+
+    start = time.perf_counter()
+    with QueryCounter() as queries:
+        await _drive(run, scenario, users, tokens, **options)
+    elapsed = time.perf_counter() - start
+
+    return _report(scenario, len(tokens), elapsed, run, queries.count)
+
+
+def _run_client_process(url, scenario, users, tokens, concurrency, options):
+    async def drive():
+        run = LoadRun(None, concurrency=concurrency, url=url)
+        await _drive(run, scenario, users, tokens, **options)
+        return run.results()
+
+    return asyncio.run(drive())
+
+
+def run_scenario_over_network(url, scenario, users, tokens, processes=1, concurrency=500, **options):
+    """
+    Run a scenario against the server at url, with the clients split
+    between processes so the harness isn't the bottleneck.
+    Queries are made by the server, so aren't counted.
+    """
+
+    # Slices of whole pairs, as the scenarios pair clients up
+    size = -(-len(tokens) // processes)
+    size += size % 2
+    slices = [
+        (url, scenario, users[i:i + size], tokens[i:i + size], concurrency, options)
+        for i in range(0, len(tokens), size)
+    ]
+
+    # Forked clients can't share the parent's database connections
+    connections.close_all()
+    start = time.perf_counter()
+    with multiprocessing.get_context("fork").Pool(len(slices)) as pool:
+        results = pool.starmap(_run_client_process, slices)
+    elapsed = time.perf_counter() - start
+
+    run = LoadRun(None, url=url)
+    for result in results:
+        run.add_results(result)
+    return _report(scenario, len(tokens), elapsed, run)
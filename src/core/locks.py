@@ -0,0 +1,125 @@
+from django.conf import settings
+from django.db import connections, DEFAULT_DB_ALIAS
+
+from contextlib import contextmanager
+from threading import Lock
+
+import zlib
+
+
+class AdvisoryLock:
+    """
+    Postgres session-level advisory lock, shared by every process
+    using the database.
+
+    Held on a connection of its own rather than a pooled one, since the
+    lock lives as long as the session does. Closing that connection, or
+    losing it, releases the lock.
+    """
+
+    def __init__(self, name, alias=DEFAULT_DB_ALIAS):
+        self.name = name
+        self.alias = alias
+        self.key = zlib.crc32(name.encode())
+        self._connection = None
+
+    @property
+    def held(self):
+        if self._connection is None:
+            return False
+        try:
+            self._connection.execute("SELECT 1")
+            return True
+        except Exception:
+            self._close()
+            return False
+
+    def acquire(self):
+        """
+        Take the lock without waiting, returning whether it was taken.
+        """
+
+        if self._connection is not None:
+            return self.held
+
+        wrapper = connections[self.alias]
+        self._connection = wrapper.Database.connect(
+            **wrapper.get_connection_params(), autocommit=True
+        )
+        acquired = self._connection.execute(
+            "SELECT pg_try_advisory_lock(%s)", (self.key,)
+        ).fetchone()[0]
+
+        if not acquired:
+            self._close()
+        return acquired
+
+    def release(self):
+        if self._connection is not None:
+            try:
+                self._connection.execute("SELECT pg_advisory_unlock(%s)", (self.key,))
+            finally:
+                self._close()
+
+    def _close(self):
+        try:
+            self._connection.close()
+        finally:
+            self._connection = None
+
+
+class LocalLock:
+    """
+    Stand-in for AdvisoryLock, shared only within this process.
+    For tests and single-process deployments.
+    """
+
+    _held = set()
+    _mutex = Lock()
+
+    def __init__(self, name):
+        self.name = name
+        self.held = False
+
+    def acquire(self):
+        if self.held:
+            return True
+
+        with self._mutex:
+            if self.name in self._held:
+                return False
+            self._held.add(self.name)
+        self.held = True
+        return True
+
+    def release(self):
+        if self.held:
+            with self._mutex:
+                self._held.discard(self.name)
+            self.held = False
+
+
+def get_lock(name):
+    """
+    Return a lock for name, of the HOUSEKEEPING_LOCKS kind:
+    'advisory' (default) or 'local'.
+    """
+
+    if getattr(settings, "HOUSEKEEPING_LOCKS", "advisory") == "local":
+        return LocalLock(name)
+    return AdvisoryLock(name)
+
+
+@contextmanager
+def try_lock(name):
+    """
+    Yield whether the lock was taken, releasing it afterwards.
+    """
+
+    lock = get_lock(name)
+    acquired = lock.acquire()
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            lock.release()
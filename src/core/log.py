@@ -0,0 +1,113 @@
+from django.conf import settings
+
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, Full
+from datetime import datetime, timezone
+
+import json
+import logging
+import random
+import sys
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger, event,
+    and the fields passed to EventLogger.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            **getattr(record, "fields", {})
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Hands records to a thread that formats and writes them to stderr,
+    so logging never blocks the event loop on a write.
+
+    Records are queued unformatted, and dropped (and counted)
+    when the queue is full rather than waiting for room.
+    """
+
+    def __init__(self, queue_size=10000):
+        super().__init__(Queue(maxsize=queue_size))
+        self.dropped = 0
+
+        stream = logging.StreamHandler(sys.stderr)
+        stream.setFormatter(JSONFormatter())
+        self.listener = QueueListener(self.queue, stream, respect_handler_level=False)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Formatting is left to the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            self.dropped += 1
+
+    def close(self):
+        # Called by logging.shutdown at exit, writing out queued records
+        if self.listener._thread is not None:
+            try:
+                self.listener.stop()
+            except Full:
+                # No room for the stop sentinel, leave the daemon thread be
+                pass
+        super().close()
+
+
+class EventLogger:
+    """
+    Logs named events with structured fields:
+
+        log.debug("lobby.receive", type=message_type, channel=self.channel_name)
+
+    Costs a level check when the level is disabled. An event with a rate in
+    LOG_SAMPLE_RATES is only logged for that fraction of calls. Nothing is
+    formatted on the calling thread.
+    """
+
+    def __init__(self, name):
+        self.logger = logging.getLogger(name)
+
+    def log(self, level, event, fields, exc_info=None):
+        if not self.logger.isEnabledFor(level):
+            return
+
+        rate = getattr(settings, "LOG_SAMPLE_RATES", {}).get(event)
+        if rate is not None and random.random() >= rate:
+            return
+
+        # makeRecord rather than Logger.log, skipping the caller lookup
+        record = self.logger.makeRecord(
+            self.logger.name, level, "", 0, event, (), exc_info, extra={"fields": fields}
+        )
+        self.logger.handle(record)
+
+    def debug(self, event, **fields):
+        self.log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self.log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self.log(logging.WARNING, event, fields)
+
+    def exception(self, event, **fields):
+        self.log(logging.ERROR, event, fields, exc_info=sys.exc_info())
+
+
+def get_logger(name):
+    return EventLogger(name)
@@ -0,0 +1,115 @@
+from django.core.management import BaseCommand
+from django.utils.module_loading import import_string
+
+import asyncio
+import time
+
+
+LAYERS = {
+    "inmemory": ("channels.layers.InMemoryChannelLayer", {}),
+    "inprocess": ("core.layers.InProcessChannelLayer", {}),
+    "redis": ("channels_redis.core.RedisChannelLayer", {}),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark channel layers on the lobby and arena message patterns: "
+        "lobby roster broadcasts, user group sends and arena move ping-pong."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=500)
+        parser.add_argument("--rounds", type=int, default=20)
+        parser.add_argument("--games", type=int, default=100)
+        parser.add_argument("--moves", type=int, default=40)
+        parser.add_argument(
+            "--layers",
+            nargs="+",
+            choices=LAYERS.keys(),
+            default=["inmemory", "inprocess"]
+        )
+        parser.add_argument("--redis-host", default="redis:6379")
+
+    def _layer(self, name, options):
+        backend, config = LAYERS[name]
+        config = dict(config, capacity=max(100, options["rounds"] * 2))
+        if name == "redis":
+            host, port = options["redis_host"].split(":")
+            config["hosts"] = [(host, int(port))]
+        return import_string(backend)(**config)
+
+    async def _lobby(self, layer, clients, rounds):
+        """
+        Every client joins the lobby room group and its own user group.
+        Each round broadcasts a roster update to the room, then sends every
+        client a challenge through its user group, and drains all channels.
+        """
+
+        channels = [await layer.new_channel() for i in range(clients)]
+        for i, channel in enumerate(channels):
+            await layer.group_add("room_bench", channel)
+            await layer.group_add(f"user_{i}", channel)
+
+        start = time.perf_counter()
+        for round in range(rounds):
+            await layer.group_send("room_bench", {
+                "type": "send_connected_users", "round": round
+            })
+            for i in range(clients):
+                await layer.group_send(f"user_{i}", {
+                    "type": "send_challenge_request", "round": round
+                })
+            for channel in channels:
+                await layer.receive(channel)
+                await layer.receive(channel)
+        elapsed = time.perf_counter() - start
+
+        for i, channel in enumerate(channels):
+            await layer.group_discard("room_bench", channel)
+            await layer.group_discard(f"user_{i}", channel)
+
+        return clients * rounds * 2, elapsed
+
+    async def _arena(self, layer, games, moves):
+        """
+        Each game's players send moves to each other's channel in turn,
+        all games running concurrently.
+        """
+
+        async def play():
+            white, black = await layer.new_channel(), await layer.new_channel()
+            for move in range(moves):
+                sender, receiver = (white, black) if move % 2 == 0 else (black, white)
+                await layer.send(receiver, {"type": "send_move", "move": move})
+                await layer.receive(receiver)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(play() for i in range(games)))
+        return games * moves, time.perf_counter() - start
+
+    async def _bench(self, name, options):
+        layer = self._layer(name, options)
+        try:
+            for pattern, bench, args in (
+                ("lobby", self._lobby, (options["clients"], options["rounds"])),
+                ("arena", self._arena, (options["games"], options["moves"]))
+            ):
+                messages, elapsed = await bench(layer, *args)
+                self.stdout.write(
+                    f"  {pattern:<6} {messages:>8} messages  "
+                    f"{elapsed:>7.3f}s  {messages / elapsed:>10.0f} msg/s"
+                )
+            if hasattr(layer, "stats"):
+                self.stdout.write(f"  {layer.stats()}")
+        finally:
+            await layer.flush()
+
+    def handle(self, *args, **options):
+        for name in options["layers"]:
+            self.stdout.write(name)
+            try:
+                asyncio.run(self._bench(name, options))
+            except Exception as e:
+                # e.g. no Redis server reachable at --redis-host
+                self.stderr.write(f"  failed: {e!r}")
@@ -0,0 +1,143 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import csv
+import django
+import json
+import os
+import time
+
+
+def _init_worker():
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
+    django.setup()
+
+
+def _read_csv(file):
+    yield from csv.DictReader(file)
+
+
+def _read_ndjson(file):
+    for line in file:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk import users from a CSV or NDJSON file, with 'email' and either "
+        "'password' (hashed in a process pool) or 'password_hash' fields, "
+        "and an optional 'name'. Rows are loaded with COPY in chunks, "
+        "skipping emails which already exist."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=["csv", "ndjson"])
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument("--workers", type=int, default=None)
+
+    def _rows(self, file, file_format):
+        reader = _read_csv if file_format == "csv" else _read_ndjson
+        normalize_email = get_user_model().objects.normalize_email
+
+        for row in reader(file):
+            email = normalize_email((row.get("email") or "").strip())
+            if email:
+                yield email, row
+
+    def _hash_passwords(self, executor, rows):
+        """
+        Return the stored password for each row, hashing plain
+        text passwords in the worker pool.
+        """
+
+        to_hash = [
+            row.get("password") or None
+            for _, row in rows if not row.get("password_hash")
+        ]
+        hashed = iter(executor.map(make_password, to_hash, chunksize=64))
+
+        return [
+            row["password_hash"] if row.get("password_hash") else next(hashed)
+            for _, row in rows
+        ]
+
+    def _load_chunk(self, table, records):
+        """
+        COPY a chunk into a temp table, then insert it into the user
+        table, skipping emails already there. Returns rows inserted.
+        """
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMP TABLE IF NOT EXISTS user_import "
+                "(email varchar(244), password varchar(128), name varchar(255))"
+            )
+            cursor.execute("TRUNCATE user_import")
+
+            with cursor.copy("COPY user_import (email, password, name) FROM STDIN") as copy:
+                for record in records:
+                    copy.write_row(record)
+
+            cursor.execute(
+                f"INSERT INTO {table} (email, password, name, is_superuser, is_staff) "
+                "SELECT email, password, name, false, false FROM user_import "
+                "ON CONFLICT (email) DO NOTHING"
+            )
+            return cursor.rowcount
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or (
+            "ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv"
+        )
+        table = connection.ops.quote_name(get_user_model()._meta.db_table)
+
+        if not os.path.exists(path):
+            raise CommandError(f"File '{path}' does not exist.")
+
+        seen = set()
+        read = inserted = 0
+        start = time.perf_counter()
+
+        with open(path, newline="") as file, ProcessPoolExecutor(
+            max_workers=options["workers"], initializer=_init_worker
+        ) as executor:
+            rows = self._rows(file, file_format)
+
+            while chunk := list(islice(rows, options["chunk_size"])):
+                read += len(chunk)
+
+                unique_rows = []
+                for email, row in chunk:
+                    if email not in seen:
+                        seen.add(email)
+                        unique_rows.append((email, row))
+
+                passwords = self._hash_passwords(executor, unique_rows)
+                records = [
+                    (email, password, row.get("name") or "")
+                    for (email, row), password in zip(unique_rows, passwords)
+                ]
+                inserted += self._load_chunk(table, records)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f"{read} rows read, {inserted} imported, "
+                    f"{read - inserted} skipped ({read / elapsed:.0f} rows/sec)"
+                )
+
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS user_import")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {inserted} users in {time.perf_counter() - start:.1f}s."
+            )
+        )
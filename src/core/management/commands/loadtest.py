@@ -0,0 +1,102 @@
+from django.core.management import BaseCommand
+from django.test import override_settings
+
+from core.loadtest import (
+    SCENARIOS,
+    create_load_users,
+    delete_load_users,
+    run_scenario,
+    run_scenario_over_network
+)
+
+import asyncio
+import json
+
+
+CHANNEL_LAYERS = {
+    "inprocess": {"default": {"BACKEND": "core.layers.InProcessChannelLayer"}},
+    "inmemory": {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive simulated websocket clients against app.asgi.application and "
+        "report connect rate, message latency, event loop lag and queries as JSON. "
+        "With --url, the clients connect to a running server instead, e.g. "
+        "'manage.py serve --workers N' (with ADMISSION_CONNECT_RATE=0), so runs "
+        "with different worker counts show how throughput scales with cores."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            nargs="+",
+            choices=SCENARIOS.keys(),
+            default=list(SCENARIOS.keys())
+        )
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--concurrency", type=int, default=500,
+                            help="Connections opened at once")
+        parser.add_argument("--rounds", type=int, default=5,
+                            help="Challenge exchanges per pair")
+        parser.add_argument("--moves", type=int, default=20,
+                            help="Moves per arena game")
+        parser.add_argument(
+            "--channel-layer",
+            choices=["inprocess", "inmemory", "settings"],
+            default="inprocess",
+            help="'settings' uses CHANNEL_LAYERS as configured"
+        )
+        parser.add_argument("--url", help="Server to connect to, e.g. ws://127.0.0.1:8000")
+        parser.add_argument("--processes", type=int, default=1,
+                            help="Client processes with --url")
+
+    async def _run(self, options, users, tokens):
+        from app.asgi import application
+
+        return [
+            await run_scenario(
+                application,
+                scenario,
+                users,
+                tokens,
+                concurrency=options["concurrency"],
+                rounds=options["rounds"],
+                moves=options["moves"]
+            )
+            for scenario in options["scenario"]
+        ]
+
+    def _run_over_network(self, options, users, tokens):
+        return [
+            run_scenario_over_network(
+                options["url"],
+                scenario,
+                users,
+                tokens,
+                processes=options["processes"],
+                concurrency=options["concurrency"],
+                rounds=options["rounds"],
+                moves=options["moves"]
+            )
+            for scenario in options["scenario"]
+        ]
+
+    def handle(self, *args, **options):
+        layers = CHANNEL_LAYERS.get(options["channel_layer"])
+        overrides = {"CHANNEL_LAYERS": layers} if layers else {}
+
+        delete_load_users()
+        users, tokens = create_load_users(options["clients"])
+        try:
+            if options["url"]:
+                # The server's channel layer is its own
+                reports = self._run_over_network(options, users, tokens)
+            else:
+                with override_settings(**overrides):
+                    reports = asyncio.run(self._run(options, users, tokens))
+        finally:
+            delete_load_users()
+
+        self.stdout.write(json.dumps(reports, indent=2))
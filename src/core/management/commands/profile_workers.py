@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+import os
+import signal
+
+
+class Command(BaseCommand):
+    help = (
+        "Start a sampling profiler window in running workers, "
+        "by sending them PROFILER_SIGNAL."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("pids", nargs="+", type=int)
+
+    def handle(self, *args, **options):
+        name = getattr(settings, "PROFILER_SIGNAL", None)
+        if not name or not hasattr(signal, name):
+            raise CommandError("PROFILER_SIGNAL isn't set to a signal name.")
+
+        for pid in options["pids"]:
+            try:
+                os.kill(pid, getattr(signal, name))
+            except ProcessLookupError:
+                self.stderr.write(f"No process {pid}")
+                continue
+            self.stdout.write(
+                f"Profiling {pid} for {settings.PROFILER_DURATION}s, "
+                f"writing to {settings.PROFILER_DIR}/profile-{pid}-*.collapsed"
+            )
@@ -0,0 +1,402 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from channels.layers import get_channel_layer
+
+from lobby.channels import is_process_local, worker_channel_prefix
+
+import argparse
+import logging
+import os
+import select
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# A worker exiting sooner than this after starting is restarted after a pause
+MIN_WORKER_UPTIME = 1
+
+# Seconds to wait for a new worker to listen before replacing an old one anyway
+WORKER_START_TIMEOUT = 30
+
+
+def listen(host, port, backlog):
+    """
+    A listening socket other workers can bind to the same address, with
+    the kernel spreading incoming connections between them.
+    """
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def pool_size_per_worker(workers):
+    """
+    Each worker's share of DB_MAX_CONNECTIONS, at most the pool's max_size,
+    or None if the database isn't pooled.
+    """
+
+    pool = settings.DATABASES["default"].get("OPTIONS", {}).get("pool")
+    if not isinstance(pool, dict):
+        return None
+
+    budget = getattr(settings, "DB_MAX_CONNECTIONS", 80)
+    size = budget // workers
+    if size < pool.get("min_size", 1):
+        raise CommandError(
+            f"DB_MAX_CONNECTIONS ({budget}) leaves {size} connections "
+            f"for each of {workers} workers, fewer than the pool's min_size ({pool['min_size']})."
+        )
+    if size < 3:
+        raise CommandError(
+            f"DB_MAX_CONNECTIONS ({budget}) leaves {size} connections for each of "
+            f"{workers} workers, too few for a sync thread and a DB executor thread."
+        )
+    return min(size, pool.get("max_size", size))
+
+
+def threads_per_worker(pool_size):
+    """
+    ASGI_THREADS and DATABASE_EXECUTOR_THREADS for a worker whose pool holds
+    pool_size connections, reduced in proportion so each thread has one.
+    """
+
+    asgi_threads = settings.ASGI_THREADS
+    executor_threads = settings.DATABASE_EXECUTOR_THREADS
+    # One connection is kept for asgiref's thread sensitive thread
+    available = pool_size - 1
+    if asgi_threads + executor_threads <= available:
+        return asgi_threads, executor_threads
+
+    executor_threads = max(1, executor_threads * available // (asgi_threads + executor_threads))
+    return available - executor_threads, executor_threads
+
+
+def _finished(connection):
+    """
+    Whether a daphne connection is closed and its application instance done.
+    """
+
+    instance = connection.get("application_instance")
+    return "disconnected" in connection and (instance is None or instance.done())
+
+
+def run_worker(host, port, backlog, drain_timeout, ready_fd=None, proxy_headers=False):
+    """
+    Serve ASGI_APPLICATION until SIGTERM, then drain: stop accepting,
+    ask websocket clients to reconnect elsewhere, wait up to drain_timeout
+    for them to disconnect and their consumers to clean up, release any
+    seats still held by this worker's channels, and exit.
+
+    Runs the warm-up (core.warmup) before listening, so the first
+    clients aren't the ones opening DB connections and filling caches,
+    and the housekeeping scheduler (core.scheduler) while serving.
+    Once listening, writes to ready_fd (if given) and closes it.
+    """
+
+    # Imported here: daphne.server installs Twisted's asyncio reactor
+    from daphne.server import Server
+    from twisted.internet import reactor
+
+    from channels.routing import get_default_application
+    from arena.models import ArenaRoom
+    from core import memory, metrics
+    from core.consumers import PRODUCER_EXTENSION, drain_connections
+    from core.executor import database_sync_to_async
+    from core.scheduler import get_scheduler
+    from core.warmup import warmup
+    from lobby.token_cache import listen_for_invalidations
+
+    import asyncio
+
+    class DrainingServer(Server):
+
+        draining = False
+
+        def listen_success(self, port):
+            self.ports = getattr(self, "ports", []) + [port]
+            super().listen_success(port)
+
+        def create_application(self, protocol, scope):
+            # Lets consumers wait while the client's socket is backed up
+            if scope.get("type") == "websocket":
+
+                def register_producer(producer):
+                    # Replaces the HTTP channel the connection was upgraded
+                    # from, which doesn't unregister itself
+                    protocol.unregisterProducer()
+                    protocol.registerProducer(producer, True)
+
+                scope.setdefault("extensions", {})[PRODUCER_EXTENSION] = register_producer
+            return super().create_application(protocol, scope)
+
+        def drain(self):
+            if self.draining:
+                return
+            self.draining = True
+            for port in getattr(self, "ports", []):
+                port.stopListening()
+            asyncio.ensure_future(self._drain())
+
+        async def _drain(self):
+            try:
+                if scheduler is not None:
+                    # Lets another worker take over as leader straight away
+                    await scheduler.stop()
+                await drain_connections()
+                # Wait for the consumers' disconnect handlers as well:
+                # stop() cancels any still running, skipping their cleanup
+                deadline = time.monotonic() + drain_timeout
+                while time.monotonic() < deadline and not all(
+                    _finished(details) for details in self.connections.values()
+                ):
+                    await asyncio.sleep(0.1)
+
+                # Seats of connections that didn't get to clean up
+                prefix = worker_channel_prefix(get_channel_layer())
+                if prefix is not None:
+                    try:
+                        await database_sync_to_async(ArenaRoom.objects.release_seats)(prefix)
+                    except Exception:
+                        logger.exception("Releasing this worker's seats failed")
+
+                directory = getattr(settings, "METRICS_DIR", None)
+                if directory:
+                    metrics.write_snapshot(directory)
+            finally:
+                self.stop()
+
+    def ready():
+        if ready_fd is None:
+            return
+        try:
+            os.write(ready_fd, b"1")
+        except BrokenPipeError:
+            # The supervisor isn't waiting on us
+            pass
+        os.close(ready_fd)
+
+    # On its own loop: the reactor's loop is only run by server.run()
+    if not asyncio.run(warmup.run()):
+        logger.warning("Warm-up failed, listening anyway: %s", warmup.status())
+
+    sock = listen(host, port, backlog)
+    server = DrainingServer(
+        # ASGI_APPLICATION, so the settings profile picks the entry point
+        get_default_application(),
+        # The endpoint adopts the socket, closing our descriptor
+        endpoints=[f"fd:fileno={sock.detach()}"],
+        signal_handlers=False,
+        ready_callable=ready,
+        # Behind a proxy, the client address (which admission's rate limit
+        # is keyed on) comes from the headers it sets
+        proxy_forwarded_address_header="X-Forwarded-For" if proxy_headers else None,
+        proxy_forwarded_port_header="X-Forwarded-Port" if proxy_headers else None,
+        proxy_forwarded_proto_header="X-Forwarded-Proto" if proxy_headers else None
+    )
+
+    # Daphne doesn't send lifespan events, which start it under other servers
+    scheduler = get_scheduler() if getattr(settings, "HOUSEKEEPING_SCHEDULER", False) else None
+    if scheduler is not None:
+        reactor.callWhenRunning(lambda: asyncio.ensure_future(scheduler.start()))
+
+    # Lets the other workers relay /debug/memory requests to this one
+    reactor.callWhenRunning(memory.install_signal_handler)
+
+    # Other workers' user saves drop this worker's cached handshake tokens
+    if not is_process_local(get_channel_layer()):
+        reactor.callWhenRunning(lambda: asyncio.ensure_future(listen_for_invalidations()))
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: reactor.callFromThread(server.drain))
+    # Interrupts from a terminal reach the whole process group, the supervisor drains us
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    server.run()
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve ASGI_APPLICATION from several worker processes listening on "
+        "the same port (SO_REUSEPORT), restarting any that exit. "
+        "SIGTERM or SIGINT drains the workers and stops, SIGHUP starts new "
+        "workers then drains the old ones. SIGTERM to a single worker drains "
+        "and replaces it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=getattr(settings, "SERVER_WORKERS", 0),
+            help="Worker processes, 0 for one per CPU"
+        )
+        parser.add_argument("--backlog", type=int, default=1024)
+        parser.add_argument(
+            "--drain-timeout",
+            type=int,
+            default=getattr(settings, "SERVER_DRAIN_TIMEOUT", 30),
+            help="Seconds a draining worker waits for its clients to disconnect"
+        )
+        parser.add_argument(
+            "--proxy-headers",
+            action="store_true",
+            help="Take client addresses from X-Forwarded-For, only behind a proxy that sets it"
+        )
+        parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+        parser.add_argument("--ready-fd", type=int, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options["worker"]:
+            run_worker(
+                options["host"],
+                options["port"],
+                options["backlog"],
+                options["drain_timeout"],
+                options["ready_fd"],
+                options["proxy_headers"]
+            )
+            return
+
+        if not hasattr(socket, "SO_REUSEPORT"):
+            raise CommandError("SO_REUSEPORT isn't supported on this platform.")
+
+        self.options = options
+        self.workers = {}
+        self.retiring = []
+        self.stopping = False
+        self.reloading = False
+
+        count = options["workers"] or os.cpu_count()
+        self.pool_size = pool_size_per_worker(count)
+        if count > 1 and is_process_local(get_channel_layer()):
+            self.stderr.write(
+                "The channel layer is process-local: lobby and arena messages "
+                "won't reach clients connected to other workers."
+            )
+
+        # Bound here first so a port in use fails before any worker starts
+        listen(options["host"], options["port"], options["backlog"]).close()
+
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        signal.signal(signal.SIGHUP, self._reload)
+
+        for ready_read in [self._spawn()[1] for _ in range(count)]:
+            self._wait_ready(ready_read)
+        self.stdout.write(
+            f"Serving on {options['host']}:{options['port']} with {count} workers "
+            f"(pid {os.getpid()})"
+        )
+
+        while not self.stopping:
+            time.sleep(0.2)
+            if self.reloading:
+                self.reloading = False
+                self._replace_workers()
+            self._reap()
+
+        self._shutdown()
+
+    def _stop(self, signum, frame):
+        self.stopping = True
+
+    def _reload(self, signum, frame):
+        self.reloading = True
+
+    def _spawn(self):
+        """
+        Start a worker, returning its process and a
+        descriptor that becomes readable once it's listening.
+        """
+
+        options = self.options
+        env = dict(os.environ)
+        if self.pool_size is not None:
+            env["DB_POOL_MAX_SIZE"] = str(self.pool_size)
+            # Without this, calls beyond the pool's size wait on it and end in
+            # PoolTimeout, rather than the executor's ExecutorQueueFullException
+            asgi_threads, executor_threads = threads_per_worker(self.pool_size)
+            env["ASGI_THREADS"] = str(asgi_threads)
+            env["DATABASE_EXECUTOR_THREADS"] = str(executor_threads)
+
+        ready_read, ready_write = os.pipe()
+        process = subprocess.Popen([
+            sys.executable,
+            str(settings.BASE_DIR / "manage.py"),
+            "serve",
+            "--worker",
+            "--host", options["host"],
+            "--port", str(options["port"]),
+            "--backlog", str(options["backlog"]),
+            "--drain-timeout", str(options["drain_timeout"]),
+            "--ready-fd", str(ready_write),
+            *(["--proxy-headers"] if options["proxy_headers"] else [])
+        ], pass_fds=(ready_write,), env=env)
+        os.close(ready_write)
+        self.workers[process] = time.monotonic()
+        return process, ready_read
+
+    def _wait_ready(self, ready_read):
+        """
+        Wait for a worker to listen. A worker exiting first
+        closes the pipe, which ends the wait too.
+        """
+
+        try:
+            select.select([ready_read], [], [], WORKER_START_TIMEOUT)
+        finally:
+            os.close(ready_read)
+
+    def _reap(self):
+        self.retiring = [process for process in self.retiring if process.poll() is None]
+
+        for process, started in list(self.workers.items()):
+            if process.poll() is None:
+                continue
+
+            del self.workers[process]
+            self.stderr.write(f"Worker {process.pid} exited with {process.returncode}, restarting")
+            if time.monotonic() - started < MIN_WORKER_UPTIME:
+                # Crashing on start, don't restart it in a tight loop
+                time.sleep(MIN_WORKER_UPTIME)
+            os.close(self._spawn()[1])
+
+    def _replace_workers(self):
+        """
+        Start a new set of workers, and drain the old ones
+        once the new ones are accepting connections.
+        """
+
+        old = list(self.workers)
+        for process in old:
+            del self.workers[process]
+
+        for ready_read in [self._spawn()[1] for _ in old]:
+            self._wait_ready(ready_read)
+
+        for process in old:
+            process.terminate()
+        self.retiring += old
+
+    def _shutdown(self):
+        processes = list(self.workers) + self.retiring
+        for process in processes:
+            process.terminate()
+
+        deadline = time.monotonic() + self.options["drain_timeout"] + 5
+        for process in processes:
+            try:
+                process.wait(max(0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                self.stderr.write(f"Worker {process.pid} didn't drain in time, killing it")
+                process.kill()
+                process.wait()
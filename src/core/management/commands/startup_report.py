@@ -0,0 +1,20 @@
+from django.core.management import BaseCommand
+
+from core.startup import report
+
+import json
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the combined (app.asgi) and websocket-only (app.asgi_ws) entry "
+        "points in fresh interpreters, and report their startup time, RSS and "
+        "import time per package as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=15,
+                            help="Slowest packages to list per entry point")
+
+    def handle(self, *args, **options):
+        self.stdout.write(json.dumps(report(top=options["top"]), indent=2))
@@ -0,0 +1,242 @@
+from django.conf import settings
+from channels.layers import get_channel_layer
+
+from core import metrics
+
+import asyncio
+import atexit
+import json
+import os
+import signal
+import time
+import tracemalloc
+import uuid
+
+
+# Allocations made by tracemalloc itself and by imports aren't of interest
+_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+)
+
+_baseline = None
+
+
+def live_connections():
+    """
+    Open websocket connections in this worker, by consumer.
+    """
+
+    return {
+        labels[0]: count
+        for labels, count in metrics.connections_open.values.items()
+        if count
+    }
+
+
+def start(frames=1):
+    """
+    Start tracing allocations, which slows allocation down until stop().
+    """
+
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop():
+    global _baseline
+
+    _baseline = None
+    tracemalloc.stop()
+
+
+def take_snapshot():
+    """
+    Keep a snapshot for later reports to be compared against.
+    """
+
+    global _baseline
+
+    start()
+    _baseline = {
+        "snapshot": tracemalloc.take_snapshot().filter_traces(_FILTERS),
+        "connections": sum(live_connections().values()),
+        "time": time.monotonic()
+    }
+
+
+def report(group_by="filename", limit=20):
+    """
+    Traced memory, grouped by module ('filename') or line ('lineno'), with
+    live connections and the bytes per connection they suggest.
+
+    After take_snapshot(), sizes are the differences since that snapshot,
+    and bytes per connection is the growth divided by the connections added.
+    """
+
+    connections = live_connections()
+    total_connections = sum(connections.values())
+    result = {
+        "tracing": tracemalloc.is_tracing(),
+        "connections": connections
+    }
+
+    layer = get_channel_layer()
+    if hasattr(layer, "stats"):
+        result["channel_layer"] = layer.stats()
+
+    if not tracemalloc.is_tracing():
+        return result
+
+    traced, peak = tracemalloc.get_traced_memory()
+    result.update({
+        "traced_bytes": traced,
+        "peak_bytes": peak,
+        "bytes_per_connection": traced // total_connections if total_connections else None
+    })
+
+    current = tracemalloc.take_snapshot().filter_traces(_FILTERS)
+
+    if _baseline is None:
+        result["top"] = [
+            {"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+            for stat in current.statistics(group_by)[:limit]
+        ]
+        return result
+
+    stats = current.compare_to(_baseline["snapshot"], group_by)
+    added_connections = total_connections - _baseline["connections"]
+    growth = sum(stat.size_diff for stat in stats)
+
+    result.update({
+        "seconds_since_snapshot": round(time.monotonic() - _baseline["time"], 1),
+        "size_diff": growth,
+        "connections_added": added_connections,
+        "bytes_per_connection_added": growth // added_connections if added_connections > 0 else None,
+        "diff": [
+            {
+                "location": str(stat.traceback),
+                "size_diff": stat.size_diff,
+                "size": stat.size,
+                "count_diff": stat.count_diff
+            }
+            for stat in stats[:limit]
+        ]
+    })
+    return result
+
+
+ACTIONS = {"start": start, "snapshot": take_snapshot, "stop": stop}
+
+
+def handle(action=None, group_by="filename"):
+    """
+    Run action (start, snapshot or stop) if given, and report.
+    """
+
+    if action is not None:
+        ACTIONS[action]()
+    return dict(report(group_by=group_by), pid=os.getpid())
+
+
+# Another worker's memory, through files in METRICS_DIR: the request is
+# written to memory-request-<pid>.json, the worker is sent MEMORY_SIGNAL,
+# and answers in memory-<pid>.json. Only serve's workers handle the signal,
+# and memory-<pid>.json exists while they do.
+
+def _path(directory, name, pid):
+    return os.path.join(directory, f"{name}-{pid}.json")
+
+
+def _write_json(path, data):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def _signal():
+    name = getattr(settings, "MEMORY_SIGNAL", None)
+    return getattr(signal, name) if name and hasattr(signal, name) else None
+
+
+def _answer_request():
+    directory = settings.METRICS_DIR
+    pid = os.getpid()
+    try:
+        with open(_path(directory, "memory-request", pid)) as f:
+            request = json.load(f)
+    except (OSError, ValueError):
+        return
+    _write_json(
+        _path(directory, "memory", pid),
+        {"id": request["id"], "report": handle(request["action"], request["group_by"])}
+    )
+
+
+def _remove_files(directory, pid):
+    for name in ("memory", "memory-request"):
+        try:
+            os.remove(_path(directory, name, pid))
+        except FileNotFoundError:
+            pass
+
+
+def install_signal_handler():
+    """
+    Answer other workers' requests when the process receives MEMORY_SIGNAL,
+    for serve's workers, from the main thread and with METRICS_DIR set.
+
+    The signal only wakes the event loop, which takes the snapshot and
+    writes the answer, outside the signal handler's interrupted frame.
+    """
+
+    directory = getattr(settings, "METRICS_DIR", None)
+    signum = _signal()
+    if signum is None or not directory:
+        return
+
+    asyncio.get_event_loop().add_signal_handler(signum, _answer_request)
+    # Tells request() the signal is handled here, rather than fatal
+    os.makedirs(directory, exist_ok=True)
+    _write_json(_path(directory, "memory", os.getpid()), {"id": None})
+    atexit.register(_remove_files, directory, os.getpid())
+
+
+def request(pid, action=None, group_by="filename", timeout=5):
+    """
+    handle() in the worker with the given pid, returning its report.
+
+    Raises ProcessLookupError if there's no such process, or it doesn't
+    handle MEMORY_SIGNAL (by default the signal would kill it), and
+    TimeoutError if it doesn't answer within timeout seconds.
+    """
+
+    directory = settings.METRICS_DIR
+    if not os.path.exists(_path(directory, "memory", pid)):
+        raise ProcessLookupError(f"No worker {pid} handling {settings.MEMORY_SIGNAL}")
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        # Left by a worker that was killed before it could remove it
+        _remove_files(directory, pid)
+        raise
+
+    request_id = uuid.uuid4().hex
+    _write_json(
+        _path(directory, "memory-request", pid),
+        {"id": request_id, "action": action, "group_by": group_by}
+    )
+    os.kill(pid, _signal())
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with open(_path(directory, "memory", pid)) as f:
+                answer = json.load(f)
+        except (OSError, ValueError):
+            answer = None
+        if answer is not None and answer["id"] == request_id:
+            return answer["report"]
+        time.sleep(0.05)
+    raise TimeoutError(f"Worker {pid} didn't answer within {timeout}s")
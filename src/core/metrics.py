@@ -0,0 +1,346 @@
+from django.conf import settings
+
+from bisect import bisect_left
+from threading import Thread, Lock
+
+import fcntl
+import glob
+import json
+import os
+import time
+
+
+# Seconds, suited to websocket handlers: sub-millisecond to a few seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0
+)
+
+
+class Metric:
+    """
+    Values per label set, held by this process only.
+
+    Written from the event loop, the DB executor's and sync views' threads,
+    and collectors in the flush thread, so every access takes the lock.
+    """
+
+    type = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self._lock = Lock()
+        registry.register(self)
+
+    def _copy(self, value):
+        return value
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(labels), self._copy(value)] for labels, value in self.values.items()]
+        return {
+            "type": self.type,
+            "help": self.help,
+            "labelnames": self.labelnames,
+            "samples": samples
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, *labels, value):
+        with self._lock:
+            self.values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed buckets, plus their sum and count.
+    Values are [count per bucket..., count over the last bucket, sum].
+    """
+
+    type = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value):
+        with self._lock:
+            counts = self.values.get(labels)
+            if counts is None:
+                counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[bisect_left(self.buckets, value)] += 1
+            counts[-1] += value
+
+    def _copy(self, value):
+        return list(value)
+
+    def snapshot(self):
+        snapshot = super().snapshot()
+        snapshot["buckets"] = self.buckets
+        return snapshot
+
+
+class Registry:
+    """
+    This process's metrics, and collectors that update
+    gauges from other sources just before a snapshot.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.collectors = []
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+
+    def register_collector(self, collector):
+        self.collectors.append(collector)
+
+    def snapshot(self):
+        for collector in self.collectors:
+            collector()
+        return {
+            "pid": os.getpid(),
+            "metrics": {name: metric.snapshot() for name, metric in list(self.metrics.items())}
+        }
+
+
+registry = Registry()
+
+
+# Metrics files from several worker processes
+
+# Counts of workers that have exited, folded together
+RETIRED = "retired"
+
+
+def _metrics_path(directory, pid):
+    return os.path.join(directory, f"metrics-{pid}.json")
+
+
+def _write_json(path, data):
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_snapshot(directory):
+    """
+    Write this process's metrics where the other workers can read them.
+    """
+
+    _write_json(_metrics_path(directory, os.getpid()), registry.snapshot())
+
+
+def _is_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _merge(merged, snapshot, live):
+    for name, metric in snapshot["metrics"].items():
+        # Gauges describe current state, which ends with the process
+        if metric["type"] == "gauge" and not live:
+            continue
+
+        target = merged.setdefault(name, dict(metric, samples={}))
+        for labels, value in metric["samples"]:
+            key = tuple(labels)
+            if metric["type"] == "histogram":
+                current = target["samples"].get(key) or [0] * len(value)
+                target["samples"][key] = [a + b for a, b in zip(current, value)]
+            else:
+                target["samples"][key] = target["samples"].get(key, 0) + value
+
+
+def _read_snapshots(directory):
+    snapshots = {}
+    for path in glob.glob(_metrics_path(directory, "*")):
+        try:
+            with open(path) as f:
+                snapshots[path] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return snapshots
+
+
+def _retire(directory, snapshots):
+    """
+    Fold the counters and histograms of workers that have exited into
+    the RETIRED file and remove their files, so totals don't drop while
+    the directory doesn't keep growing with every restart.
+    """
+
+    retired_path = _metrics_path(directory, RETIRED)
+    exited = [
+        path for path, snapshot in snapshots.items()
+        if path != retired_path and not _is_alive(snapshot["pid"])
+    ]
+    if not exited:
+        return
+
+    retired = {}
+    for path in [retired_path, *exited]:
+        if path in snapshots:
+            _merge(retired, snapshots.pop(path), live=False)
+    for metric in retired.values():
+        metric["samples"] = [[list(labels), value] for labels, value in metric["samples"].items()]
+
+    snapshots[retired_path] = {"pid": None, "metrics": retired}
+    _write_json(retired_path, snapshots[retired_path])
+    for path in exited:
+        os.remove(path)
+
+
+def collect():
+    """
+    Metrics summed across worker processes if METRICS_DIR is set,
+    or this process's metrics otherwise.
+    """
+
+    directory = getattr(settings, "METRICS_DIR", None)
+    merged = {}
+
+    if not directory:
+        _merge(merged, registry.snapshot(), live=True)
+        return merged
+
+    os.makedirs(directory, exist_ok=True)
+    write_snapshot(directory)
+    # Workers serving /metrics at once would retire the same files twice
+    with open(os.path.join(directory, "metrics.lock"), "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        snapshots = _read_snapshots(directory)
+        _retire(directory, snapshots)
+
+    for snapshot in snapshots.values():
+        _merge(merged, snapshot, live=snapshot["pid"] is not None)
+    return merged
+
+
+def _format_labels(labelnames, labels, extra=()):
+    pairs = list(zip(labelnames, labels)) + list(extra)
+    if not pairs:
+        return ""
+    return "{%s}" % ",".join(
+        '%s="%s"' % (name, str(value).replace("\\", "\\\\").replace('"', '\\"'))
+        for name, value in pairs
+    )
+
+
+def render(metrics):
+    """
+    Metrics in the Prometheus text exposition format.
+    """
+
+    lines = []
+    for name, metric in sorted(metrics.items()):
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        labelnames = metric["labelnames"]
+
+        for labels, value in sorted(metric["samples"].items()):
+            if metric["type"] != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {value}")
+                continue
+
+            cumulative = 0
+            bounds = [str(bound) for bound in metric["buckets"]] + ["+Inf"]
+            for bound, count in zip(bounds, value[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels(labelnames, labels, [("le", bound)])
+                lines.append(f"{name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {value[-1]}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
+
+
+_flusher = None
+_flusher_lock = Lock()
+
+
+def _flush_forever(directory, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            write_snapshot(directory)
+        except OSError:
+            # Directory gone, next round
+            continue
+
+
+def start_flusher():
+    """
+    Write this process's metrics to METRICS_DIR every
+    METRICS_FLUSH_INTERVAL seconds, so other workers can serve them.
+    """
+
+    global _flusher
+
+    directory = getattr(settings, "METRICS_DIR", None)
+    if not directory or _flusher is not None:
+        return
+
+    with _flusher_lock:
+        if _flusher is None:
+            os.makedirs(directory, exist_ok=True)
+            _flusher = Thread(
+                target=_flush_forever,
+                args=(directory, getattr(settings, "METRICS_FLUSH_INTERVAL", 5)),
+                name="metrics-flusher",
+                daemon=True
+            )
+            _flusher.start()
+
+
+# Websocket metrics
+
+handler_seconds = Histogram(
+    "websocket_handler_seconds",
+    "Time spent in consumer handlers",
+    ("consumer", "handler")
+)
+
+handshake_seconds = Histogram(
+    "websocket_handshake_seconds",
+    "Time spent resolving the user during the websocket handshake",
+    ("middleware",)
+)
+
+connections_open = Gauge(
+    "websocket_connections",
+    "Open websocket connections",
+    ("consumer",)
+)
+
+connections_total = Counter(
+    "websocket_connections_total",
+    "Websocket connections accepted",
+    ("consumer",)
+)
@@ -0,0 +1,38 @@
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from core import queries
+
+
+class QueryAccountingMiddleware:
+    """
+    Accounts queries made while handling a request to its view,
+    by URL name (e.g. 'authenticate:sign-up'), see core.queries.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        with queries.accounting(None) as account:
+            response = self.get_response(request)
+            self._name_account(account, request)
+        return response
+
+    async def __acall__(self, request):
+        with queries.accounting(None) as account:
+            response = await self.get_response(request)
+            self._name_account(account, request)
+        return response
+
+    def _name_account(self, account, request):
+        match = request.resolver_match
+        if account is not None and match is not None:
+            account.name = match.view_name
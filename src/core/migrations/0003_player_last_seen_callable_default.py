@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 11:12
+
+import common.models.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_alter_player_last_seen'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='player',
+            name='last_seen',
+            field=models.DateTimeField(default=common.models.utils.current_datetime),
+        ),
+    ]
@@ -1,5 +1,6 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.utils import timezone
 from django.contrib.auth.models import User
 from django.contrib.auth import get_user_model
 from core.exceptions import RoomNotFoundException
@@ -113,8 +114,6 @@ class Room(models.Model):
         if age is None:
             age = getattr(settings, "PLAYER_MAX_AGE", 60)
 
-        print("'now()' in prune_players:", datetime.now())
-
         Player.objects.filter(
             room=self, 
             last_seen__lt=datetime.now() - timedelta(seconds=age)
@@ -150,6 +149,51 @@ class PlayerManager(models.Manager):
         for player in self.select_related("room").filter(channel_name=channel_name):
             room = player.room
             room.remove_player(channel_name)
+
+    def prune_in_chunks(self, age=None, chunk_size=None, on_chunk=None):
+        """
+        Delete players not seen for age seconds, paging through them by id
+        and committing each chunk, so a large backlog doesn't hold one long
+        transaction. on_chunk(rows, chunks) is called after each commit.
+
+        Returns the players deleted, chunks committed and the lag: how many
+        seconds the oldest of them was overdue when the prune started.
+        """
+
+        if age is None:
+            age = getattr(settings, "PLAYER_MAX_AGE", 60)
+        if chunk_size is None:
+            chunk_size = getattr(settings, "HOUSEKEEPING_CHUNK_SIZE", 1000)
+
+        cutoff = datetime.now() - timedelta(seconds=age)
+        stale = self.filter(last_seen__lt=cutoff)
+        oldest = stale.aggregate(oldest=models.Min("last_seen"))["oldest"]
+        if oldest is None:
+            return 0, 0, 0.0
+        if timezone.is_aware(oldest):
+            # Filtered with a naive now(), as in prune_players
+            oldest = timezone.make_naive(oldest)
+        lag = (cutoff - oldest).total_seconds()
+
+        rows = chunks = last_id = 0
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    stale.filter(id__gt=last_id)
+                    .order_by("id")
+                    .values_list("id", flat=True)[:chunk_size]
+                )
+                if not ids:
+                    break
+                _, deleted = stale.filter(id__in=ids).delete()
+
+            last_id = ids[-1]
+            rows += deleted.get(self.model._meta.label, 0)
+            chunks += 1
+            if on_chunk is not None:
+                on_chunk(rows, chunks)
+
+        return rows, chunks, lag
     
     def get_or_create(self, *args, **kwargs):
         """
@@ -189,7 +233,7 @@ class Player(models.Model):
     auth_user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.CASCADE)
     room = models.ForeignKey("Room", on_delete=models.CASCADE)
     channel_name = models.CharField(max_length=255, help_text="Channel name for connected player")
-    last_seen = models.DateTimeField(default=current_datetime())
+    last_seen = models.DateTimeField(default=current_datetime)
 
     def __str__(self):
         return self.auth_user.email
@@ -212,6 +256,22 @@ class UserManager(BaseUserManager):
 
         return user
     
+    def create_user_with_password_hash(self, email: str, password_hash: str, **extra_fields):
+        """
+        Create a regular user from an already hashed password,
+        e.g. one hashed off-process by authenticate.hashing.
+        """
+
+        if not email:
+            raise ValueError("Please provide an email address.")
+
+        user = self.model(
+            email=self.normalize_email(email), password=password_hash, **extra_fields
+        )
+        user.save(using=self.db)
+
+        return user
+    
     def create_superuser(self, email: str, password: str = None, **extra_fields):
         """Create superuser with staff and superuser status."""
 
@@ -0,0 +1,139 @@
+from django.conf import settings
+
+from collections import Counter
+from threading import Thread, Event, Lock, enumerate as enumerate_threads, main_thread
+
+import os
+import signal
+import sys
+import time
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of the event loop thread and the DB executor threads
+    for a bounded window, then writes them in collapsed-stack format
+    (one 'thread;outer;...;inner count' line per stack), as read by
+    flamegraph.pl and speedscope.
+
+    Sampling runs on its own thread and costs one sys._current_frames()
+    call per interval, so it's fine to leave running against live traffic.
+    """
+
+    thread_prefixes = ("db-executor",)
+
+    def __init__(self, interval=0.01, duration=30, output_dir="/tmp"):
+        self.interval = interval
+        self.duration = duration
+        self.output_dir = output_dir
+        self.loop_thread_id = main_thread().ident
+        self.samples = Counter()
+        self.output_path = None
+        self._stop = Event()
+        self._thread = None
+        self._lock = Lock()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """
+        Start a profiling window, unless one is already running.
+        Returns the path the profile will be written to, or None.
+        """
+
+        with self._lock:
+            if self.running:
+                return None
+
+            self.samples = Counter()
+            self._stop.clear()
+            self.output_path = os.path.join(
+                self.output_dir,
+                f"profile-{os.getpid()}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+            )
+            self._thread = Thread(target=self._run, name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return self.output_path
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _thread_names(self):
+        names = {}
+        for thread in enumerate_threads():
+            if thread.ident == self.loop_thread_id:
+                names[thread.ident] = "event-loop"
+            elif thread.name.startswith(self.thread_prefixes):
+                # Executor threads merged into one flame
+                names[thread.ident] = thread.name.split("_")[0]
+        return names
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ";".join(reversed(stack))
+
+    def _run(self):
+        deadline = time.monotonic() + self.duration
+        names = self._thread_names()
+        next_refresh = time.monotonic() + 1
+
+        while not self._stop.wait(self.interval) and time.monotonic() < deadline:
+            if time.monotonic() >= next_refresh:
+                names = self._thread_names()
+                next_refresh = time.monotonic() + 1
+
+            for thread_id, frame in sys._current_frames().items():
+                name = names.get(thread_id)
+                if name is not None:
+                    self.samples[f"{name};{self._collapse(frame)}"] += 1
+
+        self._write()
+
+    def _write(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        with open(self.output_path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+_profiler = None
+
+
+def get_profiler():
+    global _profiler
+
+    if _profiler is None:
+        _profiler = SamplingProfiler(
+            interval=1 / getattr(settings, "PROFILER_SAMPLE_RATE", 100),
+            duration=getattr(settings, "PROFILER_DURATION", 30),
+            output_dir=getattr(settings, "PROFILER_DIR", "/tmp")
+        )
+    return _profiler
+
+
+def _handle_signal(signum, frame):
+    get_profiler().start()
+
+
+def install_signal_handler():
+    """
+    Start a profiling window when the process receives PROFILER_SIGNAL.
+    Only possible from the main thread.
+    """
+
+    name = getattr(settings, "PROFILER_SIGNAL", None)
+    if name and hasattr(signal, name):
+        try:
+            signal.signal(getattr(signal, name), _handle_signal)
+        except ValueError:
+            # Not the main thread, e.g. set up from a test runner's worker
+            pass
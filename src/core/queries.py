@@ -0,0 +1,135 @@
+from django.conf import settings
+
+from core import metrics
+
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock
+
+import logging
+import random
+import time
+
+
+logger = logging.getLogger(__name__)
+
+_account = ContextVar("query_account", default=None)
+
+# Most recent budget breaches, for tests and debugging
+breaches = deque(maxlen=100)
+
+handler_queries = metrics.Histogram(
+    "handler_queries",
+    "Queries made per websocket event or HTTP view, sampled",
+    ("handler",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+)
+
+handler_db_seconds = metrics.Histogram(
+    "handler_db_seconds",
+    "DB time per websocket event or HTTP view, sampled",
+    ("handler",)
+)
+
+budget_breaches = metrics.Counter(
+    "query_budget_breaches_total",
+    "Sampled handler runs over their QUERY_BUDGETS entry",
+    ("handler",)
+)
+
+
+class QueryAccount:
+    """
+    Queries and DB time attributed to one run of a handler,
+    from whichever thread the queries are made on.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.queries = 0
+        self.seconds = 0.0
+        self._lock = Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+
+
+def account_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper charging the query to the active account, if any.
+    Installed on every connection by the core app.
+    """
+
+    account = _account.get()
+    if account is None:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        account.add(time.perf_counter() - start)
+
+
+def install(sender, connection, **kwargs):
+    if account_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(account_queries)
+
+
+def check_budget(account):
+    """
+    Record the account's queries, and flag it if it's over
+    the handler's budget in QUERY_BUDGETS.
+    """
+
+    handler_queries.observe(account.name, value=account.queries)
+    handler_db_seconds.observe(account.name, value=account.seconds)
+
+    budget = getattr(settings, "QUERY_BUDGETS", {}).get(account.name)
+    if budget is None:
+        return True
+
+    db_ms = account.seconds * 1000
+    if account.queries <= budget.get("queries", account.queries) and \
+            db_ms <= budget.get("db_ms", db_ms):
+        return True
+
+    budget_breaches.inc(account.name)
+    breaches.append({
+        "handler": account.name,
+        "queries": account.queries,
+        "db_ms": round(db_ms, 3),
+        "budget": budget
+    })
+    logger.warning(
+        "%s over its query budget: %s queries, %.1fms DB time (budget %s)",
+        account.name, account.queries, db_ms, budget
+    )
+    return False
+
+
+@contextmanager
+def accounting(name):
+    """
+    Attribute queries made within the block, including those on
+    database_sync_to_async threads, to the named handler.
+
+    Only a QUERY_ACCOUNTING_SAMPLE_RATE fraction of runs is accounted.
+    The name can be set later, on the yielded account.
+    """
+
+    if random.random() >= getattr(settings, "QUERY_ACCOUNTING_SAMPLE_RATE", 0.01):
+        yield None
+        return
+
+    account = QueryAccount(name)
+    token = _account.set(account)
+    try:
+        yield account
+    finally:
+        _account.reset(token)
+        if account.name is not None:
+            check_budget(account)
@@ -0,0 +1,31 @@
+from core.models import Player
+from django.db.models import Q
+
+
+def roster(room, current_user_email):
+    """
+    A room's players in the order they joined, without the requesting user.
+    """
+
+    return Player.objects.filter(
+        ~Q(auth_user__email=current_user_email), room=room
+    ).order_by("id")
+
+
+def serialize_room(room, current_user_email=None):
+    """
+    The output of core.serializers.RoomSerializer(room, current_user_email=...).data,
+    for websocket payloads, without importing DRF.
+
+    Fetches only the players' emails with values_list and builds the
+    dicts directly, instead of loading a Player and User instance per
+    player and running them through DRF's fields.
+    """
+
+    emails = roster(room, current_user_email).values_list("auth_user__email", flat=True)
+    return {
+        "room_name": room.room_name,
+        "players": [
+            {"user": None if email is None else {"email": email}} for email in emails
+        ]
+    }
@@ -0,0 +1,198 @@
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core import metrics
+from core.executor import database_sync_to_async
+from core.locks import get_lock
+
+import asyncio
+import logging
+import random
+import time
+
+
+logger = logging.getLogger(__name__)
+
+job_duration_seconds = metrics.Histogram(
+    "scheduled_job_duration_seconds",
+    "Run time of housekeeping jobs run by this worker's scheduler",
+    ("job",),
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60)
+)
+
+job_runs = metrics.Counter(
+    "scheduled_job_runs_total",
+    "Housekeeping job runs by outcome: ok, failed, or skipped while still running",
+    ("job", "outcome")
+)
+
+
+class Job:
+    """
+    A function run every interval seconds, give or take jitter
+    (a fraction of the interval), with its run times recorded.
+    """
+
+    def __init__(self, name, function, interval, jitter=0.1):
+        self.name = name
+        self.function = function
+        self.interval = interval
+        self.jitter = jitter
+        self.running = False
+        self.runs = 0
+        self.failures = 0
+        self.skipped = 0
+        self.last_duration = None
+        self.max_duration = 0.0
+        self.total_duration = 0.0
+
+    def next_delay(self):
+        return self.interval * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def record(self, duration, failed=False):
+        self.runs += 1
+        self.failures += failed
+        self.last_duration = duration
+        self.max_duration = max(self.max_duration, duration)
+        self.total_duration += duration
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "last_duration": self.last_duration,
+            "max_duration": self.max_duration,
+            "avg_duration": self.total_duration / self.runs if self.runs else 0.0
+        }
+
+
+class Scheduler:
+    """
+    Runs housekeeping jobs in the event loop of an ASGI worker,
+    in place of Celery beat.
+
+    Workers elect a leader by taking the 'scheduler.leader' lock, and only
+    the leader runs jobs. The others keep trying to take the lock, so one of
+    them takes over if the leader goes away.
+
+    A job still running when it's next due is skipped rather than stacked.
+    """
+
+    lock_name = "scheduler.leader"
+
+    def __init__(self):
+        self.jobs = {}
+        self.is_leader = False
+        self._lock = None
+        self._tasks = []
+        self._runs = set()
+
+    def add_job(self, name, function, interval, jitter=0.1):
+        self.jobs[name] = Job(name, function, interval, jitter)
+
+    async def start(self):
+        self._lock = get_lock(self.lock_name)
+        self._tasks = [
+            asyncio.ensure_future(self._schedule(job)) for job in self.jobs.values()
+        ]
+
+    async def stop(self):
+        for task in self._tasks + list(self._runs):
+            task.cancel()
+        await asyncio.gather(*self._tasks, *self._runs, return_exceptions=True)
+        self._tasks = []
+
+        if self._lock is not None:
+            await database_sync_to_async(self._lock.release)()
+        self.is_leader = False
+
+    async def _elect(self):
+        try:
+            self.is_leader = await database_sync_to_async(self._lock.acquire)()
+        except Exception:
+            logger.exception("Scheduler leader election failed")
+            self.is_leader = False
+        return self.is_leader
+
+    async def _schedule(self, job):
+        while True:
+            await asyncio.sleep(job.next_delay())
+
+            if not await self._elect():
+                continue
+
+            if job.running:
+                job.skipped += 1
+                job_runs.inc(job.name, "skipped")
+                logger.warning("Job %s still running, skipped", job.name)
+                continue
+
+            run = asyncio.ensure_future(self._run(job))
+            self._runs.add(run)
+            run.add_done_callback(self._runs.discard)
+
+    async def _run(self, job):
+        job.running = True
+        start = time.perf_counter()
+        failed = False
+        try:
+            await database_sync_to_async(job.function)()
+        except Exception:
+            failed = True
+            logger.exception("Job %s failed", job.name)
+        finally:
+            duration = time.perf_counter() - start
+            job.running = False
+            job.record(duration, failed)
+            job_duration_seconds.observe(job.name, value=duration)
+            job_runs.inc(job.name, "failed" if failed else "ok")
+
+    def stats(self):
+        return {
+            "leader": self.is_leader,
+            "jobs": {name: job.stats() for name, job in self.jobs.items()}
+        }
+
+
+def get_scheduler():
+    """
+    Return a scheduler with the jobs in SCHEDULED_JOBS.
+    """
+
+    scheduler = Scheduler()
+    for name, job in getattr(settings, "SCHEDULED_JOBS", {}).items():
+        scheduler.add_job(
+            name,
+            import_string(job["function"]),
+            job["schedule"].total_seconds(),
+            job.get("jitter", 0.1)
+        )
+    return scheduler
+
+
+class LifespanApp:
+    """
+    ASGI lifespan handler starting the scheduler with the server
+    and stopping it on shutdown.
+    """
+
+    def __init__(self, scheduler):
+        self.scheduler = scheduler
+
+    async def __call__(self, scope, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await self.scheduler.start()
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.scheduler.stop()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
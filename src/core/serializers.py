@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from core.models import Room, Player, User
-from django.db.models import Q
+from core.rosters import roster
 
 
 class AuthUserSerializer(serializers.ModelSerializer):
@@ -27,13 +27,13 @@ class RoomSerializer(serializers.ModelSerializer):
 
     players = serializers.SerializerMethodField()
 
-    def get_players(self, _):
-    
-        qs = Player.objects.filter(~Q(auth_user__email=self.current_user_email))
-        print("GETTING THESE PLAYERS:", qs)
+    def get_players(self, room):
+
+        qs = roster(room, self.current_user_email)
         serializer = PlayerSerializer(qs, many=True)
         return serializer.data
 
     class Meta:
         model = Room
         fields = ["room_name", "players"]
+
@@ -0,0 +1,117 @@
+from django.conf import settings
+
+from collections import defaultdict
+
+import json
+import os
+import subprocess
+import sys
+
+
+# Name -> (settings module, ASGI module)
+ENTRY_POINTS = {
+    "combined": ("app.settings", "app.asgi"),
+    "lean": ("app.settings_ws", "app.asgi_ws")
+}
+
+# Run in a fresh interpreter: import the entry point, then load the URLconf,
+# which a worker would otherwise do on its first HTTP request
+_PROBE = """
+import importlib, json, sys, time
+
+start = time.perf_counter()
+importlib.import_module(sys.argv[1])
+from django.urls import get_resolver
+get_resolver().url_patterns
+seconds = time.perf_counter() - start
+
+with open("/proc/self/status") as f:
+    rss = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmRSS:"))
+print(json.dumps({"seconds": seconds, "rss_bytes": rss, "modules": sorted(sys.modules)}))
+"""
+
+
+def _package(module):
+    """
+    The package an import is attributed to: the top-level package,
+    or the app for django.contrib modules.
+    """
+
+    parts = module.split(".")
+    if parts[:2] == ["django", "contrib"] and len(parts) > 2:
+        return ".".join(parts[:3])
+    return parts[0]
+
+
+def import_times(importtime_output):
+    """
+    Seconds spent importing each package, from python -X importtime output.
+    Only each module's own time is summed, so nested imports aren't counted twice.
+    """
+
+    totals = defaultdict(int)
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        own, _, module = line[len("import time:"):].split("|")
+        if own.strip().isdigit():
+            totals[_package(module.strip())] += int(own)
+    return {package: microseconds / 1e6 for package, microseconds in totals.items()}
+
+
+def measure(entry_point):
+    """
+    Start an entry point in a new interpreter and report its
+    boot time, RSS after boot, and import time per package.
+    """
+
+    settings_module, asgi_module = ENTRY_POINTS[entry_point]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE, asgi_module],
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings_module},
+        cwd=settings.BASE_DIR,
+        capture_output=True,
+        text=True,
+        check=True
+    )
+    probe = json.loads(result.stdout.splitlines()[-1])
+    return {
+        "settings": settings_module,
+        "application": f"{asgi_module}.application",
+        "seconds": round(probe["seconds"], 3),
+        "rss_mb": round(probe["rss_bytes"] / 2 ** 20, 1),
+        "modules": probe["modules"],
+        "import_seconds": import_times(result.stderr)
+    }
+
+
+def report(top=15):
+    """
+    Boot time, RSS and the slowest packages to import for each entry point,
+    and what the lean one saves over the combined one.
+    """
+
+    measured = {name: measure(name) for name in ENTRY_POINTS}
+    combined, lean = measured["combined"], measured["lean"]
+
+    def summary(result):
+        slowest = sorted(result["import_seconds"].items(), key=lambda item: -item[1])[:top]
+        return {
+            "settings": result["settings"],
+            "application": result["application"],
+            "seconds": result["seconds"],
+            "rss_mb": result["rss_mb"],
+            "modules": len(result["modules"]),
+            "slowest_imports_ms": {package: round(seconds * 1000, 1) for package, seconds in slowest}
+        }
+
+    skipped = set(combined["import_seconds"]) - set(lean["import_seconds"])
+    return {
+        **{name: summary(result) for name, result in measured.items()},
+        "lean_saves": {
+            "seconds": round(combined["seconds"] - lean["seconds"], 3),
+            "rss_mb": round(combined["rss_mb"] - lean["rss_mb"], 1),
+            "modules": len(combined["modules"]) - len(lean["modules"]),
+            "packages_not_imported": sorted(skipped)
+        }
+    }
@@ -1,7 +1,19 @@
 from celery import shared_task
-from core.models import Room
+from core import housekeeping
 
 
-@shared_task(name="core.tasks.prune_players")
-def prune_players():
-    return Room.objects.prune_players()
+@shared_task(bind=True, name="core.tasks.prune_players")
+def prune_players(self):
+    """
+    Report rows deleted so far as PROGRESS metadata,
+    and the run's totals as the result.
+    """
+
+    def on_chunk(rows, chunks):
+        if self.request.id is not None and not self.request.is_eager:
+            self.update_state(
+                state="PROGRESS",
+                meta={"rows": rows, "chunks": chunks}
+            )
+
+    return housekeeping.prune_players(on_chunk=on_chunk)
@@ -0,0 +1,149 @@
+from django.test import SimpleTestCase, override_settings
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.testing import WebsocketCommunicator
+
+from common.tests.constants import TEST_CHANNEL_LAYERS
+from core import admission
+from core.consumers import AdmissionControlMixin, OVERLOADED_CLOSE_CODE
+
+from unittest.mock import patch
+from types import SimpleNamespace
+
+import asyncio
+import time
+
+
+class AdmittedConsumer(AdmissionControlMixin, AsyncJsonWebsocketConsumer):
+    connected = 0
+    disconnected = 0
+
+    async def connect(self):
+        type(self).connected += 1
+        await self.accept()
+
+    async def disconnect(self, code):
+        type(self).disconnected += 1
+
+
+class ConnectRateLimiterTests(SimpleTestCase):
+    """
+    - Burst allowed at once, then refused until tokens refill
+    - Clients limited separately, least recently seen forgotten
+    """
+
+    def test_burst_then_refill(self):
+        limiter = admission.ConnectRateLimiter(rate=2, burst=3)
+        with patch("core.admission.time.monotonic", return_value=100.0):
+            self.assertEqual(
+                [limiter.allow("10.0.0.1") for _ in range(4)],
+                [True, True, True, False]
+            )
+        with patch("core.admission.time.monotonic", return_value=100.5):
+            self.assertTrue(limiter.allow("10.0.0.1"))
+            self.assertFalse(limiter.allow("10.0.0.1"))
+
+    def test_clients_limited_separately(self):
+        limiter = admission.ConnectRateLimiter(rate=1, burst=1, max_clients=2)
+        self.assertTrue(limiter.allow("10.0.0.1"))
+        self.assertFalse(limiter.allow("10.0.0.1"))
+        self.assertTrue(limiter.allow("10.0.0.2"))
+
+        self.assertTrue(limiter.allow("10.0.0.3"))
+        self.assertEqual(list(limiter._buckets), ["10.0.0.2", "10.0.0.3"])
+
+
+@override_settings(LOOP_LAG_INTERVAL=0.01)
+class LoopLagMonitorTests(SimpleTestCase):
+    """
+    - Lag measured while the loop is blocked, and published as a gauge
+    - One monitor per loop
+    """
+
+    def test_blocked_loop_measured(self):
+
+        async def block():
+            monitor = admission.get_lag_monitor()
+            self.assertIs(admission.get_lag_monitor(), monitor)
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)
+            # Let the monitor's overdue wakeup run once
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+            monitor.stop()
+            return monitor.lag
+
+        lag = async_to_sync(block)()
+
+        self.assertGreater(lag, 0.05)
+        self.assertEqual(admission.loop_lag_seconds.values[()], lag)
+
+
+@override_settings(
+    CHANNEL_LAYERS=TEST_CHANNEL_LAYERS,
+    ADMISSION_LOOP_LAG_THRESHOLD=0.25,
+    ADMISSION_CONNECT_RATE=1,
+    ADMISSION_CONNECT_BURST=1,
+    ADMISSION_RETRY_AFTER=7
+)
+class AdmissionControlTests(SimpleTestCase):
+    """
+    - Connections refused while the loop lags, with a retry-after close
+    - Connections refused past the per-IP connect rate
+    - connect and disconnect not run for refused connections
+    """
+
+    def setUp(self):
+        AdmittedConsumer.connected = AdmittedConsumer.disconnected = 0
+        admission._rate_limiter = None
+
+    async def _connect(self, ip, lag=0.0):
+        communicator = WebsocketCommunicator(AdmittedConsumer.as_asgi(), "/ws/")
+        communicator.scope["client"] = (ip, 50000)
+        monitor = SimpleNamespace(lag=lag)
+        with patch("core.admission.get_lag_monitor", return_value=monitor):
+            connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+
+        closed = None
+        if not await communicator.receive_nothing():
+            closed = await communicator.receive_output()
+        await communicator.disconnect()
+        return closed
+
+    def test_refused_while_loop_lags(self):
+
+        async def exchange():
+            return (
+                await self._connect("10.0.0.1", lag=0.5),
+                await self._connect("10.0.0.2", lag=0.1)
+            )
+
+        rejected_before = admission.connections_rejected.values.get(("loop_lag",), 0)
+        refused, admitted = async_to_sync(exchange)()
+
+        self.assertEqual(refused["code"], OVERLOADED_CLOSE_CODE)
+        self.assertEqual(refused["reason"], "loop_lag; retry after 7s")
+        self.assertIsNone(admitted)
+        self.assertEqual(AdmittedConsumer.connected, 1)
+        self.assertEqual(AdmittedConsumer.disconnected, 1)
+        self.assertEqual(
+            admission.connections_rejected.values[("loop_lag",)], rejected_before + 1
+        )
+
+    def test_refused_past_connect_rate(self):
+
+        async def exchange():
+            return (
+                await self._connect("10.0.0.1"),
+                await self._connect("10.0.0.1"),
+                await self._connect("10.0.0.2")
+            )
+
+        first, second, other_ip = async_to_sync(exchange)()
+
+        self.assertIsNone(first)
+        self.assertEqual(second["code"], OVERLOADED_CLOSE_CODE)
+        self.assertTrue(second["reason"].startswith("rate_limit"))
+        self.assertIsNone(other_ip)
+        self.assertEqual(AdmittedConsumer.connected, 2)
@@ -1,4 +1,5 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from core.locks import try_lock
 from core.models import Room, Player
 from core.tasks import prune_players
 
@@ -86,3 +87,44 @@ class TestCeleryTasks(TestCase):
         self.assertEqual(len(updated_player_list), 1)
         self.assertIn(player, updated_player_list)
 
+
+    @override_settings(HOUSEKEEPING_CHUNK_SIZE=1)
+    def test_prune_players_reports_chunks_rows_and_lag(self):
+        """
+        Stale players deleted one chunk at a time,
+        with the run's totals returned as the task result.
+        """
+
+        room = Room.objects.create(room_name="test_room")
+        for i in range(3):
+            room.add_player(
+                channel_name=f"user_channel_{i}",
+                user=create_user(email=f"user{i}@example.com")
+            )
+
+        self.datetime = datetime.now() + timedelta(seconds=90)
+
+        result = prune_players.s().apply().get()
+
+        self.assertFalse(result["skipped"])
+        self.assertEqual(result["rows"], 3)
+        self.assertEqual(result["chunks"], 3)
+        self.assertGreaterEqual(result["lag"], 29)
+        self.assertGreaterEqual(result["duration"], 0)
+        self.assertEqual(room.player_set.count(), 0)
+
+    def test_prune_players_skipped_while_previous_run_active(self):
+        """
+        A run is skipped while another holds the housekeeping lock.
+        """
+
+        room = Room.objects.create(room_name="test_room")
+        room.add_player(channel_name="user_channel_1", user=create_user())
+        self.datetime = datetime.now() + timedelta(seconds=90)
+
+        with try_lock("housekeeping.prune_players") as acquired:
+            self.assertTrue(acquired)
+            result = prune_players.s().apply().get()
+
+        self.assertEqual(result, {"skipped": True})
+        self.assertEqual(room.player_set.count(), 1)
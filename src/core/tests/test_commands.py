@@ -3,9 +3,16 @@ from unittest.mock import patch
 
 from django.core.management import call_command
 from django.db.utils import OperationalError
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 
 from psycopg import OperationalError as PsycopgError
 
+from io import StringIO
+
+import os
+import tempfile
+
 
 
 
@@ -35,3 +42,66 @@ class CommandTests(TestCase):
          call_command("wait_for_db")
 
          patched_check.assert_called_with(databases=["default"])
+
+
+class ImportUsersCommandTests(TestCase):
+    """
+    Bulk user import
+
+    1. Import pre-hashed users from CSV
+    2. Hash plain text passwords from NDJSON
+    3. Skip emails duplicated in the file or already registered
+    """
+
+    def write_file(self, suffix, content):
+        file = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False)
+        self.addCleanup(os.remove, file.name)
+        with file:
+            file.write(content)
+        return file.name
+
+    def test_import_prehashed_users_from_csv(self):
+        password_hash = make_password("Testpass123!")
+        path = self.write_file(".csv", (
+            "email,password_hash,name\n"
+            f"first@example.com,{password_hash},First\n"
+            f"second@example.com,{password_hash},Second\n"
+        ))
+
+        call_command("import_users", path, chunk_size=1, stdout=StringIO())
+
+        users = get_user_model().objects.order_by("email")
+        self.assertEqual(
+            [(user.email, user.name) for user in users],
+            [("first@example.com", "First"), ("second@example.com", "Second")]
+        )
+        self.assertTrue(users[0].check_password("Testpass123!"))
+
+    def test_import_hashes_plain_text_passwords(self):
+        path = self.write_file(".ndjson", (
+            '{"email": "first@example.com", "password": "Testpass123!"}\n'
+        ))
+
+        call_command("import_users", path, workers=1, stdout=StringIO())
+
+        user = get_user_model().objects.get(email="first@example.com")
+        self.assertTrue(user.check_password("Testpass123!"))
+
+    def test_import_skips_duplicate_emails(self):
+        get_user_model().objects.create_user(
+            email="existing@example.com", password="Testpass123!"
+        )
+        password_hash = make_password("Testpass123!")
+        path = self.write_file(".csv", (
+            "email,password_hash\n"
+            f"existing@example.com,{password_hash}\n"
+            f"new@EXAMPLE.com,{password_hash}\n"
+            f"new@example.com,{password_hash}\n"
+        ))
+
+        out = StringIO()
+        call_command("import_users", path, stdout=out)
+
+        self.assertEqual(get_user_model().objects.count(), 2)
+        self.assertTrue(get_user_model().objects.filter(email="new@example.com").exists())
+        self.assertIn("Imported 1 users", out.getvalue())
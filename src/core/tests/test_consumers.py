@@ -0,0 +1,192 @@
+from django.test import SimpleTestCase, override_settings
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.exceptions import StopConsumer
+
+from core import consumers
+from core.consumers import (
+    InstrumentedConsumerMixin,
+    OutboundQueueMixin,
+    DROP_OLDEST,
+    PRODUCER_EXTENSION,
+    SERVICE_RESTART_CLOSE_CODE,
+    SLOW_CONSUMER_CLOSE_CODE,
+    drain_connections,
+    outbound_queue_stats
+)
+
+from unittest.mock import patch
+from contextlib import suppress
+
+import asyncio
+import json
+
+
+class QueuedConsumer(OutboundQueueMixin, AsyncJsonWebsocketConsumer):
+    outbound_policies = {
+        "player.list": DROP_OLDEST
+    }
+
+
+class DrainedConsumer(InstrumentedConsumerMixin, QueuedConsumer):
+    pass
+
+
+@override_settings(WEBSOCKET_OUTBOUND_QUEUE_SIZE=2, WEBSOCKET_SLOW_CONSUMER_TIMEOUT=5)
+class OutboundQueueTests(SimpleTestCase):
+    """
+    - Frames written in order by the background writer, straight
+      away without a transport producer
+    - Oldest droppable frame dropped when the queue is full
+    - Never-drop frames queued past the limit while the transport is
+      paused, and written once it resumes
+    - Connection closed after the timeout over the limit
+    """
+
+    def _consumer(self, paused=True, extension=True):
+        consumer = QueuedConsumer()
+        consumer.sent = []
+        consumer.producers = []
+
+        def register_producer(producer):
+            if paused:
+                producer.pauseProducing()
+            consumer.producers.append(producer)
+
+        async def base_send(message):
+            consumer.sent.append(message)
+
+        consumer.scope = {"extensions": {PRODUCER_EXTENSION: register_producer}} if extension else {}
+        consumer.base_send = base_send
+        consumer.release = lambda: consumer.producers[0].resumeProducing()
+        return consumer
+
+    def _types(self, messages):
+        return [json.loads(message["text"])["type"] for message in messages]
+
+    @override_settings(WEBSOCKET_OUTBOUND_QUEUE_SIZE=8)
+    def test_frames_written_in_order(self):
+
+        async def exchange():
+            consumer = self._consumer(extension=False)
+            for message_type in ("player.list", "lobby.challenge", "player.list"):
+                await consumer.send_json({"type": message_type})
+            await asyncio.sleep(0.01)
+            return consumer
+
+        consumer = async_to_sync(exchange)()
+
+        self.assertEqual(
+            self._types(consumer.sent),
+            ["player.list", "lobby.challenge", "player.list"]
+        )
+        self.assertEqual(consumer.outbound_depth, 0)
+
+    def test_oldest_droppable_frame_dropped_when_full(self):
+
+        async def exchange():
+            consumer = self._consumer()
+            for message in (
+                {"type": "player.list", "n": 0},
+                {"type": "player.list", "n": 1},
+                {"type": "lobby.challenge"},
+                {"type": "player.list", "n": 2}
+            ):
+                await consumer.send_json(message)
+            queued = [json.loads(m["text"]) for _, m in consumer._outbound]
+            consumer.release()
+            await asyncio.sleep(0.01)
+            return queued, consumer
+
+        dropped = outbound_queue_stats()["dropped"]
+        dropped_total = consumers.outbound_dropped.values.get((), 0)
+        queued, consumer = async_to_sync(exchange)()
+
+        self.assertEqual(queued, [{"type": "lobby.challenge"}, {"type": "player.list", "n": 2}])
+        self.assertEqual(self._types(consumer.sent), ["lobby.challenge", "player.list"])
+        self.assertEqual(outbound_queue_stats()["dropped"], dropped + 2)
+        self.assertEqual(consumers.outbound_dropped.values[()], dropped_total + 2)
+
+    def test_never_drop_frames_queued_past_limit(self):
+
+        async def exchange():
+            consumer = self._consumer()
+            for i in range(5):
+                await consumer.send_json({"type": "echo.message", "move": i})
+            await asyncio.sleep(0.01)
+            depth, sent = consumer.outbound_depth, len(consumer.sent)
+            consumer.release()
+            await asyncio.sleep(0.01)
+            return depth, sent, consumer
+
+        depth, sent, consumer = async_to_sync(exchange)()
+
+        self.assertEqual((depth, sent), (5, 0))
+        self.assertEqual(len(consumer.sent), 5)
+
+    def test_slow_consumer_closed_after_timeout(self):
+
+        async def exchange(clock):
+            consumer = self._consumer()
+            with patch("core.consumers.time.monotonic", side_effect=lambda: clock[0]):
+                for i in range(4):
+                    await consumer.send_json({"type": "echo.message", "move": i})
+                clock[0] += 6
+                await consumer.send_json({"type": "echo.message", "move": 4})
+                await consumer.send_json({"type": "echo.message", "move": 5})
+            consumer.release()
+            await asyncio.sleep(0.01)
+            return consumer
+
+        slow_disconnects = outbound_queue_stats()["slow_disconnects"]
+        consumer = async_to_sync(exchange)([0.0])
+
+        self.assertEqual(consumer.sent[-1]["type"], "websocket.close")
+        self.assertEqual(consumer.sent[-1]["code"], SLOW_CONSUMER_CLOSE_CODE)
+        self.assertEqual(consumer.outbound_depth, 0)
+        self.assertEqual(outbound_queue_stats()["slow_disconnects"], slow_disconnects + 1)
+
+
+@override_settings(WEBSOCKET_OUTBOUND_QUEUE_SIZE=8)
+class DrainConnectionsTests(SimpleTestCase):
+    """
+    - Open connections closed with the service restart code,
+      after the frames already queued
+    - Connections closed by their clients left alone
+    """
+
+    def setUp(self):
+        # Left open by other tests' consumers
+        consumers._open_connections.clear()
+
+    def test_open_connections_closed_after_queued_frames(self):
+
+        async def exchange():
+            opened = []
+            for _ in range(2):
+                consumer = DrainedConsumer()
+                consumer.sent = []
+
+                async def base_send(message, consumer=consumer):
+                    consumer.sent.append(message)
+
+                consumer.base_send = base_send
+                await consumer.accept()
+                opened.append(consumer)
+
+            with suppress(StopConsumer):
+                await opened[1].websocket_disconnect({"type": "websocket.disconnect", "code": 1000})
+            await opened[0].send_json({"type": "player.list"})
+            drained = await drain_connections()
+            await asyncio.sleep(0.01)
+            return drained, opened
+
+        drained, (open_consumer, closed_consumer) = async_to_sync(exchange)()
+
+        self.assertEqual(drained, 1)
+        self.assertEqual(
+            [message["type"] for message in open_consumer.sent],
+            ["websocket.accept", "websocket.send", "websocket.close"]
+        )
+        self.assertEqual(open_consumer.sent[-1]["code"], SERVICE_RESTART_CLOSE_CODE)
+        self.assertEqual(closed_consumer.sent[-1]["type"], "websocket.accept")
@@ -0,0 +1,48 @@
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase, override_settings
+
+from core import metrics
+from core.db import get_pool_stats, pool_requests
+
+
+class ConnectionPoolTests(TestCase):
+    """
+    - Connections are served from a pool sized to the sync threads
+    - Pool metrics report the connection in use
+    - Pool metrics exported, with requests counted once
+    """
+
+    def test_pool_sized_to_sync_threads(self):
+        connection.ensure_connection()
+
+        stats = get_pool_stats()
+
+        self.assertEqual(
+            stats["max_size"],
+            settings.ASGI_THREADS + settings.DATABASE_EXECUTOR_THREADS + 1
+        )
+
+    def test_pool_stats_report_connection_in_use(self):
+        # Test case runs inside a transaction, so holds its connection
+        connection.ensure_connection()
+
+        stats = get_pool_stats()
+
+        self.assertGreaterEqual(stats["in_use"], 1)
+        self.assertEqual(stats["in_use"], stats["size"] - stats["available"])
+        self.assertEqual(stats["waiting"], 0)
+
+    @override_settings(METRICS_DIR=None)
+    def test_pool_metrics_exported(self):
+        connection.ensure_connection()
+
+        merged = metrics.collect()
+        requests = pool_requests.values[()]
+        metrics.collect()
+
+        self.assertEqual(pool_requests.values[()], requests)
+        self.assertGreaterEqual(
+            merged["db_pool_connections"]["samples"][("in_use",)], 1
+        )
+        self.assertIn("# TYPE db_pool_timeouts_total counter", metrics.render(merged))
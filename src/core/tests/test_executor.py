@@ -0,0 +1,103 @@
+from django.test import SimpleTestCase
+from asgiref.sync import async_to_sync
+
+from core.exceptions import ExecutorQueueFullException
+from core.executor import (
+    InstrumentedExecutor,
+    cleanup_database_sync_to_async,
+    database_sync_to_async,
+    executor_rejected,
+    executor_run_seconds,
+    executor_wait_seconds,
+    get_executor
+)
+
+from threading import Event, current_thread
+from unittest.mock import patch
+
+import asyncio
+
+
+class InstrumentedExecutorTests(SimpleTestCase):
+    """
+    - Wait and run time recorded per calling function, and exported
+    - Submissions rejected once the queue limit is reached, and counted
+    - database_sync_to_async runs calls on the DB executor
+    - Cleanup calls queued past the limit
+    """
+
+    def test_stats_recorded_per_function(self):
+
+        @database_sync_to_async
+        def fetch_rooms():
+            return current_thread().name
+
+        thread_name = async_to_sync(fetch_rooms)()
+
+        self.assertTrue(thread_name.startswith("db-executor"))
+
+        function_stats = get_executor().stats()["functions"]
+        name = "InstrumentedExecutorTests.test_stats_recorded_per_function.<locals>.fetch_rooms"
+        self.assertIn(name, function_stats)
+        self.assertGreaterEqual(function_stats[name]["calls"], 1)
+        self.assertGreaterEqual(function_stats[name]["run_max"], 0.0)
+        # Count of observations: every bucket plus the overflow
+        self.assertGreaterEqual(sum(executor_wait_seconds.values[(name,)][:-1]), 1)
+        self.assertGreaterEqual(sum(executor_run_seconds.values[(name,)][:-1]), 1)
+
+    def test_submission_rejected_when_queue_full(self):
+        executor = InstrumentedExecutor(max_workers=1, max_queue=1)
+        self.addCleanup(executor.shutdown)
+
+        release = Event()
+        started = Event()
+
+        def block():
+            started.set()
+            release.wait()
+
+        running = executor.submit(block)
+        started.wait()
+        queued = executor.submit(lambda: None)
+
+        rejected_total = executor_rejected.values.get((), 0)
+        with self.assertRaises(ExecutorQueueFullException):
+            executor.submit(lambda: None)
+        self.assertEqual(executor_rejected.values[()], rejected_total + 1)
+
+        stats = executor.stats()
+        self.assertEqual(stats["queued"], 1)
+        self.assertEqual(stats["running"], 1)
+        self.assertEqual(stats["rejected"], 1)
+
+        release.set()
+        running.result()
+        queued.result()
+
+        self.assertEqual(executor.stats()["queued"], 0)
+
+    def test_rejection_raised_to_awaiting_coroutine(self):
+        executor = InstrumentedExecutor(max_workers=1, max_queue=0)
+        self.addCleanup(executor.shutdown)
+
+        async def run():
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(executor, lambda: None)
+
+        with self.assertRaises(ExecutorQueueFullException):
+            asyncio.run(run())
+
+    def test_cleanup_calls_not_rejected(self):
+
+        @database_sync_to_async
+        def fetch_rooms():
+            return "fetched"
+
+        @cleanup_database_sync_to_async
+        def leave_rooms():
+            return "left"
+
+        with patch.object(get_executor(), "max_queue", 0):
+            with self.assertRaises(ExecutorQueueFullException):
+                async_to_sync(fetch_rooms)()
+            self.assertEqual(async_to_sync(leave_rooms)(), "left")
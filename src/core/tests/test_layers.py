@@ -0,0 +1,119 @@
+from django.test import SimpleTestCase
+from asgiref.sync import async_to_sync
+from channels.exceptions import ChannelFull
+
+from core.layers import InProcessChannelLayer
+from lobby.channels import worker_channel_prefix
+
+from unittest.mock import patch
+
+import asyncio
+import time
+
+
+class InProcessChannelLayerTests(SimpleTestCase):
+    """
+    - Messages delivered in order, including to waiting receivers
+    - Sends rejected beyond channel capacity, skipped by group_send
+    - Messages and group memberships expire
+    - Channel names share a prefix unique to the layer
+    """
+
+    def setUp(self):
+        self.layer = InProcessChannelLayer(
+            expiry=60,
+            group_expiry=120,
+            capacity=2,
+            channel_capacity={"arena.*": 3}
+        )
+
+    def test_messages_received_in_order(self):
+
+        async def exchange():
+            await self.layer.send("test.channel", {"type": "move", "n": 1})
+            await self.layer.send("test.channel", {"type": "move", "n": 2})
+            return [
+                (await self.layer.receive("test.channel"))["n"],
+                (await self.layer.receive("test.channel"))["n"]
+            ]
+
+        self.assertEqual(async_to_sync(exchange)(), [1, 2])
+        self.assertEqual(self.layer.stats()["channels"], 0)
+
+    def test_waiting_receiver_woken_by_send(self):
+
+        async def exchange():
+            receiver = asyncio.ensure_future(self.layer.receive("test.channel"))
+            await asyncio.sleep(0)
+            await self.layer.send("test.channel", {"type": "move"})
+            return await asyncio.wait_for(receiver, 1)
+
+        self.assertEqual(async_to_sync(exchange)(), {"type": "move"})
+
+    def test_send_raises_when_channel_full(self):
+
+        async def fill(channel, count):
+            for i in range(count):
+                await self.layer.send(channel, {"type": "move"})
+
+        async_to_sync(fill)("test.channel", 2)
+        with self.assertRaises(ChannelFull):
+            async_to_sync(fill)("test.channel", 1)
+
+        # Pattern capacities apply as with the Redis layer
+        async_to_sync(fill)("arena.channel", 3)
+        with self.assertRaises(ChannelFull):
+            async_to_sync(fill)("arena.channel", 1)
+
+        self.assertEqual(self.layer.stats()["channel_full"], 2)
+
+    def test_group_send_skips_full_channels(self):
+
+        async def broadcast():
+            await self.layer.group_add("room_lobby", "full.channel")
+            await self.layer.group_add("room_lobby", "idle.channel")
+            for i in range(2):
+                await self.layer.send("full.channel", {"type": "move"})
+
+            await self.layer.group_send("room_lobby", {"type": "roster"})
+
+        async_to_sync(broadcast)()
+
+        self.assertEqual(len(self.layer.channels["full.channel"].messages), 2)
+        self.assertEqual(len(self.layer.channels["idle.channel"].messages), 1)
+
+    def test_expired_messages_dropped(self):
+        async_to_sync(self.layer.send)("test.channel", {"type": "stale"})
+
+        with patch("core.layers.time.time", return_value=time.time() + 61):
+            async_to_sync(self.layer.send)("test.channel", {"type": "fresh"})
+            message = async_to_sync(self.layer.receive)("test.channel")
+
+        self.assertEqual(message, {"type": "fresh"})
+
+    def test_expired_group_members_not_sent_to(self):
+        async_to_sync(self.layer.group_add)("room_lobby", "test.channel")
+
+        with patch("core.layers.time.time", return_value=time.time() + 121):
+            async_to_sync(self.layer.group_send)("room_lobby", {"type": "roster"})
+
+        self.assertNotIn("test.channel", self.layer.channels)
+        self.assertNotIn("room_lobby", self.layer.groups)
+
+    def test_group_discard(self):
+        async_to_sync(self.layer.group_add)("room_lobby", "test.channel")
+        async_to_sync(self.layer.group_discard)("room_lobby", "test.channel")
+
+        async_to_sync(self.layer.group_send)("room_lobby", {"type": "roster"})
+
+        self.assertEqual(self.layer.stats()["buffered_messages"], 0)
+
+    def test_channel_names_share_worker_prefix(self):
+        prefix = worker_channel_prefix(self.layer)
+        other_prefix = worker_channel_prefix(InProcessChannelLayer())
+
+        name = async_to_sync(self.layer.new_channel)()
+
+        self.assertTrue(name.startswith(prefix))
+        self.assertTrue(self.layer.valid_channel_name(name))
+        self.assertNotEqual(prefix, other_prefix)
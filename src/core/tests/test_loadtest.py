@@ -0,0 +1,45 @@
+from channels.db import database_sync_to_async
+from common.tests.constants import TEST_CHANNEL_LAYERS
+
+from core.loadtest import SCENARIOS, create_load_users, delete_load_users, run_scenario
+
+from app.asgi import application
+
+import pytest
+
+
+@pytest.mark.load
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestLoadHarness:
+    """
+    Each scenario runs with a few clients, all connecting
+    and exchanging their messages.
+    """
+
+    clients = 10
+
+    @pytest.mark.parametrize("scenario", SCENARIOS.keys())
+    async def test_scenario_report(self, settings, scenario):
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        users, tokens = await database_sync_to_async(create_load_users)(self.clients)
+        try:
+            report = await run_scenario(
+                application, scenario, users, tokens, rounds=2, moves=4
+            )
+        finally:
+            await database_sync_to_async(delete_load_users)()
+
+        expected_messages = {
+            "lobby_join_storm": self.clients,
+            "challenge_exchange": self.clients * 2,
+            "arena_ping_pong": self.clients // 2 * 4
+        }
+
+        assert report["errors"] == 0
+        assert report["connect"]["accepted"] == self.clients
+        assert report["connect"]["rate"] > 0
+        assert report["messages"]["count"] == expected_messages[scenario]
+        assert report["messages"]["p50"] <= report["messages"]["p99"]
+        assert report["queries"]["total"] > 0
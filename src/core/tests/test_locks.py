@@ -0,0 +1,39 @@
+from django.test import TransactionTestCase, SimpleTestCase
+
+from core.locks import AdvisoryLock, LocalLock, try_lock
+
+
+class AdvisoryLockTests(TransactionTestCase):
+    """
+    - Lock held by one session at a time
+    - Released lock can be taken again
+    """
+
+    def test_lock_held_by_one_session(self):
+        first = AdvisoryLock("test.lock")
+        second = AdvisoryLock("test.lock")
+        self.addCleanup(first.release)
+        self.addCleanup(second.release)
+
+        self.assertTrue(first.acquire())
+        self.assertTrue(first.held)
+        self.assertFalse(second.acquire())
+        self.assertFalse(second.held)
+
+        first.release()
+        self.assertTrue(second.acquire())
+
+
+class LocalLockTests(SimpleTestCase):
+
+    def test_lock_held_once_per_name(self):
+        with self.settings(HOUSEKEEPING_LOCKS="local"):
+            with try_lock("test.lock") as acquired:
+                self.assertTrue(acquired)
+                with try_lock("test.lock") as acquired_again:
+                    self.assertFalse(acquired_again)
+                self.assertTrue(LocalLock("other.lock").acquire())
+                LocalLock("other.lock").release()
+
+            with try_lock("test.lock") as acquired:
+                self.assertTrue(acquired)
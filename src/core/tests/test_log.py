@@ -0,0 +1,65 @@
+from django.test import SimpleTestCase, override_settings
+
+from core.log import BackgroundHandler, EventLogger, JSONFormatter
+
+from unittest.mock import patch
+
+import json
+import logging
+
+
+class EventLoggerTests(SimpleTestCase):
+    """
+    - Events logged as JSON with their fields, by a background thread
+    - Nothing built for disabled levels
+    - Sampled events logged for their fraction of calls
+    - Records dropped rather than blocking when the queue is full
+    """
+
+    def setUp(self):
+        self.logger = logging.getLogger("test.events")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.records = []
+        self.handler = logging.Handler()
+        self.handler.emit = self.records.append
+        self.logger.addHandler(self.handler)
+        self.addCleanup(self.logger.removeHandler, self.handler)
+        self.log = EventLogger("test.events")
+
+    def test_event_formatted_as_json(self):
+        self.log.info("lobby.connect", channel="specific.abc", user=1)
+
+        entry = json.loads(JSONFormatter().format(self.records[0]))
+
+        self.assertEqual(entry["event"], "lobby.connect")
+        self.assertEqual(entry["level"], "INFO")
+        self.assertEqual(entry["logger"], "test.events")
+        self.assertEqual(entry["channel"], "specific.abc")
+        self.assertEqual(entry["user"], 1)
+
+    def test_disabled_level_builds_no_record(self):
+        with patch.object(self.logger, "makeRecord") as make_record:
+            self.log.debug("lobby.receive", type="lobby.challenge")
+
+        make_record.assert_not_called()
+
+    @override_settings(LOG_SAMPLE_RATES={"lobby.receive": 0.0, "lobby.connect": 1.0})
+    def test_sampled_events(self):
+        for i in range(10):
+            self.log.info("lobby.receive")
+            self.log.info("lobby.connect")
+
+        self.assertEqual([r.msg for r in self.records], ["lobby.connect"] * 10)
+
+    def test_background_handler_drops_when_full(self):
+        handler = BackgroundHandler(queue_size=1)
+        # No listener draining the queue
+        handler.close()
+
+        record = logging.LogRecord("test.events", logging.INFO, "", 0, "event", (), None)
+        handler.handle(record)
+        handler.handle(record)
+
+        self.assertEqual(handler.dropped, 1)
+        self.assertIs(handler.queue.get_nowait(), record)
@@ -0,0 +1,130 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from core import memory, metrics
+
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+MEMORY_URL = reverse("memory")
+
+
+def allocate_buffers():
+    return [bytearray(1024) for i in range(500)]
+
+
+class MemoryReportTests(TestCase):
+    """
+    - Growth since the snapshot reported by module, with bytes per connection
+    - Report restricted to staff
+    - Requests for another worker's pid relayed to it, and refused
+      for processes that don't handle the signal
+    - A worker's files removed when it exits
+    """
+
+    def setUp(self):
+        self.addCleanup(memory.stop)
+
+    def test_growth_since_snapshot(self):
+        memory.take_snapshot()
+
+        metrics.connections_open.inc("TestConsumer", amount=2)
+        self.addCleanup(metrics.connections_open.dec, "TestConsumer", amount=2)
+        buffers = allocate_buffers()
+
+        report = memory.report(group_by="lineno")
+
+        self.assertTrue(report["tracing"])
+        self.assertEqual(report["connections"]["TestConsumer"], 2)
+        self.assertGreaterEqual(report["connections_added"], 2)
+        self.assertGreater(report["bytes_per_connection_added"], 0)
+        grown = [
+            entry for entry in report["diff"]
+            if "test_memory.py" in entry["location"] and entry["size_diff"] >= 500 * 1024
+        ]
+        self.assertTrue(grown)
+        del buffers
+
+    def test_report_restricted_to_staff(self):
+        user = get_user_model().objects.create_user(email="player@example.com", password="Testpass123!")
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(MEMORY_URL).status_code, 302)
+
+        staff = get_user_model().objects.create_superuser(email="staff@example.com", password="Testpass123!")
+        self.client.force_login(staff)
+
+        res = self.client.post(MEMORY_URL, {"action": "start"})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.json()["tracing"])
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertIn("top", res.json())
+
+    def _start_worker(self, directory):
+        """
+        A process set up like a worker, idle on its event loop until it's
+        interrupted, and its pid once it's handling MEMORY_SIGNAL.
+        """
+
+        worker = subprocess.Popen(
+            [
+                sys.executable, "-c",
+                "import asyncio, django; django.setup()\n"
+                "from core import memory\n"
+                "async def main():\n"
+                "    memory.install_signal_handler()\n"
+                "    await asyncio.Event().wait()\n"
+                "asyncio.run(main())"
+            ],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, "DJANGO_SETTINGS_MODULE": "app.settings", "METRICS_DIR": directory}
+        )
+        self.addCleanup(worker.wait)
+        self.addCleanup(worker.kill)
+
+        for _ in range(200):
+            if os.path.exists(os.path.join(directory, f"memory-{worker.pid}.json")):
+                return worker.pid
+            time.sleep(0.05)
+        self.fail("Worker didn't install its signal handler")
+
+    def test_request_relayed_to_worker(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        pid = self._start_worker(directory)
+        staff = get_user_model().objects.create_superuser(email="staff@example.com", password="Testpass123!")
+        self.client.force_login(staff)
+
+        with override_settings(METRICS_DIR=directory):
+            started = self.client.post(f"{MEMORY_URL}?pid={pid}", {"action": "snapshot"})
+            report = self.client.get(MEMORY_URL, {"pid": pid})
+            missing = self.client.get(MEMORY_URL, {"pid": os.getppid()})
+
+        self.assertEqual(started.status_code, 200)
+        self.assertEqual(report.json()["pid"], pid)
+        self.assertTrue(report.json()["tracing"])
+        self.assertIn("diff", report.json())
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertEqual(missing.status_code, 404)
+
+    def test_files_removed_at_exit(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        pid = self._start_worker(directory)
+
+        os.kill(pid, signal.SIGINT)
+        for _ in range(200):
+            if not os.listdir(directory):
+                break
+            time.sleep(0.05)
+
+        self.assertEqual(os.listdir(directory), [])
@@ -0,0 +1,125 @@
+from django.test import SimpleTestCase
+from django.urls import reverse
+from asgiref.sync import async_to_sync
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from channels.testing import WebsocketCommunicator
+
+from core import metrics
+from core.consumers import InstrumentedConsumerMixin
+
+from tempfile import TemporaryDirectory
+from threading import Thread
+
+import json
+import os
+
+
+class EchoConsumer(InstrumentedConsumerMixin, AsyncJsonWebsocketConsumer):
+
+    async def receive_json(self, content, **kwargs):
+        await self.send_json(content)
+
+
+class MetricsTests(SimpleTestCase):
+    """
+    - Histograms rendered with cumulative buckets, sum and count
+    - Metrics summed across worker files, dropping dead workers' gauges
+    - Dead workers' files folded into one, keeping their counts
+    - Concurrent writes all counted
+    - Consumer handlers and connections recorded
+    - Metrics served at /metrics
+    """
+
+    def setUp(self):
+        self.histogram = metrics.Histogram(
+            "test_seconds", "Test histogram", ("handler",), buckets=(0.1, 1.0)
+        )
+        self.gauge = metrics.Gauge("test_open", "Test gauge")
+        self.addCleanup(metrics.registry.metrics.pop, "test_seconds")
+        self.addCleanup(metrics.registry.metrics.pop, "test_open")
+
+    def test_histogram_rendered(self):
+        for value in (0.05, 0.1, 0.5, 3):
+            self.histogram.observe("connect", value=value)
+
+        text = metrics.render(metrics.collect())
+
+        self.assertIn("# TYPE test_seconds histogram", text)
+        self.assertIn('test_seconds_bucket{handler="connect",le="0.1"} 2', text)
+        self.assertIn('test_seconds_bucket{handler="connect",le="1.0"} 3', text)
+        self.assertIn('test_seconds_bucket{handler="connect",le="+Inf"} 4', text)
+        self.assertIn('test_seconds_sum{handler="connect"} 3.65', text)
+        self.assertIn('test_seconds_count{handler="connect"} 4', text)
+
+    def test_metrics_summed_across_workers(self):
+        self.histogram.observe("connect", value=0.5)
+        self.gauge.set(value=3)
+
+        with TemporaryDirectory() as directory:
+            # A worker that has exited: counts kept, gauges dropped
+            snapshot = metrics.registry.snapshot()
+            snapshot["pid"] = 2 ** 22 + 1
+            with open(os.path.join(directory, "metrics-exited.json"), "w") as f:
+                json.dump(snapshot, f)
+
+            with self.settings(METRICS_DIR=directory):
+                merged = metrics.collect()
+                files = sorted(os.listdir(directory))
+                merged_again = metrics.collect()
+
+        self.assertEqual(merged["test_seconds"]["samples"][("connect",)][:3], [0, 2, 0])
+        self.assertEqual(merged["test_open"]["samples"][()], 3)
+        self.assertEqual(
+            files, [f"metrics-{os.getpid()}.json", "metrics-retired.json", "metrics.lock"]
+        )
+        self.assertEqual(merged_again["test_seconds"]["samples"][("connect",)][:3], [0, 2, 0])
+
+    def test_concurrent_writes_counted(self):
+        counter = metrics.Counter("test_total", "Test counter")
+        self.addCleanup(metrics.registry.metrics.pop, "test_total")
+
+        def increment():
+            for _ in range(10000):
+                counter.inc()
+                self.histogram.observe("connect", value=0.5)
+
+        threads = [Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.values[()], 80000)
+        self.assertEqual(self.histogram.values[("connect",)][1], 80000)
+
+    def test_consumer_handlers_recorded(self):
+        counts = metrics.handler_seconds.values
+
+        def count(handler):
+            return sum(counts.get(("EchoConsumer", handler), [0])[:-1])
+
+        before = {handler: count(handler) for handler in ("connect", "receive_json", "disconnect")}
+
+        async def exchange():
+            communicator = WebsocketCommunicator(EchoConsumer.as_asgi(), "ws/echo")
+            await communicator.connect()
+            open_connections = metrics.connections_open.values[("EchoConsumer",)]
+            await communicator.send_json_to({"type": "echo"})
+            await communicator.receive_json_from()
+            await communicator.disconnect()
+            return open_connections
+
+        self.assertEqual(async_to_sync(exchange)(), 1)
+        self.assertEqual(metrics.connections_open.values[("EchoConsumer",)], 0)
+        for handler, previous in before.items():
+            self.assertEqual(count(handler), previous + 1)
+
+    def test_metrics_endpoint(self):
+        self.histogram.observe("connect", value=0.05)
+
+        res = self.client.get(reverse("metrics"))
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b'test_seconds_count{handler="connect"} 1', res.content)
+        self.assertIn(b"# TYPE websocket_handler_seconds histogram", res.content)
@@ -0,0 +1,70 @@
+from django.test import SimpleTestCase
+
+from core.profiler import SamplingProfiler
+
+from tempfile import TemporaryDirectory
+from threading import Thread, Event
+
+import os
+import signal
+import time
+
+
+def busy_db_call(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+class SamplingProfilerTests(SimpleTestCase):
+    """
+    - Executor threads sampled and written as collapsed stacks
+    - Other threads left out
+    - Profiling started by the configured signal
+    """
+
+    def _profile(self, profiler, thread_name):
+        stop = Event()
+        thread = Thread(target=busy_db_call, args=(stop,), name=thread_name)
+        thread.start()
+        try:
+            profiler.start()
+            profiler._thread.join()
+        finally:
+            stop.set()
+            thread.join()
+
+        with open(profiler.output_path) as f:
+            return f.read().splitlines()
+
+    def test_executor_threads_sampled(self):
+        with TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(interval=0.005, duration=0.2, output_dir=directory)
+            lines = self._profile(profiler, "db-executor_7")
+
+        busy = [line for line in lines if "busy_db_call" in line]
+        self.assertTrue(busy)
+        stack, count = busy[0].rsplit(" ", 1)
+        self.assertTrue(stack.startswith("db-executor;"))
+        self.assertGreater(int(count), 0)
+
+    def test_other_threads_not_sampled(self):
+        with TemporaryDirectory() as directory:
+            profiler = SamplingProfiler(interval=0.005, duration=0.1, output_dir=directory)
+            lines = self._profile(profiler, "unrelated")
+
+        self.assertFalse([line for line in lines if "busy_db_call" in line])
+
+    def test_signal_starts_profiling(self):
+        with TemporaryDirectory() as directory, \
+                self.settings(PROFILER_DIR=directory, PROFILER_DURATION=0.05):
+            from core import profiler as profiler_module
+            profiler_module._profiler = None
+            self.addCleanup(setattr, profiler_module, "_profiler", None)
+
+            profiler_module.install_signal_handler()
+            os.kill(os.getpid(), signal.SIGUSR2)
+            time.sleep(0.01)
+
+            profiler = profiler_module.get_profiler()
+            profiler._thread.join()
+            self.assertTrue(os.path.exists(profiler.output_path))
@@ -0,0 +1,58 @@
+from django.test import TestCase, override_settings
+from asgiref.sync import async_to_sync
+
+from core import queries
+from core.executor import database_sync_to_async
+from core.models import Room
+
+
+@override_settings(
+    QUERY_ACCOUNTING_SAMPLE_RATE=1.0,
+    QUERY_BUDGETS={"test.handler": {"queries": 1}}
+)
+class QueryAccountingTests(TestCase):
+    """
+    - Queries attributed to the handler, including those made on the DB executor
+    - Runs over budget flagged
+    - Runs outside the sample not accounted
+    """
+
+    def tearDown(self):
+        queries.breaches.clear()
+
+    def test_executor_queries_attributed_to_handler(self):
+
+        @database_sync_to_async
+        def count_rooms():
+            return Room.objects.count()
+
+        async def handler():
+            with queries.accounting("test.handler") as account:
+                await count_rooms()
+            return account
+
+        account = async_to_sync(handler)()
+
+        self.assertEqual(account.queries, 1)
+        self.assertGreater(account.seconds, 0)
+        self.assertEqual(list(queries.breaches), [])
+
+    def test_budget_breach_flagged(self):
+        with queries.accounting("test.handler") as account:
+            Room.objects.count()
+            Room.objects.exists()
+
+        self.assertEqual(account.queries, 2)
+        self.assertEqual(len(queries.breaches), 1)
+        self.assertEqual(queries.breaches[0]["handler"], "test.handler")
+        self.assertEqual(queries.breaches[0]["queries"], 2)
+        self.assertGreaterEqual(queries.budget_breaches.values[("test.handler",)], 1)
+
+    @override_settings(QUERY_ACCOUNTING_SAMPLE_RATE=0.0)
+    def test_unsampled_runs_not_accounted(self):
+        with queries.accounting("test.handler") as account:
+            Room.objects.count()
+            Room.objects.exists()
+
+        self.assertIsNone(account)
+        self.assertEqual(list(queries.breaches), [])
@@ -0,0 +1,109 @@
+from django.test import SimpleTestCase, override_settings
+from asgiref.sync import async_to_sync
+
+from core import scheduler as scheduler_module
+from core.scheduler import Scheduler, LifespanApp, get_scheduler
+
+from threading import Event
+
+import asyncio
+
+
+@override_settings(HOUSEKEEPING_LOCKS="local")
+class SchedulerTests(SimpleTestCase):
+    """
+    - Only the leader among schedulers runs jobs
+    - A job still running when next due is skipped
+    - Run count and duration recorded per job, and exported as metrics
+    - Started and stopped by lifespan events
+    """
+
+    def test_only_leader_runs_jobs(self):
+        calls = []
+
+        async def run():
+            schedulers = [Scheduler(), Scheduler()]
+            for i, scheduler in enumerate(schedulers):
+                scheduler.add_job("job", lambda i=i: calls.append(i), 0.01, jitter=0)
+                await scheduler.start()
+            await asyncio.sleep(0.1)
+            leaders = [scheduler.is_leader for scheduler in schedulers]
+            for scheduler in schedulers:
+                await scheduler.stop()
+            return leaders
+
+        leaders = async_to_sync(run)()
+
+        self.assertEqual(leaders.count(True), 1)
+        self.assertTrue(calls)
+        self.assertEqual(set(calls), {leaders.index(True)})
+
+    def test_running_job_skipped(self):
+        release = Event()
+
+        async def run():
+            scheduler = Scheduler()
+            scheduler.add_job("slow", lambda: release.wait(5), 0.01, jitter=0)
+            await scheduler.start()
+            await asyncio.sleep(0.1)
+            release.set()
+            await asyncio.sleep(0.05)
+            await scheduler.stop()
+            return scheduler.stats()["jobs"]["slow"]
+
+        stats = async_to_sync(run)()
+
+        self.assertGreaterEqual(stats["runs"], 1)
+        self.assertGreater(stats["skipped"], 0)
+        self.assertGreater(stats["max_duration"], 0.05)
+
+    def test_failed_job_recorded(self):
+
+        def fail():
+            raise ValueError
+
+        async def run():
+            scheduler = Scheduler()
+            scheduler.add_job("fail", fail, 0.01, jitter=0)
+            await scheduler.start()
+            await asyncio.sleep(0.05)
+            await scheduler.stop()
+            return scheduler.stats()["jobs"]["fail"]
+
+        stats = async_to_sync(run)()
+
+        self.assertGreaterEqual(stats["failures"], 1)
+        self.assertEqual(stats["failures"], stats["runs"])
+        self.assertEqual(scheduler_module.job_runs.values[("fail", "failed")], stats["runs"])
+        self.assertEqual(
+            sum(scheduler_module.job_duration_seconds.values[("fail",)][:-1]), stats["runs"]
+        )
+
+    def test_jobs_loaded_from_settings(self):
+        scheduler = get_scheduler()
+
+        job = scheduler.jobs["prune_players"]
+        self.assertEqual(job.interval, 60)
+        for i in range(10):
+            self.assertTrue(54 <= job.next_delay() <= 66)
+
+    def test_lifespan_starts_and_stops_scheduler(self):
+
+        async def run():
+            scheduler = Scheduler()
+            app = LifespanApp(scheduler)
+            events = asyncio.Queue()
+            sent = []
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await events.put({"type": "lifespan.startup"})
+            await events.put({"type": "lifespan.shutdown"})
+            await app({"type": "lifespan"}, events.get, send)
+            return sent
+
+        self.assertEqual(
+            async_to_sync(run)(),
+            ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        )
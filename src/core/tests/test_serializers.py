@@ -0,0 +1,53 @@
+from django.test import TestCase
+
+from core.models import Player, Room
+from core.rosters import serialize_room
+from core.serializers import RoomSerializer
+from common.tests.utils import create_user
+
+import json
+
+
+class SerializeRoomTests(TestCase):
+    """
+    - Same JSON as RoomSerializer, with and without a requesting user
+    - Requesting user and players of other rooms left out
+    - Players fetched with a single query
+    """
+
+    def setUp(self):
+        self.room = Room.objects.create(room_name="room_1")
+        other_room = Room.objects.create(room_name="room_2")
+
+        for i, room in enumerate([self.room, self.room, other_room, self.room]):
+            Player.objects.create(
+                room=room,
+                auth_user=create_user(email=f"player{i}@example.com"),
+                channel_name=f"channel_{i}"
+            )
+        Player.objects.create(room=self.room, auth_user=None, channel_name="anonymous")
+
+    def assertSameJSON(self, current_user_email):
+        expected = RoomSerializer(self.room, current_user_email=current_user_email).data
+        self.assertEqual(
+            json.dumps(serialize_room(self.room, current_user_email=current_user_email)),
+            json.dumps(expected)
+        )
+
+    def test_same_output_as_room_serializer(self):
+        self.assertSameJSON("player1@example.com")
+        self.assertSameJSON(None)
+
+    def test_roster(self):
+        self.assertEqual(serialize_room(self.room, current_user_email="player1@example.com"), {
+            "room_name": "room_1",
+            "players": [
+                {"user": {"email": "player0@example.com"}},
+                {"user": {"email": "player3@example.com"}},
+                {"user": None}
+            ]
+        })
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            serialize_room(self.room, current_user_email="player1@example.com")
@@ -0,0 +1,205 @@
+from django.conf import settings
+from django.core.management import CommandError
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.utils import timezone
+from channels.db import database_sync_to_async
+
+from core.consumers import SERVICE_RESTART_CLOSE_CODE, SLOW_CONSUMER_CLOSE_CODE
+from core.management.commands.serve import pool_size_per_worker, threads_per_worker
+from core.models import Player, Room
+from core.loadtest import (
+    ORIGIN_HEADERS,
+    NetworkCommunicator,
+    create_load_users,
+    delete_load_users
+)
+
+from datetime import timedelta
+
+import asyncio
+import os
+import pytest
+import signal
+import socket
+import subprocess
+import sys
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _serve(port, settings_module="app.settings", **env):
+    return subprocess.Popen(
+        [
+            sys.executable, str(settings.BASE_DIR / "manage.py"), "serve",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", "2", "--drain-timeout", "5"
+        ],
+        env={
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": settings_module,
+            "DB_NAME": connection.settings_dict["NAME"],
+            "CHANNEL_LAYER": "inprocess",
+            "ADMISSION_CONNECT_RATE": "0",
+            **env
+        },
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL
+    )
+
+
+@database_sync_to_async
+def _create_stale_player():
+    room = Room.objects.create(room_name="serve_housekeeping")
+    player = Player.objects.create(room=room, channel_name="serve.stale")
+    Player.objects.filter(id=player.id).update(last_seen=timezone.now() - timedelta(hours=1))
+    return player
+
+
+def _pooled(min_size, max_size):
+    return {"default": {"OPTIONS": {"pool": {"min_size": min_size, "max_size": max_size}}}}
+
+
+class PoolSizeTests(SimpleTestCase):
+    """
+    - Workers split DB_MAX_CONNECTIONS, up to the pool's max_size
+    - Refused when a share would be below the pool's min_size
+    - Sync and DB executor threads are cut to fit the worker's share
+    """
+
+    @override_settings(DB_MAX_CONNECTIONS=80, DATABASES=_pooled(2, 33))
+    def test_connections_split_between_workers(self):
+        self.assertEqual(pool_size_per_worker(16), 5)
+        self.assertEqual(pool_size_per_worker(1), 33)
+
+    @override_settings(DB_MAX_CONNECTIONS=20, DATABASES=_pooled(2, 33))
+    def test_too_many_workers(self):
+        with self.assertRaises(CommandError):
+            pool_size_per_worker(16)
+
+    @override_settings(ASGI_THREADS=12, DATABASE_EXECUTOR_THREADS=12)
+    def test_threads_fit_pool(self):
+        self.assertEqual(threads_per_worker(25), (12, 12))
+        self.assertEqual(threads_per_worker(10), (5, 4))
+        self.assertEqual(threads_per_worker(3), (1, 1))
+
+
+@database_sync_to_async
+def _players_exist(**lookups):
+    return Player.objects.filter(**lookups).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestServe:
+    """
+    - Workers accept websocket connections on the shared port,
+      with the combined and the websocket-only settings
+    - SIGTERM drains them: clients are closed with the service
+      restart code, their seats are released and the supervisor exits cleanly
+    - Workers run the housekeeping jobs
+    - A client that stops reading is closed once its socket is backed up
+      and its outbound queue stays over the limit
+    """
+
+    @pytest.mark.parametrize("settings_module", ["app.settings", "app.settings_ws"])
+    async def test_drain_on_sigterm(self, settings_module):
+        port = _free_port()
+        server = _serve(port, settings_module)
+        users, tokens = await database_sync_to_async(create_load_users)(2)
+
+        try:
+            # Printed once every worker is listening
+            await asyncio.to_thread(server.stdout.readline)
+
+            clients = []
+            for token in tokens:
+                client = NetworkCommunicator(
+                    f"ws://127.0.0.1:{port}", f"ws/lobby/serve?token={token}", ORIGIN_HEADERS
+                )
+                connected, _ = await client.connect(timeout=10)
+                assert connected
+                await client.receive_json_from(timeout=5)
+                clients.append(client)
+
+            server.send_signal(signal.SIGTERM)
+
+            for client in clients:
+                with pytest.raises(ConnectionError):
+                    await client.receive_json_from(timeout=10)
+                assert client.close_code == SERVICE_RESTART_CLOSE_CODE
+                await client.disconnect()
+
+            assert await asyncio.to_thread(server.wait, 15) == 0
+            assert not await _players_exist(auth_user__in=users)
+        finally:
+            if server.poll() is None:
+                server.kill()
+            server.stdout.close()
+            await database_sync_to_async(delete_load_users)()
+
+    async def test_housekeeping_jobs_run(self):
+        player = await _create_stale_player()
+        server = _serve(_free_port(), PRUNE_PLAYERS_INTERVAL="1")
+
+        try:
+            await asyncio.to_thread(server.stdout.readline)
+
+            for _ in range(100):
+                if not await _players_exist(id=player.id):
+                    break
+                await asyncio.sleep(0.1)
+            else:
+                pytest.fail("prune_players didn't run")
+
+            server.send_signal(signal.SIGTERM)
+            assert await asyncio.to_thread(server.wait, 15) == 0
+        finally:
+            if server.poll() is None:
+                server.kill()
+            server.stdout.close()
+
+    async def test_slow_client_closed(self):
+        port = _free_port()
+        server = _serve(
+            port, WEBSOCKET_OUTBOUND_QUEUE_SIZE="4", WEBSOCKET_SLOW_CONSUMER_TIMEOUT="1"
+        )
+        _, (token,) = await database_sync_to_async(create_load_users)(1)
+
+        try:
+            await asyncio.to_thread(server.stdout.readline)
+
+            client = NetworkCommunicator(
+                f"ws://127.0.0.1:{port}", f"ws/arena/serve?token={token}", ORIGIN_HEADERS
+            )
+            connected, _ = await client.connect(timeout=10)
+            assert connected
+
+            # Echoed back, but not read: enough to fill the socket's buffers
+            echo = {"type": "echo.message", "data": "x" * 65536}
+            for _ in range(400):
+                await client.send_json_to(echo)
+            # Another echo once the queue has been over the limit for the timeout
+            await asyncio.sleep(2)
+            await client.send_json_to(echo)
+
+            received = 0
+            with pytest.raises(ConnectionError):
+                while True:
+                    await client.receive_json_from(timeout=10)
+                    received += 1
+            assert client.close_code == SLOW_CONSUMER_CLOSE_CODE
+            assert received < 401
+            await client.disconnect()
+
+            server.send_signal(signal.SIGTERM)
+            assert await asyncio.to_thread(server.wait, 15) == 0
+        finally:
+            if server.poll() is None:
+                server.kill()
+            server.stdout.close()
+            await database_sync_to_async(delete_load_users)()
@@ -0,0 +1,40 @@
+from django.test import SimpleTestCase
+
+from core.startup import import_times, measure
+
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |     django.utils.version
+import time:       300 |        420 |   django
+import time:      2000 |       2000 |       django.contrib.admin.sites
+import time:       500 |       2500 |     django.contrib.admin
+import time:        80 |         80 |   corsheaders
+"""
+
+
+class StartupReportTests(SimpleTestCase):
+    """
+    - Own import time summed per package, django.contrib apps separately
+    - The lean entry point doesn't import the HTTP-only apps
+    """
+
+    def test_import_times_by_package(self):
+        self.assertEqual(import_times(IMPORTTIME_OUTPUT), {
+            "django": 0.00042,
+            "django.contrib.admin": 0.0025,
+            "corsheaders": 0.00008
+        })
+
+    def test_lean_entry_point_skips_http_apps(self):
+        combined, lean = measure("combined"), measure("lean")
+
+        for module in (
+            "django.contrib.admin", "drf_spectacular", "corsheaders", "authenticate",
+            "rest_framework.serializers"
+        ):
+            self.assertIn(module, combined["modules"])
+            self.assertNotIn(module, lean["modules"])
+        self.assertIn("lobby.consumers", lean["modules"])
+        self.assertLess(len(lean["modules"]), len(combined["modules"]))
+        self.assertGreater(lean["rss_mb"], 0)
@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.test import override_settings
+from django.test.client import AsyncClient
+
+from core import warmup as warmup_module
+from core.executor import get_executor
+from core.warmup import WarmUp
+
+from unittest.mock import patch
+
+import pytest
+
+
+async def failing_step():
+    raise RuntimeError("database unavailable")
+
+
+async def passing_step():
+    pass
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestWarmUp:
+    """
+    - Default steps all succeed, each timed, and the worker becomes ready
+    - Only the pool's min_size connections opened
+    - A failed step is recorded and leaves the worker not ready
+    - /ready answers 503 until warm-up succeeds, running it if it never ran or failed
+    """
+
+    async def test_default_steps(self):
+        warmup = WarmUp()
+
+        assert await warmup.run()
+
+        status = warmup.status()
+        assert status["ready"] is True
+        assert list(status["steps"]) == [
+            "core.warmup.open_db_connections",
+            "core.warmup.prime_caches",
+            "core.warmup.synthetic_handshake"
+        ]
+        assert all("seconds" in step for step in status["steps"].values())
+        assert warmup_module.worker_ready.values[()] == 1
+
+    async def test_min_size_connections_opened(self):
+        checkout = patch(
+            "core.warmup._checkout_connection", wraps=warmup_module._checkout_connection
+        )
+        with checkout as checkout:
+            await warmup_module.open_db_connections()
+
+        min_size = settings.DATABASES["default"]["OPTIONS"]["pool"]["min_size"]
+        assert checkout.call_count == min(min_size, get_executor()._max_workers)
+
+    @override_settings(WARMUP_STEPS=[
+        "core.tests.test_warmup.failing_step",
+        "core.tests.test_warmup.passing_step"
+    ])
+    async def test_failed_step(self):
+        warmup = WarmUp()
+
+        assert not await warmup.run()
+
+        assert warmup.state == "failed"
+        assert warmup.steps["core.tests.test_warmup.failing_step"] == {
+            "error": "RuntimeError('database unavailable')"
+        }
+        assert "seconds" in warmup.steps["core.tests.test_warmup.passing_step"]
+
+    async def test_ready_view(self):
+        warmup = WarmUp()
+        client = AsyncClient()
+
+        with patch("core.views.warmup", warmup):
+            with override_settings(WARMUP_STEPS=["core.tests.test_warmup.failing_step"]):
+                response = await client.get("/ready")
+            assert response.status_code == 503
+            assert response.json()["state"] == "failed"
+
+            with override_settings(WARMUP_STEPS=["core.tests.test_warmup.passing_step"]):
+                response = await client.get("/ready")
+            assert response.status_code == 200
+            assert response.json()["ready"] is True
+
+            warmup.state = "running"
+            response = await client.get("/ready")
+            assert response.status_code == 503
@@ -1,3 +1,89 @@
-from django.shortcuts import render
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.http import HttpResponse, JsonResponse
+from django.views.decorators.http import require_http_methods
 
-# Create your views here.
+from core import memory, metrics
+from core.warmup import warmup
+
+import os
+
+
+# The admin's staff_member_required, without importing the admin
+# (this module is also served by the websocket-only workers)
+staff_member_required = user_passes_test(
+    lambda user: user.is_active and user.is_staff,
+    login_url="admin:login"
+)
+
+
+def metrics_view(request):
+    """
+    Serve metrics in the Prometheus text format,
+    summed across worker processes when METRICS_DIR is set.
+    """
+
+    return HttpResponse(
+        metrics.render(metrics.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+async def ready_view(request):
+    """
+    Readiness probe: 200 once this worker's warm-up has finished, 503 until then.
+
+    Workers started by the serve command warm up before listening. Under
+    other servers the first probe runs the warm-up, as does a probe after
+    a failed one.
+    """
+
+    if warmup.state in ("pending", "failed"):
+        await warmup.run()
+
+    return JsonResponse(warmup.status(), status=200 if warmup.ready else 503)
+
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def memory_view(request):
+    """
+    Allocation tracing for a worker, for staff.
+
+    POST action=start|snapshot|stop starts tracing, takes the snapshot
+    later reports are diffed against, or stops tracing.
+    GET reports traced memory by module (?group_by=lineno for lines).
+
+    Each worker traces on its own, so under several workers pass ?pid= (the
+    report's "pid" says which worker answered) to address the same one
+    every time: another worker relays the request to it, see core.memory.
+    """
+
+    action = None
+    if request.method == "POST":
+        action = request.POST.get("action")
+        if action not in memory.ACTIONS:
+            return JsonResponse({"error": "action must be start, snapshot or stop"}, status=400)
+
+    group_by = request.GET.get("group_by", "filename")
+    if group_by not in ("filename", "lineno"):
+        return JsonResponse({"error": "group_by must be filename or lineno"}, status=400)
+
+    pid = request.GET.get("pid")
+    if pid is None or pid == str(os.getpid()):
+        return JsonResponse(memory.handle(action, group_by))
+
+    if not pid.isdigit():
+        return JsonResponse({"error": "pid must be a process id"}, status=400)
+    if not getattr(settings, "METRICS_DIR", None) or not getattr(settings, "MEMORY_SIGNAL", None):
+        return JsonResponse(
+            {"error": "METRICS_DIR and MEMORY_SIGNAL must be set to reach other workers"},
+            status=400
+        )
+
+    try:
+        return JsonResponse(memory.request(int(pid), action, group_by))
+    except ProcessLookupError:
+        return JsonResponse({"error": f"No worker {pid}"}, status=404)
+    except TimeoutError as e:
+        return JsonResponse({"error": str(e)}, status=504)
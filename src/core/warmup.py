@@ -0,0 +1,150 @@
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.utils.module_loading import import_string
+from rest_framework_simplejwt.tokens import AccessToken
+
+from core import metrics
+from core.executor import database_sync_to_async, get_executor
+
+from threading import Barrier, BrokenBarrierError
+
+import asyncio
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+warmup_step_seconds = metrics.Gauge(
+    "warmup_step_seconds",
+    "Time the worker's warm-up spent in each step",
+    ("step",)
+)
+
+worker_ready = metrics.Gauge(
+    "worker_ready",
+    "1 once the worker's warm-up has finished"
+)
+
+
+def _checkout_connection(barrier):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1")
+    # Hold the connection, and the thread, until every other call has one too
+    try:
+        barrier.wait()
+    except BrokenBarrierError:
+        pass
+
+
+async def open_db_connections():
+    """
+    Open the pool's min_size connections, by checking them out from as
+    many DB executor threads at once. More are opened under load, up to
+    the pool's max_size, which workers share (see the serve command).
+    """
+
+    pool = settings.DATABASES["default"].get("OPTIONS", {}).get("pool")
+    connections = pool.get("min_size", 1) if isinstance(pool, dict) else 1
+    connections = max(1, min(connections, get_executor()._max_workers))
+
+    barrier = Barrier(connections, timeout=5)
+    checkout = database_sync_to_async(_checkout_connection)
+    await asyncio.gather(*[checkout(barrier) for _ in range(connections)])
+
+
+@database_sync_to_async
+def prime_caches():
+    """
+    Fill the caches the first requests would otherwise fill: model
+    field lookups, content types, and the roster query.
+    """
+
+    from core.rosters import serialize_room
+    from core.models import Room
+
+    models = apps.get_models()
+    for model in models:
+        model._meta.get_fields()
+    ContentType.objects.get_for_models(*models)
+
+    # A room that doesn't exist, so no rows are fetched
+    serialize_room(Room(id=0, room_name=""))
+
+
+async def _handshake_app(scope, receive, send):
+    scope["user"].is_anonymous
+
+
+async def synthetic_handshake():
+    """
+    Authenticate a websocket scope through the configured auth stack,
+    with a token for a user that doesn't exist: the token is verified and
+    looked up like a real one, but nothing is cached or written.
+    """
+
+    from lobby.middleware import JWTMiddlewareStack, TokenMiddlewareStack
+
+    if settings.WEBSOCKET_SESSIONLESS_AUTH:
+        stack = JWTMiddlewareStack(_handshake_app)
+    else:
+        stack = TokenMiddlewareStack(_handshake_app)
+
+    token = AccessToken()
+    token["user_id"] = 0
+    await stack({
+        "type": "websocket",
+        "path": "/ws/lobby/warmup",
+        "query_string": f"token={token}".encode(),
+        "headers": [(b"cookie", b"sessionid=warmup")]
+    }, None, None)
+
+
+class WarmUp:
+    """
+    Runs WARMUP_STEPS in order, once per worker,
+    recording how long each took or why it failed.
+    """
+
+    def __init__(self):
+        self.state = "pending"
+        self.steps = {}
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    async def run(self):
+        """
+        Run every step, even after one fails. The worker
+        is ready only if they all succeeded.
+        """
+
+        self.state = "running"
+        self.steps = {}
+        failed = False
+
+        for path in getattr(settings, "WARMUP_STEPS", []):
+            start = time.perf_counter()
+            try:
+                await import_string(path)()
+            except Exception as e:
+                logger.exception("Warm-up step %s failed", path)
+                self.steps[path] = {"error": repr(e)}
+                failed = True
+            else:
+                seconds = time.perf_counter() - start
+                self.steps[path] = {"seconds": round(seconds, 4)}
+                warmup_step_seconds.set(path, value=seconds)
+
+        self.state = "failed" if failed else "ready"
+        worker_ready.set(value=int(self.ready))
+        return self.ready
+
+    def status(self):
+        return {"ready": self.ready, "state": self.state, "steps": self.steps}
+
+
+warmup = WarmUp()
@@ -5,3 +5,6 @@ class LobbyConfig(AppConfig):
     label="lobby"
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'lobby'
+
+    def ready(self):
+        from lobby import signals  # noqa: F401
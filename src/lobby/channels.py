@@ -1,15 +1,91 @@
-from channels.layers import get_channel_layer
+from channels.exceptions import ChannelFull
+from channels.layers import get_channel_layer, InMemoryChannelLayer
 from asgiref.sync import async_to_sync
 
+from core.layers import InProcessChannelLayer
+
+from collections import defaultdict
+
+
+class UserChannelIndex:
+    """
+    Channel names of each user group's connections in this process,
+    one per open tab.
+
+    Only complete when every consumer shares this process's channel layer,
+    see is_process_local().
+    """
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+
+    def add(self, group_name, channel_name):
+        self._channels[group_name].add(channel_name)
+
+    def discard(self, group_name, channel_name):
+        channels = self._channels.get(group_name)
+        if channels is not None:
+            channels.discard(channel_name)
+            if not channels:
+                del self._channels[group_name]
+
+    def get(self, group_name):
+        return tuple(self._channels.get(group_name, ()))
+
+    def clear(self):
+        self._channels.clear()
+
+
+user_channel_index = UserChannelIndex()
+
+
+def is_process_local(channel_layer):
+    """
+    Whether all of the layer's channels live in this process,
+    so the index holds every connection of a user.
+    """
+
+    return isinstance(channel_layer, (InProcessChannelLayer, InMemoryChannelLayer))
+
+
+def worker_channel_prefix(channel_layer):
+    """
+    The prefix of the channel names the layer hands out in this process
+    ('specific.<client prefix>!'), or None if they don't have one.
+    """
+
+    client_prefix = getattr(channel_layer, "client_prefix", None)
+    if client_prefix is None:
+        return None
+    return f"specific.{client_prefix}!"
+
 
 async def send_message_to_user_group(group_name, message):
+    """
+    Send straight to the user's indexed channels,
+    falling back to the user group when the index misses.
+    """
+
     channel_layer = get_channel_layer()
-    await channel_layer.group_send(
-        "{}".format(group_name),
-        {
-            "room_name": message.get("room_name"),
-            "group_name": group_name,
-            "type": message.get("type"),
-            "data": message.get("data")
-        }
+    payload = {
+        "room_name": message.get("room_name"),
+        "group_name": group_name,
+        "type": message.get("type"),
+        "data": message.get("data")
+    }
+
+    channel_names = (
+        user_channel_index.get(group_name)
+        if is_process_local(channel_layer) else ()
     )
+
+    if not channel_names:
+        await channel_layer.group_send(group_name, payload)
+        return
+
+    for channel_name in channel_names:
+        try:
+            await channel_layer.send(channel_name, payload)
+        except ChannelFull:
+            # As group_send does
+            pass
@@ -1,15 +1,30 @@
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
-from channels.db import database_sync_to_async
-from django.contrib.auth import get_user_model
+from core.executor import cleanup_database_sync_to_async, database_sync_to_async
 
 from core.models import Room, Player
-from core.exceptions import MessageNotSupportedException, RoomNotFoundException
-from core.serializers import RoomSerializer
+from core.exceptions import (
+    MessageNotSupportedException,
+    RoomNotFoundException,
+    ExecutorQueueFullException
+)
+from core.rosters import serialize_room
+from core.consumers import (
+    AdmissionControlMixin,
+    InstrumentedConsumerMixin,
+    OutboundQueueMixin,
+    DROP_OLDEST
+)
+from core.log import get_logger
 
-from lobby.channels import send_message_to_user_group
+from lobby.channels import send_message_to_user_group, user_channel_index
 
 
-class LobbyConsumer(AsyncJsonWebsocketConsumer):
+log = get_logger(__name__)
+
+
+class LobbyConsumer(
+    InstrumentedConsumerMixin, OutboundQueueMixin, AdmissionControlMixin, AsyncJsonWebsocketConsumer
+):
     """
     Websocket event handler for chess arena lobby
 
@@ -33,6 +48,11 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
         - Player 2 declines request
     """
 
+    # A newer player list supersedes one the client hasn't read yet
+    outbound_policies = {
+        "player.list": DROP_OLDEST
+    }
+
     @database_sync_to_async
     def _add_room(self, room_name, channel_name):
         Room.objects.add_room(
@@ -40,14 +60,11 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
                 user_channel_name=channel_name,
                 user=self.user
             )
-            
-    @database_sync_to_async
-    def _get_user(self, user_id):
-        return get_user_model().objects.get(id=user_id)
-    
-    @database_sync_to_async
+
+    # Run even while the DB executor is full, or the player would linger
+    @cleanup_database_sync_to_async
     def _leave_rooms(self, channel_name):
-        Player.objects.leave_rooms(channel_name=channel_name)
+        Player.objects.filter(channel_name=channel_name).delete()
 
     async def connect(self):
         
@@ -55,16 +72,20 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
         self.room_id = self.scope["url_route"]["kwargs"]["room_id"]
         self.user_group_name = f"user_{self.user.id}"
 
-        print("CHANNEL NAME", self.channel_name)
+        log.debug("lobby.connect", channel=self.channel_name, user=self.user.id)
         
         if self.user.is_anonymous:
             await self.close()
         else:
             self.room_name = f"room_{self.room_id}"
-            await self._add_room(
-                self.room_name,
-                self.channel_name
-            )
+            try:
+                await self._add_room(
+                    self.room_name,
+                    self.channel_name
+                )
+            except ExecutorQueueFullException:
+                await self.refuse("db_executor_full")
+                return
 
             await self.channel_layer.group_add(
                 self.room_name, self.channel_name
@@ -73,9 +94,10 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
             await self.channel_layer.group_add(
                 self.user_group_name, self.channel_name
             )
+            user_channel_index.add(self.user_group_name, self.channel_name)
 
-            await self.channel_layer.group_send(
-                "{}".format(self.user_group_name),
+            await self.channel_layer.send(
+                self.channel_name,
                 {
                     "type": "user.get_group_name",
                     "data": {
@@ -95,6 +117,12 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
             room_group_name, self.channel_name
         )
 
+        if not self.user.is_anonymous:
+            user_channel_index.discard(self.user_group_name, self.channel_name)
+            await self.channel_layer.group_discard(
+                self.user_group_name, self.channel_name
+            )
+
     async def receive_json(self, content, **kwargs):
         message_type = content.get("type")
 
@@ -107,7 +135,7 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
         if message_type in supported_message_types:
             group_name = content.get("group_name")
 
-            print("CONTENT RECEIVED:", content)
+            log.debug("lobby.receive", type=message_type, group=group_name)
 
             await send_message_to_user_group(group_name, content)
         else:
@@ -133,14 +161,9 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
 
     @database_sync_to_async
     def _get_player_list(self, room_name, current_user_email):
-        print("ROOMS:", Room.objects.all())
-
         try:
             room = Room.objects.get(room_name=room_name)
-            serializer = RoomSerializer(room, current_user_email=current_user_email)
-            data = serializer.data
-
-            return data
+            return serialize_room(room, current_user_email=current_user_email)
         except Room.DoesNotExist:
             raise RoomNotFoundException(f"Room with name {room_name} could not be found.")
 
@@ -149,11 +172,9 @@ class LobbyConsumer(AsyncJsonWebsocketConsumer):
 
         current_user_email = message.get("data")["current_user_email"]
 
-        print("MSG:", message)
-        
         try:
             data = await self._get_player_list(room_name, current_user_email)
-            print("DATA!!!!!", data)
+            log.debug("lobby.player_list", room=room_name, players=len(data["players"]))
             await self.send_json({
                 "type": message.get("type"),
                 "data": data
@@ -0,0 +1,127 @@
+from django.core.management import BaseCommand
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from channels.db import database_sync_to_async
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from asgiref.sync import SyncToAsync
+from django.urls import re_path
+from rest_framework_simplejwt.tokens import AccessToken
+
+from arena.consumers import ArenaConsumer
+from arena.models import ArenaRoom
+from core.models import Room, Player
+from lobby.consumers import LobbyConsumer
+from lobby.middleware import TokenMiddlewareStack
+from lobby.token_cache import token_user_cache
+
+from collections import defaultdict
+from unittest.mock import patch
+
+import asyncio
+import time
+
+
+BENCH_EMAIL_DOMAIN = "events-bench.example.com"
+
+IN_MEMORY_CHANNEL_LAYERS = {
+    "default": {
+        "BACKEND": "channels.layers.InMemoryChannelLayer"
+    }
+}
+
+
+class SyncLobbyConsumer(LobbyConsumer):
+    """
+    LobbyConsumer with its previous data access,
+    each call wrapped in database_sync_to_async.
+    """
+
+    @database_sync_to_async
+    def _leave_rooms(self, channel_name):
+        Player.objects.leave_rooms(channel_name=channel_name)
+
+
+class Command(BaseCommand):
+    help = (
+        "Count event loop -> thread hops and latency per websocket event, "
+        "for the previous and current consumers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=100)
+
+    def _application(self, lobby_consumer, arena_consumer):
+        return TokenMiddlewareStack(URLRouter([
+            re_path(r"^ws/lobby/(?P<room_id>\w+)", lobby_consumer.as_asgi()),
+            re_path(r"ws/arena/(?P<room_id>\w+)", arena_consumer.as_asgi())
+        ]))
+
+    async def _timed(self, results, event, coro):
+        hops = self.hops
+        start = time.perf_counter()
+        await coro
+        results[event]["latency"].append(time.perf_counter() - start)
+        results[event]["hops"].append(self.hops - hops)
+
+    async def _run(self, application, tokens):
+        results = defaultdict(lambda: {"latency": [], "hops": []})
+
+        for i, token in enumerate(tokens):
+            # Serve handshakes from the token cache, so only consumer hops count
+            for path in (f"ws/lobby/bench?token={token}", f"ws/arena/bench{i}?token={token}"):
+                event = path.split("/")[1]
+                communicator = WebsocketCommunicator(application, path)
+                await self._timed(results, f"{event}.connect", communicator.connect())
+                if event == "lobby":
+                    await communicator.receive_json_from()
+                await self._timed(results, f"{event}.disconnect", communicator.disconnect())
+
+        return results
+
+    def _report(self, label, results):
+        self.stdout.write(label)
+        for event, measures in results.items():
+            latency = sorted(measures["latency"])
+            hops = measures["hops"]
+            self.stdout.write(
+                f"  {event:<18} hops/event {sum(hops) / len(hops):>5.2f}  "
+                f"p50 {latency[len(latency) // 2] * 1000:>7.2f}ms  "
+                f"p99 {latency[int(len(latency) * 0.99) - 1] * 1000:>7.2f}ms"
+            )
+
+    async def _bench(self, tokens):
+        for label, consumers in (
+            ("database_sync_to_async", (SyncLobbyConsumer, ArenaConsumer)),
+            ("current consumers", (LobbyConsumer, ArenaConsumer))
+        ):
+            application = self._application(*consumers)
+            # Warm the token cache and connection pool
+            await self._run(application, tokens[:1])
+            self._report(label, await self._run(application, tokens))
+
+    def handle(self, *args, **options):
+        self.hops = 0
+        sync_to_async_call = SyncToAsync.__call__
+
+        def counting_call(instance, *args, **kwargs):
+            self.hops += 1
+            return sync_to_async_call(instance, *args, **kwargs)
+
+        users = [
+            get_user_model().objects.create_user(email=f"{i}@{BENCH_EMAIL_DOMAIN}")
+            for i in range(options["iterations"])
+        ]
+        tokens = [str(AccessToken.for_user(user)) for user in users]
+
+        try:
+            with override_settings(CHANNEL_LAYERS=IN_MEMORY_CHANNEL_LAYERS), \
+                    patch.object(SyncToAsync, "__call__", counting_call):
+                asyncio.run(self._bench(tokens))
+        finally:
+            Room.objects.filter(room_name__in=["room_bench"]).delete()
+            ArenaRoom.objects.filter(room_name__startswith="chess_bench").delete()
+            get_user_model().objects.filter(
+                email__endswith=f"@{BENCH_EMAIL_DOMAIN}"
+            ).delete()
+            token_user_cache.clear()
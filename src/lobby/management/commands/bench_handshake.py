@@ -0,0 +1,84 @@
+from django.core.management import BaseCommand
+from django.contrib.auth import get_user_model
+
+from authenticate.serializers import ClaimsTokenObtainPairSerializer
+from lobby.middleware import TokenMiddlewareStack, JWTMiddlewareStack
+from lobby.token_cache import token_user_cache
+
+import asyncio
+import time
+
+
+async def _inner_app(scope, receive, send):
+    # Touch the user, as a consumer's connect() would
+    scope["user"].is_anonymous
+
+
+class Command(BaseCommand):
+    help = "Benchmark websocket handshake auth for the session and sessionless stacks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=2000)
+
+    def _report(self, label, timings):
+        timings = sorted(timings)
+        total = sum(timings)
+        p50 = timings[len(timings) // 2]
+        p99 = timings[int(len(timings) * 0.99) - 1]
+
+        self.stdout.write(
+            f"{label:<28} {len(timings) / total:>10.0f}/s "
+            f"p50 {p50 * 1e6:>8.1f}us  p99 {p99 * 1e6:>8.1f}us"
+        )
+
+    async def _run(self, stack, token, iterations, clear_cache=False):
+        scope = {
+            "type": "websocket",
+            "path": "/ws/lobby/bench",
+            "query_string": f"token={token}".encode(),
+            "headers": [(b"cookie", b"sessionid=bench")]
+        }
+
+        timings = []
+        for _ in range(iterations):
+            if clear_cache:
+                token_user_cache.clear()
+            start = time.perf_counter()
+            await stack(scope, None, None)
+            timings.append(time.perf_counter() - start)
+
+        return timings
+
+    async def _bench(self, token, iterations):
+        session_stack = TokenMiddlewareStack(_inner_app)
+        sessionless_stack = JWTMiddlewareStack(_inner_app)
+
+        self._report(
+            "session stack (uncached)",
+            await self._run(session_stack, token, iterations, clear_cache=True)
+        )
+        self._report(
+            "session stack (cached)",
+            await self._run(session_stack, token, iterations)
+        )
+        self._report(
+            "sessionless stack",
+            await self._run(sessionless_stack, token, iterations)
+        )
+
+    def handle(self, *args, **options):
+        """
+        Time N handshakes through each middleware stack
+        for a throwaway user, then delete the user.
+        """
+
+        user, _ = get_user_model().objects.get_or_create(
+            email="handshake-bench@example.com"
+        )
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+        try:
+            asyncio.run(self._bench(token, options["iterations"]))
+        finally:
+            user.delete()
+            token_user_cache.clear()
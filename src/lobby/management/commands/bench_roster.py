@@ -0,0 +1,87 @@
+from django.core.management import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from core.models import Room, Player
+from core.rosters import serialize_room
+from core.serializers import RoomSerializer
+
+import json
+import time
+
+
+BENCH_EMAIL_DOMAIN = "roster-bench.example.com"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark serializing a lobby roster with RoomSerializer and with "
+        "serialize_room, for rooms of 100, 1k and 10k players."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, nargs="+", default=[100, 1000, 10000])
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def _time(self, serialize, repeat):
+        """
+        Best time over repeat runs, the queries of one run, and its output as JSON.
+        """
+
+        queries = []
+
+        def count_query(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        timings = []
+        for _ in range(repeat):
+            queries.clear()
+            with connection.execute_wrapper(count_query):
+                start = time.perf_counter()
+                data = serialize()
+                timings.append(time.perf_counter() - start)
+        return min(timings), len(queries), json.dumps(data)
+
+    def _bench(self, players, repeat):
+        room = Room.objects.create(room_name=f"roster_bench_{players}")
+        users = get_user_model().objects.bulk_create(
+            get_user_model()(email=f"player{i}-{players}@{BENCH_EMAIL_DOMAIN}")
+            for i in range(players)
+        )
+        Player.objects.bulk_create(
+            Player(room=room, auth_user=user, channel_name=f"bench.{user.email}")
+            for user in users
+        )
+        current_user_email = users[0].email
+
+        drf_seconds, drf_queries, drf_output = self._time(
+            lambda: RoomSerializer(room, current_user_email=current_user_email).data,
+            repeat
+        )
+        fast_seconds, fast_queries, fast_output = self._time(
+            lambda: serialize_room(room, current_user_email=current_user_email),
+            repeat
+        )
+        if fast_output != drf_output:
+            raise CommandError(f"serialize_room output differs from RoomSerializer at {players} players")
+
+        self.stdout.write(
+            f"{players:>6} players  "
+            f"RoomSerializer {drf_seconds * 1000:>9.2f}ms ({drf_queries} queries)  "
+            f"serialize_room {fast_seconds * 1000:>8.2f}ms ({fast_queries} queries)  "
+            f"{drf_seconds / fast_seconds:>6.1f}x"
+        )
+
+    def handle(self, *args, **options):
+        """
+        Fill a room per size with throwaway users, check both serializers
+        produce the same JSON, report their best times, and clean up.
+        """
+
+        try:
+            for players in options["players"]:
+                self._bench(players, options["repeat"])
+        finally:
+            Room.objects.filter(room_name__startswith="roster_bench_").delete()
+            get_user_model().objects.filter(email__endswith=f"@{BENCH_EMAIL_DOMAIN}").delete()
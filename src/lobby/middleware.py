@@ -1,45 +1,146 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import AnonymousUser
-from django.db import close_old_connections
 from django.core.exceptions import ObjectDoesNotExist
-from channels.db import database_sync_to_async
+from django.db import router
+from core.executor import database_sync_to_async
 from channels.sessions import CookieMiddleware, SessionMiddleware
 from channels.auth import AuthMiddleware
+from channels.middleware import BaseMiddleware
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 
+from core import admission, metrics, queries
+from core.exceptions import ExecutorQueueFullException
+from lobby.token_cache import token_user_cache
+
 
 from urllib.parse import parse_qs
 
+import time
+
 
 @database_sync_to_async
-def get_user(scope):
+def _resolve_user(raw_token):
     """
-    
+    Verify the token and fetch its user from the DB,
+    caching the result for subsequent handshakes.
     """
 
-    # Close any DB connections to avoid stale connections
-    close_old_connections()
-    query_string = parse_qs(scope["query_string"].decode())
-    token = query_string.get("token")
-    if not token:
-        return AnonymousUser()
-    
     try:
-        access_token = AccessToken(token[0])
+        access_token = AccessToken(raw_token)
         user = get_user_model().objects.get(id=access_token["user_id"])
-    except ObjectDoesNotExist:
-        return AnonymousUser
+    except (TokenError, ObjectDoesNotExist):
+        return AnonymousUser()
     
     if not user.is_active:
-        return AnonymousUser
+        return AnonymousUser()
     
+    token_user_cache.set(raw_token, access_token["exp"], user)
     return user
+
+
+async def get_user(scope):
+    """
+    Resolve the user for the token passed in the query string.
+
+    Tokens already verified by this worker are served from
+    the token cache, without a thread hop or DB query.
+    """
+
+    query_string = parse_qs(scope["query_string"].decode())
+    token = query_string.get("token")
+    if not token:
+        return AnonymousUser()
+    
+    user = token_user_cache.get(token[0])
+    if user is not None:
+        return user
+
+    return await _resolve_user(token[0])
     
 
 class TokenMiddleware(AuthMiddleware):
+    """
+    AuthMiddleware resolving the user from the token in the query string.
+
+    If the DB executor is too busy to look the token up, the user is
+    anonymous and the connection is refused by admission control,
+    closed with OVERLOADED_CLOSE_CODE.
+    """
+
     async def resolve_scope(self, scope):
-        scope["user"]._wrapped = await get_user(scope)
+        start = time.perf_counter()
+        with queries.accounting("TokenMiddleware.handshake"):
+            try:
+                scope["user"]._wrapped = await get_user(scope)
+            except ExecutorQueueFullException:
+                scope["user"]._wrapped = AnonymousUser()
+                admission.refuse(scope, "db_executor_full")
+        metrics.handshake_seconds.observe("token", value=time.perf_counter() - start)
     
 
 def TokenMiddlewareStack(inner):
     return CookieMiddleware(SessionMiddleware(TokenMiddleware(inner)))
+
+
+# User fields set from the token's claims, with their defaults for tokens
+# issued without them. password and last_login are left deferred.
+CLAIM_FIELDS = {
+    "email": "",
+    "name": "",
+    "is_staff": False,
+    "is_superuser": False
+}
+
+
+def get_user_from_claims(scope):
+    """
+    Build the user from the claims of the token passed in the query string,
+    without touching the DB.
+
+    The user is a User instance marked as loaded from the DB with id and
+    the CLAIM_FIELDS set, so it can be assigned to foreign keys and passes
+    is_active/is_staff/is_superuser checks without a query. Accessing
+    password or last_login would fetch them, which async code can't do.
+    """
+
+    query_string = parse_qs(scope["query_string"].decode())
+    token = query_string.get("token")
+    if not token:
+        return AnonymousUser()
+
+    try:
+        access_token = AccessToken(token[0])
+    except TokenError:
+        return AnonymousUser()
+
+    User = get_user_model()
+    return User.from_db(
+        router.db_for_read(User),
+        ["id", *CLAIM_FIELDS],
+        [
+            access_token["user_id"],
+            *(access_token.get(field, default) for field, default in CLAIM_FIELDS.items())
+        ]
+    )
+
+
+class JWTMiddleware(BaseMiddleware):
+    """
+    Populates scope["user"] from the access token's claims.
+    Requires no session, so needs no cookie or session middleware.
+
+    Since the DB isn't consulted, a deactivated user stays
+    authenticated until their access token expires.
+    """
+
+    async def __call__(self, scope, receive, send):
+        start = time.perf_counter()
+        scope = dict(scope)
+        scope["user"] = get_user_from_claims(scope)
+        metrics.handshake_seconds.observe("jwt", value=time.perf_counter() - start)
+        return await super().__call__(scope, receive, send)
+
+
+def JWTMiddlewareStack(inner):
+    return JWTMiddleware(inner)
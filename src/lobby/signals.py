@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from lobby.token_cache import broadcast_invalidation, token_user_cache
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_tokens(sender, instance, **kwargs):
+    """
+    Drop cached handshake users when the user changes
+    (e.g. is deactivated) or is deleted.
+
+    This process's entries are dropped straight away,
+    other workers' once the broadcast reaches them.
+    """
+
+    # A new user has no tokens cached yet
+    if kwargs.get("created"):
+        return
+
+    token_user_cache.invalidate_user(instance.id)
+    broadcast_invalidation(instance.id)
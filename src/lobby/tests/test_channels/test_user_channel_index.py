@@ -0,0 +1,68 @@
+from django.test import SimpleTestCase
+from asgiref.sync import async_to_sync
+from channels_redis.core import RedisChannelLayer
+
+from core.layers import InProcessChannelLayer
+from lobby.channels import send_message_to_user_group, user_channel_index
+
+from unittest.mock import patch, AsyncMock
+
+
+class SendMessageToUserGroupTests(SimpleTestCase):
+    """
+    - Messages sent to every indexed channel of the user
+    - Group used when the index misses
+    - Index not consulted for layers shared between processes
+    """
+
+    message = {"type": "lobby.challenge", "data": {"colour": "white"}}
+
+    def setUp(self):
+        self.layer = InProcessChannelLayer()
+        patcher = patch("lobby.channels.get_channel_layer", return_value=self.layer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(user_channel_index.clear)
+
+    def test_sent_to_each_indexed_channel(self):
+        user_channel_index.add("user_1", "tab_one.channel")
+        user_channel_index.add("user_1", "tab_two.channel")
+
+        with patch.object(self.layer, "group_send", AsyncMock()) as group_send:
+            async_to_sync(send_message_to_user_group)("user_1", self.message)
+
+        group_send.assert_not_called()
+        for channel_name in ("tab_one.channel", "tab_two.channel"):
+            received = async_to_sync(self.layer.receive)(channel_name)
+            self.assertEqual(received["type"], "lobby.challenge")
+            self.assertEqual(received["group_name"], "user_1")
+
+    def test_discarded_channel_not_sent_to(self):
+        user_channel_index.add("user_1", "tab_one.channel")
+        user_channel_index.add("user_1", "tab_two.channel")
+        user_channel_index.discard("user_1", "tab_one.channel")
+
+        async_to_sync(send_message_to_user_group)("user_1", self.message)
+
+        self.assertEqual(user_channel_index.get("user_1"), ("tab_two.channel",))
+        self.assertNotIn("tab_one.channel", self.layer.channels)
+
+    def test_group_used_when_index_misses(self):
+        async_to_sync(self.layer.group_add)("user_2", "tab.channel")
+
+        async_to_sync(send_message_to_user_group)("user_2", self.message)
+
+        received = async_to_sync(self.layer.receive)("tab.channel")
+        self.assertEqual(received["type"], "lobby.challenge")
+
+    def test_group_used_for_shared_layers(self):
+        layer = RedisChannelLayer()
+        user_channel_index.add("user_1", "tab.channel")
+
+        with patch("lobby.channels.get_channel_layer", return_value=layer), \
+                patch.object(layer, "group_send", AsyncMock()) as group_send, \
+                patch.object(layer, "send", AsyncMock()) as send:
+            async_to_sync(send_message_to_user_group)("user_1", self.message)
+
+        group_send.assert_awaited_once()
+        send.assert_not_called()
@@ -5,6 +5,7 @@ from django.db.models import Q
 from common.tests.constants import TEST_CHANNEL_LAYERS
 from common.tests.utils import acreate_user_with_token, create_user
 
+from core.executor import get_executor
 from core.models import Room, Player
 from core.tasks import prune_players
 
@@ -52,6 +53,10 @@ class TestLobbyWebsocket:
     def get_player_by_email(self, email):
         return Player.objects.get(auth_user__email=email)
     
+    @database_sync_to_async
+    def player_exists(self, email):
+        return Player.objects.filter(auth_user__email=email).exists()
+
     @database_sync_to_async
     def get_all_players(self):
         return Player.objects.all()
@@ -515,6 +520,31 @@ class TestLobbyWebsocket:
         await self.assert_expected_player_list_length(test_room, 2)
         await self.assert_players_in_player_list(test_room, all_players_except_disconnected_user)
 
+    async def test_player_removed_while_executor_full(self, settings, origin_headers):
+        """
+        Test that a disconnecting player leaves its rooms
+        even while the DB executor is rejecting calls.
+        """
+
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        user, token = await acreate_user_with_token()
+
+        communicator = WebsocketCommunicator(
+            application=application,
+            path=f"ws/lobby/{lobby_room_id}?token={token}",
+            headers=[origin_headers]
+        )
+
+        connected, _ = await communicator.connect()
+        assert connected is True
+        await self.assert_room_created_with_associated_player(user)
+
+        with patch.object(get_executor(), "max_queue", 0):
+            await communicator.disconnect()
+
+        assert not await self.player_exists(user.email)
+
     # @patch("core.models.datetime")
     # async def test_inactive_player_removed_from_player_list(self, 
     #                                                         patched_time,
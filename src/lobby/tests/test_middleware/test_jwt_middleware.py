@@ -0,0 +1,125 @@
+from channels.testing import WebsocketCommunicator
+from channels.routing import URLRouter
+from channels.db import database_sync_to_async
+from django.test import TestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from authenticate.serializers import ClaimsTokenObtainPairSerializer
+from common.tests.constants import TEST_CHANNEL_LAYERS
+from common.tests.utils import create_user
+from core.models import Player
+from lobby.middleware import JWTMiddlewareStack, get_user_from_claims
+from lobby.routing import websocket_urlpatterns
+
+import pytest
+
+
+def create_user_with_claims_token(email="test@example.com"):
+    user = create_user(email=email)
+    token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+    return user, token
+
+
+class UserFromClaimsTests(TestCase):
+    """
+    - User built from token claims without DB queries, including the
+      fields permission checks read
+    - Tokens issued without the flag claims build a non-staff user
+    - Missing or invalid token resolves to AnonymousUser
+    """
+
+    def test_user_built_from_claims(self):
+        user, token = create_user_with_claims_token()
+        scope = {"query_string": f"token={token}".encode()}
+
+        with self.assertNumQueries(0):
+            claims_user = get_user_from_claims(scope)
+
+            self.assertEqual(claims_user.id, user.id)
+            self.assertEqual(claims_user.email, user.email)
+            self.assertFalse(claims_user.is_anonymous)
+            self.assertTrue(claims_user.is_active)
+            self.assertFalse(claims_user.is_staff)
+            self.assertFalse(claims_user.is_superuser)
+
+        self.assertEqual(claims_user.get_deferred_fields(), {"password", "last_login"})
+
+    def test_staff_flags_from_claims(self):
+        user = create_user(email="staff@example.com")
+        user.is_staff = user.is_superuser = True
+        user.save()
+        token = ClaimsTokenObtainPairSerializer.get_token(user).access_token
+        scope = {"query_string": f"token={token}".encode()}
+
+        with self.assertNumQueries(0):
+            claims_user = get_user_from_claims(scope)
+            self.assertTrue(claims_user.is_staff)
+            self.assertTrue(claims_user.is_superuser)
+
+    def test_missing_flag_claims_build_non_staff_user(self):
+        user = create_user()
+        token = AccessToken.for_user(user)
+        scope = {"query_string": f"token={token}".encode()}
+
+        with self.assertNumQueries(0):
+            claims_user = get_user_from_claims(scope)
+            self.assertEqual(claims_user.id, user.id)
+            self.assertFalse(claims_user.is_staff)
+
+    def test_missing_token_returns_anonymous_user(self):
+        scope = {"query_string": b""}
+
+        self.assertTrue(get_user_from_claims(scope).is_anonymous)
+
+    def test_invalid_token_returns_anonymous_user(self):
+        scope = {"query_string": b"token=invalid"}
+
+        self.assertTrue(get_user_from_claims(scope).is_anonymous)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestJWTMiddlewareStack:
+
+    @database_sync_to_async
+    def create_user_with_claims_token(self):
+        return create_user_with_claims_token()
+
+    @database_sync_to_async
+    def assert_player_created_for_user(self, user):
+        assert Player.objects.get(auth_user=user).auth_user.email == user.email
+
+    async def test_lobby_connect_with_claims_user(self, settings):
+        """
+        Test the lobby accepts a socket authenticated by the
+        sessionless stack, and seats the claims-built user.
+        """
+
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        user, token = await self.create_user_with_claims_token()
+
+        communicator = WebsocketCommunicator(
+            application=JWTMiddlewareStack(URLRouter(websocket_urlpatterns)),
+            path=f"ws/lobby/lobby_1?token={token}"
+        )
+
+        connected, _ = await communicator.connect()
+        assert connected is True
+
+        await self.assert_player_created_for_user(user)
+
+        await communicator.disconnect()
+
+    async def test_lobby_rejects_anonymous_user(self, settings):
+        settings.CHANNEL_LAYERS = TEST_CHANNEL_LAYERS
+
+        communicator = WebsocketCommunicator(
+            application=JWTMiddlewareStack(URLRouter(websocket_urlpatterns)),
+            path="ws/lobby/lobby_1"
+        )
+
+        connected, _ = await communicator.connect()
+        assert connected is False
+
+        await communicator.disconnect()
@@ -0,0 +1,176 @@
+from django.test import TestCase, override_settings
+
+from common.tests.utils import acreate_user_with_token, create_user_with_token
+from lobby.middleware import get_user
+from lobby.token_cache import (
+    TokenUserCache,
+    broadcast_invalidation,
+    cache_evictions,
+    cache_lookups,
+    listen_for_invalidations,
+    token_user_cache
+)
+from asgiref.sync import sync_to_async
+from channels.layers import InMemoryChannelLayer
+from core import metrics
+
+from unittest.mock import patch
+
+import asyncio
+import pytest
+import time
+
+
+class TokenUserCacheTests(TestCase):
+    """
+    - Cache hit and miss accounting
+    - Entries expire with the token
+    - Least recently used entries evicted once full
+    - User entries invalidated on save/delete
+    - Lookups, evictions and size exported as metrics
+    """
+
+    def test_get_returns_cached_user(self):
+        cache = TokenUserCache(max_size=10, max_age=60)
+        user = create_user_with_token()[0]
+
+        self.assertIsNone(cache.get("token"))
+        cache.set("token", time.time() + 60, user)
+
+        self.assertEqual(cache.get("token"), user)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.hit_rate, 0.5)
+
+    def test_entry_expires_with_token(self):
+        cache = TokenUserCache(max_size=10, max_age=60)
+        user = create_user_with_token()[0]
+
+        cache.set("token", time.time() + 5, user)
+
+        with patch("lobby.token_cache.time.time", return_value=time.time() + 10):
+            self.assertIsNone(cache.get("token"))
+
+        self.assertEqual(cache.stats()["size"], 0)
+
+    def test_least_recently_used_entry_evicted(self):
+        cache = TokenUserCache(max_size=2, max_age=60)
+        user = create_user_with_token()[0]
+        expires_at = time.time() + 60
+
+        cache.set("first", expires_at, user)
+        cache.set("second", expires_at, user)
+        cache.get("first")
+        cache.set("third", expires_at, user)
+
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("first"), user)
+        self.assertEqual(cache.get("third"), user)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_saving_user_invalidates_cached_tokens(self):
+        user, token = create_user_with_token()
+        token_user_cache.set(str(token), time.time() + 60, user)
+
+        user.save()
+
+        self.assertIsNone(token_user_cache.get(str(token)))
+
+    def test_deleting_user_invalidates_cached_tokens(self):
+        user, token = create_user_with_token()
+        token_user_cache.set(str(token), time.time() + 60, user)
+
+        user.delete()
+
+        self.assertIsNone(token_user_cache.get(str(token)))
+
+
+    @override_settings(METRICS_DIR=None)
+    def test_stats_exported_as_metrics(self):
+        cache = TokenUserCache(max_size=1, max_age=60)
+        user = create_user_with_token()[0]
+        hits = cache_lookups.values.get(("hit",), 0)
+        misses = cache_lookups.values.get(("miss",), 0)
+        evictions = cache_evictions.values.get((), 0)
+
+        cache.get("token")
+        cache.set("token", time.time() + 60, user)
+        cache.get("token")
+        cache.set("other", time.time() + 60, user)
+
+        self.assertEqual(cache_lookups.values[("hit",)], hits + 1)
+        self.assertEqual(cache_lookups.values[("miss",)], misses + 1)
+        self.assertEqual(cache_evictions.values[()], evictions + 1)
+
+        token_user_cache.set("token", time.time() + 60, user)
+        self.addCleanup(token_user_cache.clear)
+        text = metrics.render(metrics.collect())
+        self.assertIn("# TYPE token_user_cache_lookups_total counter", text)
+        self.assertIn("token_user_cache_size 1", text)
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.asyncio
+class TestCachedGetUser:
+
+    @pytest.fixture(autouse=True)
+    def clear_token_cache(self):
+        token_user_cache.clear()
+        yield
+        token_user_cache.clear()
+
+    async def test_cached_token_does_not_hit_db(self):
+        """
+        Test that only the first handshake with a given token
+        verifies it and fetches the user from the DB.
+        """
+
+        user, token = await acreate_user_with_token()
+        scope = {"query_string": f"token={token}".encode()}
+
+        assert (await get_user(scope)).id == user.id
+
+        with patch("lobby.middleware._resolve_user") as resolve_user:
+            assert (await get_user(scope)).id == user.id
+            resolve_user.assert_not_called()
+
+        assert token_user_cache.hits == 1
+        assert token_user_cache.misses == 1
+
+    async def test_invalid_token_is_anonymous(self):
+        """
+        Test that a token failing verification resolves to an
+        AnonymousUser instance, and isn't cached.
+        """
+
+        user = await get_user({"query_string": b"token=not-a-jwt"})
+
+        assert user.is_anonymous
+        assert token_user_cache.stats()["size"] == 0
+
+    async def test_invalidation_broadcast_to_workers(self):
+        """
+        Test that a user's save, broadcast through the channel layer,
+        drops their entries from a listening worker's cache.
+        """
+
+        user, token = await acreate_user_with_token()
+        channel_layer = InMemoryChannelLayer()
+        listener = asyncio.ensure_future(listen_for_invalidations(channel_layer))
+
+        try:
+            # Let the listener join the group
+            await asyncio.sleep(0.01)
+            token_user_cache.set(str(token), time.time() + 60, user)
+
+            with patch("lobby.token_cache.get_channel_layer", return_value=channel_layer), \
+                    patch("lobby.token_cache.is_process_local", return_value=False):
+                await sync_to_async(broadcast_invalidation)(user.id)
+
+            for _ in range(100):
+                if token_user_cache.stats()["size"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            assert token_user_cache.get(str(token)) is None
+        finally:
+            listener.cancel()
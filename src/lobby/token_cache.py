@@ -0,0 +1,220 @@
+from django.conf import settings
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+
+from core import metrics
+from core.log import get_logger
+from lobby.channels import is_process_local
+
+from collections import OrderedDict
+from hashlib import sha256
+from threading import Lock
+
+import asyncio
+import time
+
+
+log = get_logger(__name__)
+
+# Channel layer group of the workers' invalidation listeners
+INVALIDATION_GROUP = "token_user_cache"
+
+
+cache_lookups = metrics.Counter(
+    "token_user_cache_lookups_total",
+    "Handshake token cache lookups, by result: hit or miss",
+    ("result",)
+)
+cache_evictions = metrics.Counter(
+    "token_user_cache_evictions_total",
+    "Entries evicted from the handshake token cache to stay under its size"
+)
+cache_size = metrics.Gauge(
+    "token_user_cache_size",
+    "Entries in the handshake token cache"
+)
+
+
+class TokenUserCache:
+    """
+    Bounded LRU cache of verified access token -> user.
+
+    Entries are keyed by a hash of the raw token, so a hit means the exact
+    same token has already had its signature verified. An entry expires
+    with its token (or after max_age seconds, whichever comes first), and
+    all of a user's entries are dropped when that user is saved or deleted.
+
+    The cache is per process. Saves invalidate the saving process's entries
+    and are broadcast to the other workers through the channel layer (see
+    listen_for_invalidations); a worker that misses the broadcast keeps
+    serving a deactivated user for up to max_age seconds.
+
+    Shared between the event loop and the sync-to-async threads,
+    so every access is made under a lock.
+    """
+
+    def __init__(self, max_size=None, max_age=None):
+        self.max_size = max_size
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(raw_token):
+        return sha256(raw_token.encode()).hexdigest()
+
+    def _get_max_size(self):
+        if self.max_size is None:
+            return getattr(settings, "TOKEN_USER_CACHE_SIZE", 10000)
+        return self.max_size
+
+    def _get_max_age(self):
+        if self.max_age is None:
+            return getattr(settings, "TOKEN_USER_CACHE_MAX_AGE", 300)
+        return self.max_age
+
+    def _discard(self, key):
+        user, _ = self._entries.pop(key)
+        keys = self._keys_by_user.get(user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[user.id]
+
+    def get(self, raw_token):
+        """
+        Return the cached user for the token, or None on a miss.
+        """
+
+        key = self._key(raw_token)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                cache_lookups.inc("miss")
+                return None
+
+            user, expires_at = entry
+            if expires_at <= time.time():
+                self._discard(key)
+                self.misses += 1
+                cache_lookups.inc("miss")
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            cache_lookups.inc("hit")
+            return user
+
+    def set(self, raw_token, expires_at, user):
+        """
+        Cache a user against a verified token, expiring at the
+        token's 'exp' claim (epoch seconds).
+        """
+
+        key = self._key(raw_token)
+        expires_at = min(expires_at, time.time() + self._get_max_age())
+
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+
+            self._entries[key] = (user, expires_at)
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+
+            while len(self._entries) > self._get_max_size():
+                oldest_key = next(iter(self._entries))
+                self._discard(oldest_key)
+                self.evictions += 1
+                cache_evictions.inc()
+
+    def invalidate_user(self, user_id):
+        with self._lock:
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self._discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate
+        }
+
+
+token_user_cache = TokenUserCache()
+
+
+def _collect_token_user_cache():
+    cache_size.set(value=len(token_user_cache._entries))
+
+
+metrics.registry.register_collector(_collect_token_user_cache)
+
+
+def broadcast_invalidation(user_id):
+    """
+    Ask every worker's listener to drop the user's entries. A failure
+    is logged rather than raised, so it doesn't fail the user's save.
+    """
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None or is_process_local(channel_layer):
+        return
+
+    try:
+        async_to_sync(channel_layer.group_send)(
+            INVALIDATION_GROUP, {"type": "token_user_cache.invalidate", "user_id": user_id}
+        )
+    except Exception as e:
+        log.warning("token_cache.broadcast_failed", user=user_id, error=str(e))
+
+
+async def listen_for_invalidations(channel_layer=None, retry_interval=5):
+    """
+    Drop the entries of users invalidated by any worker, until cancelled.
+
+    The group is rejoined before the layer's group_expiry ends the
+    membership, and after the layer fails, e.g. while Redis is down.
+    """
+
+    channel_layer = channel_layer or get_channel_layer()
+    rejoin_interval = getattr(channel_layer, "group_expiry", 86400) / 2
+
+    while True:
+        try:
+            channel_name = await channel_layer.new_channel()
+            await channel_layer.group_add(INVALIDATION_GROUP, channel_name)
+            rejoin_at = time.monotonic() + rejoin_interval
+            while True:
+                try:
+                    message = await asyncio.wait_for(
+                        channel_layer.receive(channel_name), rejoin_at - time.monotonic()
+                    )
+                except asyncio.TimeoutError:
+                    await channel_layer.group_add(INVALIDATION_GROUP, channel_name)
+                    rejoin_at = time.monotonic() + rejoin_interval
+                    continue
+                token_user_cache.invalidate_user(message["user_id"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            log.exception("token_cache.listener_failed")
+            await asyncio.sleep(retry_interval)